@@ -6,19 +6,62 @@ from config import Config
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
     
     db.init_app(app)
+    
+    from app import database
+    database.init_app(app)
+    
+    from app import metrics
+    metrics.init_app(app)
+    
+    from app import query_budget
+    query_budget.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'main.admin_login'
     login_manager.login_message = 'يرجى تسجيل الدخول للوصول إلى هذه الصفحة.'
     login_manager.login_message_category = 'info'
     
+    from app import settings_cache
+    settings_cache.init_app(app)
+    
+    from app import page_cache
+    page_cache.init_app(app)
+    
+    from app import compression
+    compression.init_app(app)
+    
+    from app import templating
+    templating.init_app(app)
+    
+    from app import fragment_cache
+    fragment_cache.init_app(app)
+    
+    from app import assets
+    assets.init_app(app)
+    
+    from app import images
+    images.init_app(app)
+    
+    from app import uploads
+    uploads.init_app(app)
+    
+    from app import tasks
+    tasks.init_app(app)
+    
+    from app import stats
+    stats.init_app(app)
+    
     from app.routes import bp
     app.register_blueprint(bp)
     
+    from app.api import api
+    app.register_blueprint(api)
+    
+    from app import cli
+    cli.init_app(app)
+    
     return app
-
-from app import models
\ No newline at end of file
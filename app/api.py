@@ -0,0 +1,200 @@
+from flask import Blueprint, abort, current_app, jsonify, request, url_for
+from sqlalchemy import func
+from werkzeug.exceptions import HTTPException
+
+from app import db
+from app.conditional import conditional_page
+from app.images import load_variants
+from app.models import Product, Review
+from app.page_cache import cached_page
+from app.pagination import decode_cursor, keyset_page
+from app.query_budget import query_budget
+from app.settings_cache import get_site_settings
+
+# Read-only catalog API for apps and external caches.
+#
+# Endpoints select only the columns behind the requested fields (?fields=a,b)
+# and serialize the plain rows, never hydrating ORM objects. Lists page with
+# the same (created_at, id) cursors as the storefront. Responses get ETags
+# from conditional_page and are kept in the page cache like public pages.
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+MAX_LIMIT = 100
+
+
+def _upload_url(filename):
+    return url_for('static', filename='uploads/' + filename) if filename else None
+
+
+def _image(filename, variants):
+    if not filename:
+        return None
+    return {
+        'url': _upload_url(filename),
+        'variants': {name: {'width': entry['width'], 'webp': _upload_url(entry['webp']), 'jpeg': _upload_url(entry['jpeg'])}
+                     for name, entry in load_variants(variants).items()},
+    }
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _column(column, serialize=None):
+    """Field backed by a single column"""
+    if serialize is None:
+        return [column], lambda row: getattr(row, column.key)
+    return [column], lambda row: serialize(getattr(row, column.key))
+
+
+# Public field name -> (columns it needs, function of the row)
+PRODUCT_FIELDS = {
+    'id': _column(Product.id),
+    'name': _column(Product.name),
+    'description': _column(Product.description),
+    'price': _column(Product.price),
+    'category': _column(Product.category),
+    'featured': _column(Product.featured),
+    'image': ([Product.image_filename, Product.image_variants],
+              lambda row: _image(row.image_filename, row.image_variants)),
+    'rating': ([Product.rating_sum, Product.rating_count],
+               lambda row: {'average': round(row.rating_sum / row.rating_count, 1) if row.rating_count else None,
+                            'count': row.rating_count}),
+    'created_at': _column(Product.created_at, _isoformat),
+    'updated_at': _column(Product.updated_at, _isoformat),
+}
+
+REVIEW_FIELDS = {
+    'id': _column(Review.id),
+    'customer_name': _column(Review.customer_name),
+    'comment': _column(Review.comment),
+    'rating': _column(Review.rating),
+    'product_id': _column(Review.product_id),
+    'featured': _column(Review.is_featured),
+    'image': ([Review.image_filename, Review.image_variants],
+              lambda row: _image(row.image_filename, row.image_variants)),
+    'created_at': _column(Review.created_at, _isoformat),
+}
+
+# Site settings a client may see (contact details and branding, nothing internal)
+PUBLIC_SETTINGS = [
+    'site_name', 'site_description', 'background_color', 'secondary_color', 'accent_color', 'theme_style',
+    'contact_phone', 'contact_email', 'whatsapp_number', 'facebook_url', 'instagram_url', 'tiktok_url',
+    'about_text', 'footer_text', 'hero_title', 'hero_subtitle', 'show_reviews', 'show_custom_orders',
+]
+
+
+def _requested_fields(available):
+    """Validate ?fields= against `available`; all fields when it is absent"""
+    fields = request.args.get('fields')
+    if not fields:
+        return list(available)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        abort(400, description=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _select(available, names, *always):
+    """Query for the columns behind `names` (plus `always`, e.g. the cursor columns)"""
+    columns = list(always)
+    for name in names:
+        for column in available[name][0]:
+            if column not in columns:
+                columns.append(column)
+    return db.session.query(*columns)
+
+
+def _serialize(available, names, row):
+    return {name: available[name][1](row) for name in names}
+
+
+def _limit():
+    limit = request.args.get('limit', current_app.config['PRODUCTS_PER_PAGE'], type=int)
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _page(available, query, created_col, id_col, names):
+    cursor = request.args.get('cursor')
+    if cursor and not decode_cursor(cursor):
+        abort(400, description='Invalid cursor')
+
+    rows, next_cursor = keyset_page(query, created_col, id_col, cursor, per_page=_limit())
+    next_url = None
+    if next_cursor:
+        next_url = url_for(request.endpoint, **dict(request.args.to_dict(), cursor=next_cursor))
+    return jsonify({
+        'data': [_serialize(available, names, row) for row in rows],
+        'next_cursor': next_cursor,
+        'next': next_url,
+    })
+
+
+@api.route('/products')
+@query_budget(2)
+@conditional_page('products')
+@cached_page('products')
+def products():
+    names = _requested_fields(PRODUCT_FIELDS)
+    query = _select(PRODUCT_FIELDS, names, Product.id, Product.created_at).filter(Product.is_active == True)
+    category = request.args.get('category')
+    if category:
+        query = query.filter(Product.category == category)
+    return _page(PRODUCT_FIELDS, query, Product.created_at, Product.id, names)
+
+
+@api.route('/products/<int:product_id>')
+@query_budget(2)
+@conditional_page('products')
+@cached_page('products')
+def product(product_id):
+    names = _requested_fields(PRODUCT_FIELDS)
+    row = _select(PRODUCT_FIELDS, names, Product.id) \
+        .filter(Product.id == product_id, Product.is_active == True).first()
+    if row is None:
+        abort(404, description='Product not found')
+    return jsonify({'data': _serialize(PRODUCT_FIELDS, names, row)})
+
+
+@api.route('/categories')
+@query_budget(2)
+@conditional_page('products')
+@cached_page('products')
+def categories():
+    # Covered by ix_product_active_category_created
+    rows = db.session.query(Product.category, func.count(Product.id)) \
+        .filter(Product.is_active == True, Product.category.isnot(None), Product.category != '') \
+        .group_by(Product.category).order_by(Product.category)
+    return jsonify({'data': [{'name': name, 'product_count': count} for name, count in rows]})
+
+
+@api.route('/reviews')
+@query_budget(2)
+@conditional_page('reviews')
+@cached_page('reviews')
+def reviews():
+    names = _requested_fields(REVIEW_FIELDS)
+    query = _select(REVIEW_FIELDS, names, Review.id, Review.created_at).filter(Review.is_approved == True)
+    product_id = request.args.get('product_id', type=int)
+    if product_id:
+        query = query.filter(Review.product_id == product_id)
+    return _page(REVIEW_FIELDS, query, Review.created_at, Review.id, names)
+
+
+@api.route('/settings')
+@query_budget(3)
+@conditional_page('settings')
+@cached_page('settings')
+def settings():
+    site_settings = get_site_settings()
+    data = {name: getattr(site_settings, name) for name in PUBLIC_SETTINGS}
+    data['logo'] = _image(site_settings.logo_filename, site_settings.logo_variants)
+    data['hero_image'] = _image(site_settings.hero_image_filename, site_settings.hero_image_variants)
+    return jsonify({'data': data})
+
+
+@api.errorhandler(HTTPException)
+def handle_http_error(error):
+    return jsonify({'error': error.description}), error.code
@@ -0,0 +1,291 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # without the Brotli package only .gz copies are written
+    brotli = None
+
+# Fingerprinted, minified and precompressed CSS/JS.
+#
+# `flask --app wsgi build-assets` minifies every .css and .js file under
+# app/static into app/static/build/, named after a hash of the content
+# (css/style.css -> build/css/style.3f9a0c1d2b7e.css), writes .gz and .br
+# copies next to each for nginx's gzip_static/brotli_static, and records
+# the mapping in build/manifest.json. url_for('static', filename=...)
+# resolves through the manifest, so a deploy changes the URL of exactly
+# the assets that changed and nginx can cache the rest forever. Without a
+# build, or with app.debug on, the source files are served as before.
+
+BUILD_DIR = 'build'
+MANIFEST_NAME = 'manifest.json'
+ASSET_EXTENSIONS = ('.css', '.js')
+# Source folders under static/ that hold no assets to build
+SKIP_DIRS = (BUILD_DIR, 'uploads')
+HASH_LENGTH = 12
+# A fingerprinted name never gets different content
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+# Minifiers: both copy strings (and JS template literals and regular
+# expressions) untouched and only drop comments and whitespace.
+
+_CSS_TOKEN = re.compile(r'''"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|/\*.*?(?:\*/|$)|\s+|[^"'/\s]+|/''', re.S)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>~])\s*')
+_CSS_RELATIVE_URL = re.compile(r'''url\(\s*(['"]?)(?![a-z][a-z0-9+.-]*:|/|#)''', re.I)
+
+
+def _squeeze_css(code):
+    code = _CSS_PUNCTUATION.sub(r'\1', re.sub(r' {2,}', ' ', code))
+    # Not before ':', since 'a :hover' and 'a:hover' select different things
+    code = re.sub(r':\s+', ':', code)
+    return code.replace(';}', '}')
+
+
+def minify_css(source):
+    pieces, code = [], []
+    for match in _CSS_TOKEN.finditer(source):
+        token = match.group()
+        if token[0] in '"\'':
+            pieces += [_squeeze_css(''.join(code)), token]
+            code = []
+        elif token.startswith('/*') or token.isspace():
+            code.append(' ')
+        else:
+            code.append(token)
+    pieces.append(_squeeze_css(''.join(code)))
+    return ''.join(pieces).strip()
+
+
+# After these a '/' starts a regular expression rather than a division
+_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'case', 'do', 'else', 'in', 'of', 'new',
+                   'delete', 'void', 'throw', 'yield', 'await'}
+# A line break after these, or before those, can never end a statement
+_JOINS_AFTER = set('{([,;=:?&|*%<>!~^')
+_JOINS_BEFORE = set(')]},;.?:&|')
+
+
+def _is_word(char):
+    return char.isalnum() or char in '_$' or ord(char) > 127
+
+
+def _string_end(source, start):
+    """Index just past the string or template literal opening at `start`"""
+    quote, i, n = source[start], start + 1, len(source)
+    while i < n:
+        char = source[i]
+        if char == '\\':
+            i += 2
+        elif char == quote:
+            return i + 1
+        elif char == '\n' and quote != '`':
+            return i  # unterminated; leave the rest to the parser
+        elif quote == '`' and source.startswith('${', i):
+            i, depth = i + 2, 1
+            while i < n and depth:
+                if source[i] in '"\'`':
+                    i = _string_end(source, i)
+                    continue
+                depth += {'{': 1, '}': -1}.get(source[i], 0)
+                i += 1
+        else:
+            i += 1
+    return n
+
+
+def _regex_end(source, start):
+    """Index just past the regular expression literal at `start`, or None if it is not one"""
+    i, n, in_class = start + 1, len(source), False
+    while i < n:
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '\n':
+            return None
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '/':
+            i += 1
+            while i < n and _is_word(source[i]):
+                i += 1  # flags
+            return i
+        i += 1
+    return None
+
+
+def _separator(previous, following, newline):
+    if newline:
+        if previous in _JOINS_AFTER or following in _JOINS_BEFORE:
+            return ''
+        return '\n'  # may end a statement (automatic semicolon insertion)
+    if (_is_word(previous) and _is_word(following)) or (previous in '+-' and following in '+-'):
+        return ' '
+    return ''
+
+
+def minify_js(source):
+    out, last_token = [], ''
+    i, n = 0, len(source)
+    space = newline = False
+    while i < n:
+        char = source[i]
+        if char.isspace():
+            space, newline = True, newline or char in '\r\n  '
+            i += 1
+            continue
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = n if end < 0 else end
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            space, newline = True, newline or '\n' in source[i:end]
+            i = end
+            continue
+
+        if char in '"\'`':
+            end = _string_end(source, i)
+        elif char == '/' and (not last_token or last_token in _REGEX_KEYWORDS
+                              or not (_is_word(last_token[-1]) or last_token[-1] in ')]')):
+            end = _regex_end(source, i) or i + 1
+        elif _is_word(char):
+            end = i + 1
+            while end < n and _is_word(source[end]):
+                end += 1
+        else:
+            end = i + 1
+        token = source[i:end]
+
+        if space and out:
+            out.append(_separator(out[-1][-1], token[0], newline))
+        out.append(token)
+        last_token = token
+        space = newline = False
+        i = end
+    return ''.join(out)
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _source_files(static_folder):
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder:
+            dirs[:] = [name for name in dirs if name not in SKIP_DIRS]
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(ASSET_EXTENSIONS):
+                yield os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+
+
+def build_assets(static_folder):
+    """Minify, fingerprint and precompress the CSS and JS under static_folder.
+
+    Returns [(source, built, source bytes, minified bytes, gzip bytes,
+    brotli bytes or None)]. Files of the previous build are kept, so
+    pages rendered just before a deploy still find their assets.
+    """
+    build_root = os.path.join(static_folder, BUILD_DIR)
+    manifest_path = os.path.join(build_root, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+
+    manifest, report = {}, []
+    for filename in _source_files(static_folder):
+        with open(os.path.join(static_folder, filename), 'rb') as f:
+            raw = f.read()
+        stem, ext = os.path.splitext(filename)
+        if '.min.' in os.path.basename(filename):
+            data = raw
+        else:
+            text = MINIFIERS[ext](raw.decode('utf-8'))
+            if ext == '.css':
+                # The built file sits one directory deeper than its source
+                text = _CSS_RELATIVE_URL.sub(lambda m: f'url({m.group(1)}../', text)
+            data = text.encode('utf-8')
+
+        built = f'{BUILD_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+        path = os.path.join(static_folder, built)
+        compressed_gzip = gzip.compress(data, 9, mtime=0)
+        compressed_brotli = brotli.compress(data, quality=11) if brotli else None
+        if not os.path.exists(path):
+            _write(path + '.gz', compressed_gzip)
+            if compressed_brotli is not None:
+                _write(path + '.br', compressed_brotli)
+            _write(path, data)
+        manifest[filename] = built
+        report.append((filename, built, len(raw), len(data), len(compressed_gzip),
+                       len(compressed_brotli) if compressed_brotli is not None else None))
+
+    keep = {MANIFEST_NAME}
+    for built in list(manifest.values()) + list(previous.values()):
+        name = os.path.relpath(os.path.join(static_folder, built), build_root)
+        keep.update({name, name + '.gz', name + '.br'})
+    for root, _, files in os.walk(build_root):
+        for name in files:
+            if os.path.relpath(os.path.join(root, name), build_root).replace(os.sep, '/') not in keep:
+                os.remove(os.path.join(root, name))
+
+    _write(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return report
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class AssetManifest:
+    """source filename -> fingerprinted filename, read from the last build on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        self._entries = None
+
+    def get(self, filename):
+        if self._entries is None:
+            self._entries = load_manifest(self.path)
+        return self._entries.get(filename)
+
+
+def _static_url_defaults(endpoint, values):
+    if endpoint != 'static' or current_app.debug:
+        return
+    built = current_app.extensions['assets'].get(values.get('filename'))
+    if built is not None:
+        values['filename'] = built
+
+
+def _cache_built_assets(response):
+    if (request.endpoint == 'static' and response.status_code == 200
+            and (request.view_args or {}).get('filename', '').startswith(BUILD_DIR + '/')):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def init_app(app):
+    if not app.config.get('ASSETS_USE_MANIFEST', True) or app.static_folder is None:
+        return
+    app.extensions['assets'] = AssetManifest(os.path.join(app.static_folder, BUILD_DIR, MANIFEST_NAME))
+    app.url_defaults(_static_url_defaults)
+    app.after_request(_cache_built_assets)
@@ -0,0 +1,87 @@
+from app import db
+from app.models import Product, Review, Testimonial
+from app.uploads import delete_uploads
+
+# Admin bulk actions run as set-based UPDATE/DELETE ... WHERE id IN (...)
+# statements instead of loading and changing rows one by one. Selections are
+# split into chunks to stay under SQLite's host-parameter limit (999 on older
+# builds).
+CHUNK_SIZE = 500
+
+# Flag changes available per model: action -> column values
+BULK_UPDATES = {
+    Review: {
+        'approve': {'is_approved': True},
+        'reject': {'is_approved': False},
+        'feature': {'is_featured': True},
+        'unfeature': {'is_featured': False},
+    },
+    Product: {
+        'activate': {'is_active': True},
+        'deactivate': {'is_active': False},
+        'feature': {'featured': True},
+        'unfeature': {'featured': False},
+    },
+    Testimonial: {
+        'activate': {'is_active': True},
+        'deactivate': {'is_active': False},
+        'feature': {'is_featured': True},
+        'unfeature': {'is_featured': False},
+    },
+}
+
+# Models with a 1-5 star rating that 'update_rating' can set
+RATED_MODELS = (Review, Testimonial)
+
+
+class BulkActionError(Exception):
+    """Raised for an unknown action or invalid action arguments"""
+
+
+def chunked(ids, size=CHUNK_SIZE):
+    ids = sorted({int(row_id) for row_id in ids})
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def bulk_update(model, ids, values):
+    """UPDATE the given rows; returns how many matched"""
+    count = 0
+    for chunk in chunked(ids):
+        count += model.query.filter(model.id.in_(chunk)).update(values, synchronize_session=False)
+    return count
+
+
+def bulk_delete(model, ids):
+    """DELETE the given rows and release their images; returns how many were deleted"""
+    count = 0
+    for chunk in chunked(ids):
+        images = db.session.query(model.image_filename, model.image_variants) \
+            .filter(model.id.in_(chunk), model.image_filename.isnot(None)).all()
+        if model is Product:
+            # Same as deleting one product through the ORM: its reviews stay, unlinked
+            Review.query.filter(Review.product_id.in_(chunk)) \
+                .update({'product_id': None}, synchronize_session=False)
+        count += model.query.filter(model.id.in_(chunk)).delete(synchronize_session=False)
+        # Files are unlinked by a background task once the deletes commit
+        delete_uploads(images)
+    return count
+
+
+def run_bulk_action(model, action, ids, rating=None):
+    """Apply an admin bulk action to rows of `model`; the caller commits.
+
+    Returns the number of rows affected.
+    """
+    if action == 'delete':
+        return bulk_delete(model, ids)
+
+    if action == 'update_rating' and model in RATED_MODELS:
+        if not isinstance(rating, int) or not 1 <= rating <= 5:
+            raise BulkActionError('تقييم غير صحيح')
+        return bulk_update(model, ids, {'rating': rating})
+
+    values = BULK_UPDATES[model].get(action)
+    if values is None:
+        raise BulkActionError('إجراء غير معروف')
+    return bulk_update(model, ids, values)
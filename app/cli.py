@@ -0,0 +1,68 @@
+import os
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app import db
+from app.assets import brotli, build_assets
+from app import search  # its FTS table and triggers are created along with the product table
+from app.models import Admin
+
+# One-off setup that used to happen whenever run.py was imported: the
+# upload folder, the schema and the default admin. Run it once per
+# deployment, before starting the workers:
+#
+#     flask --app wsgi bootstrap
+#
+# create_app() no longer creates directories, tables or users.
+
+
+def bootstrap(app, admin_username='admin', admin_password='admin123'):
+    """Create the upload folder, the tables and the first admin; safe to run again"""
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    with app.app_context():
+        db.create_all()
+        if Admin.query.count():
+            return None
+        admin = Admin(username=admin_username)
+        admin.set_password(admin_password)
+        db.session.add(admin)
+        db.session.commit()
+        return admin
+
+
+@click.command('bootstrap')
+@with_appcontext
+@click.option('--admin-username', default='admin', show_default=True)
+@click.option('--admin-password', default='admin123', show_default=True,
+              help='Only used when there is no admin yet; change it after the first login')
+def bootstrap_command(admin_username, admin_password):
+    """Create the upload folder, the database tables and a default admin."""
+    admin = bootstrap(current_app._get_current_object(), admin_username, admin_password)
+    click.echo(f"✅ Database ready at {current_app.config['SQLALCHEMY_DATABASE_URI']}")
+    if admin is not None:
+        click.echo(f"🔑 Default admin created: username={admin_username}, password={admin_password}")
+        click.echo("⚠️  Change this password after the first login!")
+    else:
+        click.echo("ℹ️  Admin user already exists")
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Minify and fingerprint the CSS/JS under static/ and write .gz/.br copies."""
+    report = build_assets(current_app.static_folder)
+    for source, built, size, minified, gzipped, brotlied in report:
+        sizes = f"{size:,} → {minified:,} bytes, gzip {gzipped:,}"
+        if brotlied is not None:
+            sizes += f", brotli {brotlied:,}"
+        click.echo(f"📦 {source} → {built} ({sizes})")
+    if brotli is None:
+        click.echo("⚠️  Brotli is not installed; only .gz copies were written")
+    click.echo(f"✅ Built {len(report)} assets")
+
+
+def init_app(app):
+    app.cli.add_command(bootstrap_command)
+    app.cli.add_command(build_assets_command)
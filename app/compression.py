@@ -0,0 +1,122 @@
+import gzip
+import re
+from functools import lru_cache
+
+from flask import current_app, request
+
+from app.assets import minify_css, minify_js
+from app.page_cache import get_page_cache
+
+try:
+    import brotli
+except ImportError:  # gzip only without the Brotli package
+    brotli = None
+
+# Minified and compressed HTML when the app answers browsers directly.
+#
+# An after_request hook minifies rendered HTML and compresses it with
+# brotli or gzip, whichever the client's Accept-Encoding prefers. The
+# minifier is deliberately cheap: comments go, every line loses its
+# indentation and blank lines disappear (leaving <pre> and <textarea>
+# alone), and inline <script>/<style> go through the asset minifiers.
+# Spaces within a line are kept, so text renders as before.
+#
+# Responses of other types (JSON, files), redirects, streamed responses
+# and bodies under COMPRESSION_MIN_SIZE are left alone. For a page served
+# from the page cache the finished bytes are stored with the cache entry,
+# once per encoding, so a repeat hit is neither rendered nor compressed
+# again. Behind nginx this can be turned off with RESPONSE_COMPRESSION=0
+# and left to gzip there.
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # per-request compression; higher levels cost far more CPU for a few %
+
+# Comments (not IE conditionals) and elements whose content must not be reflowed
+_HTML_RAW = re.compile(r'<!--(?!\[if).*?-->|<(pre|textarea|script|style)\b([^>]*)>(.*?)</\1\s*>', re.S | re.I)
+_INDENTATION = re.compile(r'\n\s+')
+_SCRIPT_TYPES = ('', 'text/javascript', 'application/javascript', 'module')
+
+
+@lru_cache(maxsize=512)
+def _minify_inline(tag, attrs, body):
+    # Inline scripts and styles come from the templates, so the same few recur on every page
+    if tag == 'style':
+        return minify_css(body)
+    if tag == 'script' and 'src=' not in attrs.lower():
+        script_type = re.search(r'''type\s*=\s*["']?([^"'\s>]+)''', attrs, re.I)
+        if (script_type.group(1).lower() if script_type else '') in _SCRIPT_TYPES:
+            return minify_js(body)
+    return body
+
+
+def minify_html(html):
+    """Drop comments, indentation and blank lines; minify inline scripts and styles"""
+    pieces, position = [], 0
+    for match in _HTML_RAW.finditer(html):
+        pieces.append(_INDENTATION.sub('\n', html[position:match.start()]))
+        tag = match.group(1)
+        if tag:
+            body = _minify_inline(tag.lower(), match.group(2), match.group(3))
+            pieces.append(html[match.start():match.start(3)] + body + html[match.end(3):match.end()])
+        position = match.end()
+    pieces.append(_INDENTATION.sub('\n', html[position:]))
+    return ''.join(pieces).strip()
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL)
+
+
+def choose_encoding(min_size, size):
+    """Best encoding the client accepts for a body of `size` bytes, or None"""
+    if size < min_size:
+        return None
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _compress_response(response):
+    config = current_app.config
+    if (response.status_code < 200 or response.status_code in (204, 304) or 300 <= response.status_code < 400
+            or response.mimetype not in config.get('COMPRESSION_MIMETYPES', ('text/html',))
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    cache_key = request.environ.get('page_cache.key')
+    cache = get_page_cache() if cache_key is not None else None
+    min_size = config.get('COMPRESSION_MIN_SIZE', 1024)
+
+    body = cache.get_encoded(cache_key, 'identity') if cache is not None else None
+    if body is None:
+        body = response.get_data()
+        if config.get('HTML_MINIFY', True) and response.mimetype == 'text/html':
+            body = minify_html(body.decode('utf-8')).encode('utf-8')
+        if cache is not None:
+            cache.set_encoded(cache_key, 'identity', body)
+
+    encoding = choose_encoding(min_size, len(body))
+    if encoding is not None:
+        compressed = cache.get_encoded(cache_key, encoding) if cache is not None else None
+        if compressed is None:
+            compressed = compress(body, encoding)
+            if cache is not None:
+                cache.set_encoded(cache_key, encoding, compressed)
+        body = compressed
+
+    response.set_data(body)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+        # Compressed bytes differ from the identity representation
+        etag, _ = response.get_etag()
+        if etag:
+            response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    if app.config.get('RESPONSE_COMPRESSION', True):
+        app.after_request(_compress_response)
@@ -0,0 +1,94 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from flask import current_app, request, session
+from flask_login import current_user
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Product, Review, SiteSettings
+from app.page_cache import get_page_cache
+
+
+# Newest change per data tag, each answerable from an index in O(log n)
+VERSION_COLUMNS = {
+    'products': lambda: select(func.max(Product.updated_at)),
+    'reviews': lambda: select(func.max(Review.created_at)).filter_by(is_approved=True),
+    'settings': lambda: select(func.max(SiteSettings.updated_at)),
+}
+
+
+def data_version(tags):
+    """Return (etag, last_modified) for the data behind a page.
+
+    Combines the newest updated_at/created_at of each table (one query with
+    a scalar subquery per tag) with the page-cache tag versions, which
+    every admin write bumps, so deletions and moderation changes that
+    leave no timestamp behind still change the validator.
+    """
+    row = db.session.execute(select(*[VERSION_COLUMNS[tag]().scalar_subquery() for tag in tags])).one()
+    cache = get_page_cache()
+
+    # HTTP dates have whole seconds: round up, so a later write within the
+    # same second is never covered by an earlier Last-Modified
+    stamps = []
+    for tag, updated_at in zip(tags, row):
+        if updated_at is not None:
+            stamp = updated_at.replace(tzinfo=timezone.utc)
+            if stamp.microsecond:
+                stamp = stamp.replace(microsecond=0) + timedelta(seconds=1)
+            stamps.append(stamp)
+        tag_version = cache.tag_version(tag)
+        if tag_version:
+            stamps.append(datetime.fromtimestamp(-(-tag_version // 10 ** 9), tz=timezone.utc))
+
+    last_modified = max(stamps) if stamps else None
+    viewer = current_user.get_id() if current_user.is_authenticated else 'anonymous'
+    fingerprint = repr((request.endpoint, sorted((request.view_args or {}).items()),
+                        sorted(request.args.items(multi=True)), viewer,
+                        tuple(row), [cache.tag_version(tag) for tag in tags]))
+    return hashlib.sha1(fingerprint.encode()).hexdigest(), last_modified
+
+
+def conditional_page(*tags):
+    """Answer If-None-Match / If-Modified-Since with 304 before the view renders"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            etag, last_modified = data_version(tags)
+            if last_modified is not None and last_modified >= datetime.now(timezone.utc):
+                # Rounded up into a second that is not over yet: writes later in
+                # that second would get the same date, so only the ETag is safe
+                last_modified = None
+
+            if request.if_none_match:
+                # Weak comparison: compressed responses carry W/"etag"
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                # A date says nothing about the viewer or the query string, which
+                # the ETag covers, so it only validates anonymous pages
+                not_modified = (last_modified is not None and request.if_modified_since is not None
+                                and not current_user.is_authenticated
+                                and last_modified <= request.if_modified_since)
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Let browsers keep the page but revalidate on every use
+            response.cache_control.no_cache = True
+            if current_user.is_authenticated:
+                response.cache_control.private = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,99 @@
+import logging
+import random
+import time
+
+from sqlalchemy import event
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# SQLite engine tuning. Every new pool connection gets SQLITE_PRAGMAS (WAL,
+# so storefront reads never wait for an admin write, plus busy_timeout,
+# cache and mmap sizes, foreign keys). Statements that still fail because
+# another worker holds the write lock are retried with exponential backoff
+# instead of surfacing "database is locked".
+
+# Applied in this order: busy_timeout first so switching to WAL can wait for the lock
+PRAGMA_ORDER = ['busy_timeout', 'journal_mode', 'synchronous', 'foreign_keys', 'cache_size', 'mmap_size']
+
+# Primary result codes of a lock conflict: SQLITE_BUSY, SQLITE_LOCKED
+BUSY_CODES = (5, 6)
+# Another connection committed after this transaction's snapshot was taken;
+# re-running the statement cannot succeed, only a new transaction can
+SQLITE_BUSY_SNAPSHOT = 517
+
+
+def is_busy_error(error):
+    """True for sqlite3 errors caused by another connection holding a lock"""
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        return code & 0xff in BUSY_CODES
+    # Python < 3.11 only gives us the message
+    return 'database is locked' in str(error) or 'database table is locked' in str(error)
+
+
+def _retryable(error):
+    return is_busy_error(error) and getattr(error, 'sqlite_errorcode', None) != SQLITE_BUSY_SNAPSHOT
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    names = [name for name in PRAGMA_ORDER if name in pragmas]
+    names += [name for name in pragmas if name not in PRAGMA_ORDER]
+    cursor = dbapi_connection.cursor()
+    try:
+        for name in names:
+            cursor.execute(f'PRAGMA {name} = {pragmas[name]}')
+    finally:
+        cursor.close()
+
+
+def run_with_retry(execute, retries, backoff):
+    """Call execute(), retrying lock conflicts after backoff, 2*backoff, ... seconds (with jitter)"""
+    for attempt in range(retries + 1):
+        try:
+            return execute()
+        except Exception as e:
+            if attempt == retries or not _retryable(e):
+                raise
+            delay = backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            logger.warning('SQLite busy, retrying in %.3fs (attempt %d of %d)', delay, attempt + 1, retries)
+            time.sleep(delay)
+
+
+def configure_engine(engine, pragmas, retries, backoff):
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    # A statement that hit SQLITE_BUSY changed nothing, so it can be re-run
+    # inside the same transaction; the ORM, bulk actions, raw SQL and the
+    # task runner all go through these hooks.
+    @event.listens_for(engine, 'do_execute')
+    def _execute(cursor, statement, parameters, context):
+        run_with_retry(lambda: cursor.execute(statement, parameters), retries, backoff)
+        return True
+
+    @event.listens_for(engine, 'do_execute_no_params')
+    def _execute_no_params(cursor, statement, context):
+        run_with_retry(lambda: cursor.execute(statement), retries, backoff)
+        return True
+
+    @event.listens_for(engine, 'do_executemany')
+    def _executemany(cursor, statement, parameters, context):
+        run_with_retry(lambda: cursor.executemany(statement, parameters), retries, backoff)
+        return True
+
+
+def init_app(app):
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    configure_engine(
+        engine,
+        pragmas=app.config.get('SQLITE_PRAGMAS', {}),
+        retries=app.config.get('SQLITE_BUSY_RETRIES', 5),
+        backoff=app.config.get('SQLITE_RETRY_BACKOFF', 0.05),
+    )
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+# Rendered template fragments, reused across pages.
+#
+#     {% cache 'card', product.id, product.updated_at %} ... {% endcache %}
+#
+# renders the block once per distinct key and serves the stored markup
+# afterwards, so a product card looks the same on the home page, in every
+# category filter, on every page of /products/more and in search results
+# without re-running its url_for calls and image markup. The key has to
+# cover everything the block reads: for products that is id plus
+# updated_at, which every write path moves (ORM edits, bulk actions, image
+# variants and the rating triggers), so an edited product gets a new key
+# and the old card simply ages out of the LRU. Each worker keeps its own
+# cache; no invalidation is needed between them. Blocks render normally
+# with FRAGMENT_CACHE_ENABLED off or in debug mode.
+
+
+class FragmentCache:
+    """Entry-bounded LRU cache of rendered fragments for one process"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def set(self, key, fragment):
+        with self._lock:
+            self._entries[key] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class FragmentCacheExtension(Extension):
+    """The {% cache key, ... %}...{% endcache %} tag"""
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        # Blocks in different templates never share entries
+        key = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.Tuple(key, 'load')]), [], [], body) \
+            .set_lineno(lineno)
+
+    def _render(self, key, caller):
+        cache = current_app.extensions.get('fragment_cache')
+        if cache is None or current_app.debug:
+            return caller()
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.set(key, fragment)
+        return fragment
+
+
+def get_fragment_cache():
+    return current_app.extensions.get('fragment_cache')
+
+
+def init_app(app):
+    # The tag is always available so templates parse the same with the cache off
+    app.jinja_options = {**app.jinja_options,
+                         'extensions': [*app.jinja_options.get('extensions', ()), FragmentCacheExtension]}
+    if app.config.get('FRAGMENT_CACHE_ENABLED', True):
+        app.extensions['fragment_cache'] = FragmentCache(app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 5000))
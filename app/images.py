@@ -0,0 +1,101 @@
+import json
+import os
+
+from flask import url_for
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Responsive variants generated for every uploaded image: name -> max width (px)
+VARIANT_WIDTHS = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1600,
+}
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+def generate_variants(upload_folder, filename):
+    """Write resized WebP and JPEG copies of an uploaded image.
+
+    Returns a dict like {'card': {'width': 640, 'webp': ..., 'jpeg': ...}},
+    or None when the file is not an image Pillow can read.
+    """
+    source = os.path.join(upload_folder, filename)
+    stem = os.path.splitext(filename)[0]
+
+    try:
+        with Image.open(source) as original:
+            image = ImageOps.exif_transpose(original)
+            image.load()
+    except (UnidentifiedImageError, OSError):
+        return None
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = {}
+    previous_width = None
+    for name, max_width in VARIANT_WIDTHS.items():
+        resized = image.copy()
+        # Never upscale; a small original just yields fewer distinct sizes
+        resized.thumbnail((max_width, max_width * 10), Image.LANCZOS)
+        if resized.width == previous_width:
+            continue
+        previous_width = resized.width
+
+        webp_name = f"{stem}_{name}.webp"
+        jpeg_name = f"{stem}_{name}.jpg"
+        resized.save(os.path.join(upload_folder, webp_name), 'WEBP', quality=WEBP_QUALITY, method=4)
+        flat = resized
+        if has_alpha:
+            flat = Image.new('RGB', resized.size, (255, 255, 255))
+            flat.paste(resized, mask=resized.getchannel('A'))
+        flat.save(os.path.join(upload_folder, jpeg_name), 'JPEG', quality=JPEG_QUALITY,
+                  optimize=True, progressive=True)
+
+        variants[name] = {'width': resized.width, 'webp': webp_name, 'jpeg': jpeg_name}
+
+    return variants
+
+
+def load_variants(variants):
+    """Accept the JSON text stored on a model (or an already-decoded dict)"""
+    if not variants:
+        return {}
+    if isinstance(variants, dict):
+        return variants
+    try:
+        return json.loads(variants)
+    except ValueError:
+        return {}
+
+
+def variant_files(variants):
+    return [entry[fmt] for entry in load_variants(variants).values() for fmt in ('webp', 'jpeg')]
+
+
+# Template filters
+
+def srcset_filter(variants, fmt='webp'):
+    entries = sorted(load_variants(variants).values(), key=lambda entry: entry['width'])
+    return ', '.join(
+        f"{url_for('static', filename='uploads/' + entry[fmt])} {entry['width']}w"
+        for entry in entries
+    )
+
+
+def variant_url_filter(variants, name='card', fmt='jpeg'):
+    variants = load_variants(variants)
+    entry = variants.get(name)
+    if entry is None and variants:
+        # Small originals skip the larger sizes; fall back to the biggest one we have
+        entry = max(variants.values(), key=lambda item: item['width'])
+    if entry is None:
+        return None
+    return url_for('static', filename='uploads/' + entry[fmt])
+
+
+def init_app(app):
+    app.add_template_filter(srcset_filter, 'srcset')
+    app.add_template_filter(variant_url_filter, 'variant_url')
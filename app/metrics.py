@@ -0,0 +1,245 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from flask import before_render_template, current_app, request, template_rendered
+from sqlalchemy import event
+
+from app import db
+
+# Per-endpoint request metrics in Prometheus text format.
+#
+# Request hooks time each request. SQLAlchemy cursor events and Flask's
+# template signals add up its SQL statements and render time in a context
+# variable (cheaper than g on this hot path), and the totals go into
+# per-endpoint histograms. Each gunicorn worker writes its
+# numbers to <METRICS_DIR>/worker-<pid>.json every METRICS_FLUSH_INTERVAL
+# seconds. /admin/metrics adds up every worker's file (histograms and
+# counters are plain sums), so a scrape sees the whole server whichever
+# worker answers it.
+
+PREFIX = 'clay_store'
+
+# Upper bounds of the histogram buckets (+Inf is implicit)
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+HISTOGRAMS = {
+    'request_duration_seconds': ('Time spent handling a request', SECONDS_BUCKETS),
+    'request_sql_queries': ('SQL statements executed per request', QUERY_BUCKETS),
+    'request_sql_duration_seconds': ('Time spent in SQL statements per request', SECONDS_BUCKETS),
+    'request_template_seconds': ('Time spent rendering templates per request', SECONDS_BUCKETS),
+}
+COUNTERS = {
+    'requests_total': 'Requests handled',
+}
+
+
+class MetricsRegistry:
+    """This worker's histograms and counters, keyed by (metric, label values)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self.counters = {}  # (name, labels) -> value
+
+    def observe(self, labels, values):
+        """Record one value per histogram, e.g. {'request_duration_seconds': 0.012, ...}"""
+        with self._lock:
+            for name, value in values.items():
+                key = (name, labels)
+                buckets = HISTOGRAMS[name][1]
+                entry = self.histograms.get(key)
+                if entry is None:
+                    entry = self.histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+                entry[bisect_left(buckets, value)] += 1
+                entry[-1] += value
+
+    def increment(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def dump(self):
+        with self._lock:
+            return {
+                'histograms': [[name, list(labels), entry] for (name, labels), entry in self.histograms.items()],
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+            }
+
+
+class WorkerMetrics:
+    """The registry of this worker plus the files shared with the other workers"""
+
+    def __init__(self, directory, flush_interval):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.registry = MetricsRegistry()
+        self._flushed_at = time.monotonic()
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'worker-{pid}.json')
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._flushed_at = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.registry.dump(), f)
+        os.replace(tmp_path, self._path(os.getpid()))
+
+    def collect(self):
+        """Sum this worker's live numbers with the last flush of every other worker"""
+        dumps = [self.registry.dump()]
+        own = os.path.basename(self._path(os.getpid()))
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.startswith('worker-') and name.endswith('.json') and name != own:
+                    try:
+                        with open(os.path.join(self.directory, name)) as f:
+                            dumps.append(json.load(f))
+                    except (OSError, ValueError):
+                        continue  # being replaced by its worker
+
+        histograms, counters = {}, {}
+        for dump in dumps:
+            for name, labels, entry in dump['histograms']:
+                key = (name, tuple(labels))
+                total = histograms.get(key)
+                histograms[key] = entry if total is None else [a + b for a, b in zip(total, entry)]
+            for name, labels, value in dump['counters']:
+                key = (name, tuple(labels))
+                counters[key] = counters.get(key, 0) + value
+        return histograms, counters
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    return '{' + ','.join(f'{name}="{_label_value(value)}"' for name, value in pairs) + '}'
+
+
+def render_prometheus(histograms, counters):
+    """Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        metric = f'{PREFIX}_{name}'
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+        for (key_name, labels), entry in sorted(histograms.items()):
+            if key_name != name:
+                continue
+            pairs = [('endpoint', labels[0])]
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), entry[:-1]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{_labels(pairs + [("le", bound)])} {cumulative}')
+            lines.append(f'{metric}_sum{_labels(pairs)} {entry[-1]}')
+            lines.append(f'{metric}_count{_labels(pairs)} {cumulative}')
+
+    for name, help_text in COUNTERS.items():
+        metric = f'{PREFIX}_{name}'
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        for (key_name, labels), value in sorted(counters.items()):
+            if key_name == name:
+                pairs = list(zip(('endpoint', 'method', 'status'), labels))
+                lines.append(f'{metric}{_labels(pairs)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_metrics():
+    return current_app.extensions['metrics']
+
+
+def metrics_text():
+    return render_prometheus(*get_metrics().collect())
+
+
+# Current request: [started, sql count, sql seconds, template seconds, template started]
+_request_state = ContextVar('request_metrics', default=None)
+
+
+def _start_request():
+    _request_state.set([time.perf_counter(), 0, 0.0, 0.0, 0.0])
+
+
+def _finish_request(status):
+    state = _request_state.get()
+    if state is None:
+        return
+    _request_state.set(None)
+    metrics = current_app.extensions['metrics']
+    endpoint = request.endpoint or 'unmatched'
+    metrics.registry.observe((endpoint,), {
+        'request_duration_seconds': time.perf_counter() - state[0],
+        'request_sql_queries': state[1],
+        'request_sql_duration_seconds': state[2],
+        'request_template_seconds': state[3],
+    })
+    metrics.registry.increment('requests_total', (endpoint, request.method, str(status)))
+    metrics.maybe_flush()
+
+
+def _after_request(response):
+    _finish_request(response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    # Only still pending when a view raised past the error handlers
+    if exc is not None:
+        _finish_request(500)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _request_state.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    state = _request_state.get()
+    if started is not None and state is not None:
+        state[1] += 1
+        state[2] += time.perf_counter() - started
+
+
+def _before_render(sender, template, context, **extra):
+    state = _request_state.get()
+    if state is not None:
+        state[4] = time.perf_counter()
+
+
+def _rendered(sender, template, context, **extra):
+    state = _request_state.get()
+    if state is not None and state[4]:
+        state[3] += time.perf_counter() - state[4]
+        state[4] = 0.0
+
+
+def init_app(app):
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    directory = app.config.get('METRICS_DIR') or os.path.join(app.instance_path, 'metrics')
+    app.extensions['metrics'] = WorkerMetrics(directory, app.config.get('METRICS_FLUSH_INTERVAL', 5))
+
+    app.before_request(_start_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    before_render_template.connect(_before_render, app, weak=False)
+    template_rendered.connect(_rendered, app, weak=False)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
@@ -1,6 +1,7 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import DDL, event
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
 
@@ -11,10 +12,40 @@ class Product(db.Model):
     price = db.Column(db.Float, nullable=False)
     category = db.Column(db.String(50))
     image_filename = db.Column(db.String(200))
+    image_variants = db.Column(db.Text)  # JSON: resized WebP/JPEG copies of image_filename
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     is_active = db.Column(db.Boolean, default=True)
     featured = db.Column(db.Boolean, default=False)
     
+    # Approved-review aggregates, maintained by the review_rating_* triggers below
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_hist_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_hist_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_hist_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_hist_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_hist_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    __table_args__ = (
+        # Public catalog: active products, optionally by category, newest first
+        db.Index('ix_product_active_category_created', 'is_active', 'category', 'created_at'),
+        db.Index('ix_product_active_created', 'is_active', 'created_at'),
+        # Admin lists and dashboard: every product, newest first
+        db.Index('ix_product_created_at', 'created_at'),
+    )
+    
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 1)
+    
+    @property
+    def rating_histogram(self):
+        """Approved review counts for 1..5 stars"""
+        return [self.rating_hist_1, self.rating_hist_2, self.rating_hist_3, self.rating_hist_4, self.rating_hist_5]
+    
     def __repr__(self):
         return f'<Product {self.name}>'
 
@@ -24,16 +55,53 @@ class Review(db.Model):
     comment = db.Column(db.Text, nullable=False)
     rating = db.Column(db.Integer, default=5)  # 1-5 stars
     image_filename = db.Column(db.String(200))
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=True)
+    image_variants = db.Column(db.Text)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_approved = db.Column(db.Boolean, default=False)
     is_featured = db.Column(db.Boolean, default=False)
     
+    __table_args__ = (
+        # Public reviews page: approved reviews, newest first
+        db.Index('ix_review_approved_created', 'is_approved', 'created_at'),
+        db.Index('ix_review_created_at', 'created_at'),
+    )
+    
     product = db.relationship('Product', backref=db.backref('reviews', lazy=True))
     
     def __repr__(self):
         return f'<Review by {self.customer_name}>'
 
+# Product rating aggregates are kept in step with approved reviews by SQLite
+# triggers, so every write path (ORM, bulk UPDATE/DELETE, scripts) updates them
+# in the same transaction. Touching updated_at refreshes cached product pages.
+# reconcile_ratings.py rebuilds them from scratch.
+RATING_COUNTED = "{row}.is_approved = 1 AND {row}.product_id IS NOT NULL AND {row}.rating BETWEEN 1 AND 5"
+
+def _rating_delta(row, sign):
+    return (f"UPDATE product SET rating_sum = rating_sum {sign} {row}.rating, "
+            f"rating_count = rating_count {sign} 1, "
+            + "".join(f"rating_hist_{i} = rating_hist_{i} {sign} ({row}.rating = {i}), " for i in range(1, 6))
+            # Same text format SQLAlchemy stores (microseconds), so max(updated_at) stays ordered
+            + f"updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now') "
+            f"WHERE id = {row}.product_id AND {RATING_COUNTED.format(row=row)};")
+
+RATING_TRIGGERS = {
+    'review_rating_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS review_rating_insert AFTER INSERT ON review
+        BEGIN {_rating_delta('NEW', '+')} END""",
+    'review_rating_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS review_rating_delete AFTER DELETE ON review
+        BEGIN {_rating_delta('OLD', '-')} END""",
+    'review_rating_update': f"""
+        CREATE TRIGGER IF NOT EXISTS review_rating_update AFTER UPDATE OF rating, is_approved, product_id ON review
+        BEGIN {_rating_delta('OLD', '-')} {_rating_delta('NEW', '+')} END""",
+}
+
+for _trigger in RATING_TRIGGERS.values():
+    # DDL() applies %-formatting to its statement
+    event.listen(Review.__table__, 'after_create', DDL(_trigger.replace('%', '%%')).execute_if(dialect='sqlite'))
+
 class Admin(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -54,7 +122,9 @@ class SiteSettings(db.Model):
     site_name = db.Column(db.String(100), default='أعمالي بالطين')
     site_description = db.Column(db.Text, default='متجر متخصص في صناعة منتجات طين البوليمر اليدوية الفريدة')
     logo_filename = db.Column(db.String(200))
+    logo_variants = db.Column(db.Text)
     hero_image_filename = db.Column(db.String(200))
+    hero_image_variants = db.Column(db.Text)
     background_color = db.Column(db.String(7), default='#6366f1')  # Primary color
     secondary_color = db.Column(db.String(7), default='#8b5cf6')   # Secondary color
     accent_color = db.Column(db.String(7), default='#10b981')      # Success/accent color
@@ -95,10 +165,45 @@ class Testimonial(db.Model):
     testimonial_text = db.Column(db.Text, nullable=False)
     rating = db.Column(db.Integer, default=5)  # 1-5 stars
     image_filename = db.Column(db.String(200))
+    image_variants = db.Column(db.Text)
     is_featured = db.Column(db.Boolean, default=False)
     display_order = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
     
     def __repr__(self):
-        return f'<Testimonial by {self.customer_name}>'
\ No newline at end of file
+        return f'<Testimonial by {self.customer_name}>'
+
+class StoredFile(db.Model):
+    """An upload stored once under the SHA-256 of its content"""
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    filename = db.Column(db.String(200), unique=True, nullable=False)
+    variants = db.Column(db.Text)  # JSON, see app/images.py
+    size = db.Column(db.Integer)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)  # rows whose image columns point here
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StoredFile {self.filename} x{self.ref_count}>'
+
+class BackgroundTask(db.Model):
+    """Durable queue entry for work done after the request that scheduled it"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text)  # JSON keyword arguments for the handler
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    last_error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_background_task_status_run_after', 'status', 'run_after'),
+    )
+    
+    def __repr__(self):
+        return f'<BackgroundTask {self.name} {self.status}>'
@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, session
+from flask_login import current_user
+
+
+class PageCache:
+    """Size-bounded LRU cache of rendered pages for anonymous visitors.
+
+    Every entry is tagged with the data it was rendered from ('products',
+    'reviews', 'settings', ...). Invalidating a tag bumps the mtime of a
+    small marker file, which every worker compares against the versions
+    recorded on the entry, so an admin write on one worker also retires
+    the pages cached by the others.
+    """
+
+    def __init__(self, version_dir, max_bytes):
+        self.version_dir = version_dir
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def _version_path(self, tag):
+        return os.path.join(self.version_dir, f'{tag}.version')
+
+    def tag_version(self, tag):
+        try:
+            return os.stat(self._version_path(tag)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                body, headers, versions, _ = entry
+                if all(self.tag_version(tag) == version for tag, version in versions):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body, headers
+                self._discard(key)
+            self.misses += 1
+            return None
+
+    def versions(self, tags):
+        # Read before rendering, so a write that lands mid-render leaves the entry stale
+        return tuple((tag, self.tag_version(tag)) for tag in tags)
+
+    def set(self, key, body, headers, versions):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (body, headers, versions, {})
+            self._size += len(body)
+            self._evict()
+
+    def get_encoded(self, key, encoding):
+        """The entry's body as finished for the wire (minified, compressed), if stored"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[3].get(encoding) if entry is not None else None
+
+    def set_encoded(self, key, encoding, body):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            previous = entry[3].get(encoding)
+            entry[3][encoding] = body
+            self._size += len(body) - (len(previous) if previous is not None else 0)
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0]) + sum(len(body) for body in entry[3].values())
+
+    def invalidate(self, *tags):
+        # Created on the first admin write rather than at startup
+        os.makedirs(self.version_dir, exist_ok=True)
+        for tag in tags:
+            path = self._version_path(tag)
+            now = time.time_ns()
+            with open(path, 'a'):
+                pass
+            # Guarantee the version moves forward even on a coarse clock
+            os.utime(path, ns=(now, max(now, os.stat(path).st_mtime_ns + 1)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypasses': self.bypasses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def init_app(app):
+    version_dir = app.config.get('PAGE_CACHE_DIR') or os.path.join(app.instance_path, 'page_cache')
+    app.extensions['page_cache'] = PageCache(version_dir, app.config.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+
+def get_page_cache():
+    return current_app.extensions['page_cache']
+
+
+def invalidate_pages(*tags):
+    get_page_cache().invalidate(*tags)
+
+
+# Rendered pages and the read-only JSON API
+CACHEABLE_MIMETYPES = ('text/html', 'application/json')
+
+
+def _cache_key():
+    args = sorted(request.args.items(multi=True))
+    view_args = sorted((request.view_args or {}).items())
+    return request.endpoint, tuple(view_args), tuple(args)
+
+
+def cached_page(*tags):
+    """Serve a public view from the page cache for anonymous visitors.
+
+    Logged-in admins and requests with pending flash messages always get
+    a fresh render, and neither is stored.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_page_cache()
+            if (not current_app.config.get('PAGE_CACHE_ENABLED', True)
+                    or current_user.is_authenticated or session.get('_flashes')):
+                cache.bypasses += 1
+                return view(*args, **kwargs)
+
+            key = _cache_key()
+            cached = cache.get(key)
+            if cached is not None:
+                body, headers = cached
+                response = current_app.response_class(body, headers=headers)
+                response.headers['X-Cache'] = 'HIT'
+                # Lets the compression hook reuse the bytes it stored with the entry
+                request.environ['page_cache.key'] = key
+                return response
+
+            versions = cache.versions(tags)
+            response = current_app.make_response(view(*args, **kwargs))
+            if (response.status_code == 200 and response.mimetype in CACHEABLE_MIMETYPES
+                    and not response.direct_passthrough and 'Set-Cookie' not in response.headers):
+                headers = [(name, value) for name, value in response.headers
+                           if name not in ('Content-Length', 'X-Cache')]
+                cache.set(key, response.get_data(), headers, versions)
+                request.environ['page_cache.key'] = key
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
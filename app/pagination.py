@@ -0,0 +1,62 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+# Keyset (cursor) pagination helpers.
+# A cursor is the (created_at, id) pair of the last row on the previous page,
+# so fetching the next page is an index seek instead of an OFFSET scan.
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) for a cursor string, or None if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(query, created_col, id_col, cursor=None, per_page=24):
+    """Fetch one page of `query` ordered newest first.
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    position = decode_cursor(cursor)
+    if position:
+        created_at, row_id = position
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < row_id),
+        ))
+
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return items, next_cursor
+
+
+# Numbered pages for the admin lists, which sort by arbitrary columns and
+# so cannot use cursors. Both queries are bounded: one COUNT and one LIMIT.
+
+def sorted_page(query, sort_options, sort, page, per_page):
+    """Order `query` by a whitelisted sort and fetch one page of it.
+
+    `sort_options` maps sort names to order_by clauses; unknown names fall
+    back to the first entry. Returns (pagination, sort).
+    """
+    if sort not in sort_options:
+        sort = next(iter(sort_options))
+    pagination = query.order_by(*sort_options[sort]).paginate(page=page, per_page=per_page, error_out=False)
+    return pagination, sort
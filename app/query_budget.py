@@ -0,0 +1,212 @@
+import logging
+import os
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, request
+from sqlalchemy import event
+
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# SQL budgets for views, and an N+1 detector.
+#
+# @query_budget(n) declares how many statements a view may run per
+# request. With QUERY_BUDGET_MODE set, every request is counted. 'enforce'
+# (the pytest plugin in conftest.py) raises QueryBudgetExceeded when a view
+# goes over its budget, or runs the same statement with different
+# parameters REPEAT_LIMIT times, which is how a lazy load in a loop looks.
+# 'report' (run.py) only adds X-Query-* headers and logs a warning. Each
+# statement is traced to the template line or project source line that
+# triggered it.
+
+# Same statement text this many times in one request counts as N+1
+REPEAT_LIMIT = 5
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A block of code ran more SQL statements than it was allowed"""
+
+
+def query_budget(max_queries=None, repeats=REPEAT_LIMIT):
+    """Declare a view's per-request SQL budget.
+
+    repeats=None allows a statement to repeat, e.g. for chunked bulk writes.
+    """
+    def decorator(view):
+        view.query_budget = (max_queries, repeats)
+        return view
+    return decorator
+
+
+def _origin():
+    """Where the statement came from: the template line, else the first project frame"""
+    fallback = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        template = frame.f_globals.get('__jinja_template__')
+        if template is not None:
+            return f'{template.name}:{template.get_corresponding_lineno(frame.f_lineno)}'
+        filename = frame.f_code.co_filename
+        if (fallback is None and filename.startswith(PROJECT_ROOT) and filename != _THIS_FILE
+                and 'site-packages' not in filename):
+            fallback = f'{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return fallback or '?'
+
+
+class QueryLog:
+    """Statements run while it is recording, each with its origin"""
+
+    def __init__(self, max_queries=None, repeats=REPEAT_LIMIT, label='block'):
+        self.max_queries = max_queries
+        self.repeats = repeats
+        self.label = label
+        self.statements = []  # (sql, parameters, origin)
+
+    def record(self, statement, parameters):
+        self.statements.append((statement, parameters, _origin()))
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self):
+        """[(sql, times, origins)] for statements run `repeats` or more times with different parameters"""
+        if self.repeats is None:
+            return []
+        found = []
+        for sql, times in Counter(sql for sql, _, _ in self.statements).most_common():
+            if times < self.repeats:
+                break
+            parameters = {repr(params) for statement, params, _ in self.statements if statement == sql}
+            if len(parameters) > 1:
+                origins = Counter(origin for statement, _, origin in self.statements if statement == sql)
+                found.append((sql, times, [origin for origin, _ in origins.most_common(3)]))
+        return found
+
+    def over_budget(self):
+        return self.max_queries is not None and self.count > self.max_queries
+
+    def problems(self):
+        return self.over_budget() or bool(self.repeated())
+
+    def report(self):
+        budget = f' (budget {self.max_queries})' if self.max_queries is not None else ''
+        lines = [f'{self.label}: {self.count} queries{budget}']
+        for sql, times, origins in self.repeated():
+            lines.append(f'  N+1: {times}x {" ".join(sql.split())[:120]}')
+            lines.append(f'       from {", ".join(origins)}')
+        if self.over_budget():
+            for origin, times in Counter(origin for _, _, origin in self.statements).most_common():
+                lines.append(f'  {times}x from {origin}')
+        return '\n'.join(lines)
+
+
+# Logs recording in the current thread/context (a request log and any count_queries() blocks)
+_active_logs = ContextVar('query_logs', default=())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for log in _active_logs.get():
+        log.record(statement, parameters)
+
+
+def _start_log(log):
+    _active_logs.set(_active_logs.get() + (log,))
+
+
+def _stop_log(log):
+    _active_logs.set(tuple(active for active in _active_logs.get() if active is not log))
+
+
+def _listen():
+    engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+
+
+@contextmanager
+def count_queries(max_queries=None, repeats=REPEAT_LIMIT, label='block'):
+    """Record the statements run inside the block (needs an app context).
+
+    Raises QueryBudgetExceeded on leaving the block if it ran more than
+    `max_queries` statements or repeated one `repeats` times.
+    """
+    _listen()
+    log = QueryLog(max_queries, repeats, label)
+    _start_log(log)
+    try:
+        yield log
+    finally:
+        _stop_log(log)
+    if log.problems():
+        raise QueryBudgetExceeded(log.report())
+
+
+# Per-request checking
+
+def _start_request():
+    view = current_app.view_functions.get(request.endpoint)
+    max_queries, repeats = getattr(view, 'query_budget', (None, REPEAT_LIMIT))
+    log = QueryLog(max_queries, repeats, f'{request.method} {request.full_path.rstrip("?")}')
+    request.environ['query_budget.log'] = log
+    _start_log(log)
+
+
+def _stop_request():
+    log = request.environ.pop('query_budget.log', None)
+    if log is not None:
+        _stop_log(log)
+    return log
+
+
+def _after_request(response):
+    log = _stop_request()
+    if log is None:
+        return response
+
+    if current_app.config.get('QUERY_BUDGET_MODE') == 'enforce':
+        if log.problems():
+            raise QueryBudgetExceeded(log.report())
+        return response
+
+    response.headers['X-Query-Count'] = str(log.count)
+    if log.max_queries is not None:
+        response.headers['X-Query-Budget'] = str(log.max_queries)
+    repeated = log.repeated()
+    if repeated:
+        sql, times, origins = repeated[0]
+        response.headers['X-Query-N-Plus-One'] = f'{times}x from {origins[0]}'
+    if log.problems():
+        logger.warning('Query budget: %s', log.report())
+    return response
+
+
+def _teardown_request(exc):
+    _stop_request()
+
+
+def enable(app, mode):
+    """Count the statements of every request: mode is 'enforce' or 'report'"""
+    app.config['QUERY_BUDGET_MODE'] = mode
+    if app.extensions.get('query_budget'):
+        return
+    app.extensions['query_budget'] = True
+    app.before_request(_start_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    with app.app_context():
+        _listen()
+
+
+def init_app(app):
+    mode = app.config.get('QUERY_BUDGET_MODE')
+    if mode:
+        enable(app, mode)
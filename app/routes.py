@@ -1,17 +1,37 @@
-import os
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, jsonify, abort, make_response
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.utils import secure_filename
+from sqlalchemy.orm import selectinload
+from werkzeug.local import LocalProxy
 from app import db, login_manager
-from app.models import Product, Review, Admin, SiteSettings, Testimonial
+from app.models import Product, Review, Admin, SiteSettings, Testimonial, BackgroundTask
+from app.bulk import run_bulk_action
+from app.conditional import conditional_page
+from app.fragment_cache import get_fragment_cache
+from app.metrics import metrics_text
+from app.page_cache import cached_page, invalidate_pages, get_page_cache
+from app.pagination import keyset_page, decode_cursor, sorted_page
+from app.query_budget import query_budget
+from app.search import search_products
+from app.settings_cache import get_site_settings, invalidate_site_settings
+from app.stats import get_stats
+from app.tasks import retry_task
+from app.uploads import UploadError, get_uploaded_file, save_upload, delete_upload
+import hmac
+import math
 import urllib.parse
 
 bp = Blueprint('main', __name__)
 
-# Make site settings available to all templates
+# Make site settings available to all templates (loaded only when a template reads them)
 @bp.context_processor
 def inject_site_settings():
-    return dict(site_settings=SiteSettings.get_settings())
+    return dict(site_settings=LocalProxy(get_site_settings))
+
+@bp.errorhandler(UploadError)
+def handle_upload_error(error):
+    db.session.rollback()
+    flash(str(error), 'error')
+    return redirect(request.url)
 
 @login_manager.user_loader
 def load_user(user_id):
@@ -20,7 +40,7 @@ def load_user(user_id):
 # Helper function for WhatsApp URL
 def create_whatsapp_url(product_name=None, custom_message=None):
     # Get WhatsApp number from settings or config
-    settings = SiteSettings.get_settings()
+    settings = get_site_settings()
     whatsapp_number = settings.whatsapp_number or current_app.config.get('WHATSAPP_NUMBER', '201XXXXXXXXX')
     
     if custom_message:
@@ -35,24 +55,97 @@ def create_whatsapp_url(product_name=None, custom_message=None):
 
 # Public Routes
 @bp.route('/')
+@query_budget(4)
+@conditional_page('products', 'settings')
+@cached_page('products', 'settings')
 def index():
     featured_products = Product.query.filter_by(is_active=True).limit(6).all()
     return render_template('index.html', products=featured_products)
 
 @bp.route('/products')
+@query_budget(5)
+@conditional_page('products', 'settings')
+@cached_page('products', 'settings')
 def products():
     category = request.args.get('category')
-    if category:
-        products = Product.query.filter_by(category=category, is_active=True).all()
-    else:
-        products = Product.query.filter_by(is_active=True).all()
+    cursor = request.args.get('cursor')
+    if cursor and not decode_cursor(cursor):
+        abort(400)
+    products, next_cursor = _active_products_page(category, cursor)
     
     categories = db.session.query(Product.category).filter_by(is_active=True).distinct().all()
     categories = [cat[0] for cat in categories if cat[0]]
     
-    return render_template('products.html', products=products, categories=categories, selected_category=category)
+    return render_template('products.html', products=products, categories=categories,
+                           selected_category=category, next_cursor=next_cursor)
+
+@bp.route('/products/more')
+@query_budget(3)
+@conditional_page('products')
+@cached_page('products')
+def products_more():
+    # HTML fragment with the next page of product cards, appended by main.js
+    category = request.args.get('category')
+    cursor = request.args.get('cursor')
+    if not decode_cursor(cursor):
+        abort(400)
+    
+    products, next_cursor = _active_products_page(category, cursor)
+    response = make_response(render_template('_product_cards.html', products=products))
+    if next_cursor:
+        response.headers['X-Next-Page'] = url_for('main.products_more', category=category, cursor=next_cursor)
+    return response
+
+def _active_products_page(category, cursor):
+    query = Product.query.filter_by(is_active=True)
+    if category:
+        query = query.filter_by(category=category)
+    return keyset_page(query, Product.created_at, Product.id, cursor,
+                       per_page=current_app.config['PRODUCTS_PER_PAGE'])
+
+@bp.route('/search')
+@query_budget(5)
+@conditional_page('products', 'settings')
+@cached_page('products', 'settings')
+def search():
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = current_app.config['PRODUCTS_PER_PAGE']
+    products, total = search_products(query, page, per_page)
+    
+    return render_template('search.html', query=query, products=products, total=total,
+                           page=page, pages=math.ceil(total / per_page))
+
+@bp.route('/search.json')
+@query_budget(3)
+@conditional_page('products')
+def search_json():
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', current_app.config['PRODUCTS_PER_PAGE'], type=int)
+    per_page = min(max(per_page, 1), 100)
+    products, total = search_products(query, page, per_page)
+    
+    return jsonify({
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'results': [{
+            'id': product.id,
+            'name': product.name,
+            'description': product.description,
+            'category': product.category,
+            'price': product.price,
+            'average_rating': product.average_rating,
+            'rating_count': product.rating_count,
+            'order_url': url_for('main.whatsapp_product', product_id=product.id, _external=True),
+        } for product in products],
+    })
 
 @bp.route('/custom-order')
+@conditional_page('settings')
+@cached_page('settings')
 def custom_order():
     custom_message = """مرحباً! أود عمل طلب خاص:
 - نوع المنتج:
@@ -62,12 +155,17 @@ def custom_order():
     return render_template('custom_order.html', whatsapp_url=whatsapp_url)
 
 @bp.route('/reviews')
+@query_budget(4)
+@conditional_page('reviews', 'settings')
+@cached_page('reviews', 'settings')
 def reviews():
     approved_reviews = Review.query.filter_by(is_approved=True).order_by(Review.created_at.desc()).all()
     review_whatsapp_url = create_whatsapp_url(custom_message="مرحباً! أود إرسال تقييم للمنتج الذي اشتريته")
     return render_template('reviews.html', reviews=approved_reviews, whatsapp_url=review_whatsapp_url)
 
 @bp.route('/contact')
+@conditional_page('settings')
+@cached_page('settings')
 def contact():
     whatsapp_url = create_whatsapp_url()
     return render_template('contact.html', whatsapp_url=whatsapp_url)
@@ -78,6 +176,43 @@ def whatsapp_product(product_id):
     whatsapp_url = create_whatsapp_url(product_name=product.name)
     return redirect(whatsapp_url)
 
+# Admin list sorting and filtering: query-string value -> SQL (anything else is ignored)
+PRODUCT_SORTS = {
+    'newest': (Product.created_at.desc(), Product.id.desc()),
+    'oldest': (Product.created_at.asc(), Product.id.asc()),
+    'name': (Product.name.asc(), Product.id.asc()),
+    'price_high': (Product.price.desc(), Product.id.desc()),
+    'price_low': (Product.price.asc(), Product.id.asc()),
+}
+PRODUCT_STATUS_FILTERS = {
+    'active': Product.is_active == True,
+    'inactive': Product.is_active == False,
+    'featured': Product.featured == True,
+}
+
+REVIEW_SORTS = {
+    'newest': (Review.created_at.desc(), Review.id.desc()),
+    'oldest': (Review.created_at.asc(), Review.id.asc()),
+    'rating_high': (Review.rating.desc(), Review.created_at.desc(), Review.id.desc()),
+    'rating_low': (Review.rating.asc(), Review.created_at.desc(), Review.id.desc()),
+}
+REVIEW_STATUS_FILTERS = {
+    'approved': Review.is_approved == True,
+    'pending': Review.is_approved == False,
+    'featured': Review.is_featured == True,
+}
+
+TESTIMONIAL_SORTS = {
+    'order': (Testimonial.display_order.asc(), Testimonial.created_at.desc(), Testimonial.id.desc()),
+    'newest': (Testimonial.created_at.desc(), Testimonial.id.desc()),
+    'rating_high': (Testimonial.rating.desc(), Testimonial.created_at.desc(), Testimonial.id.desc()),
+}
+TESTIMONIAL_STATUS_FILTERS = {
+    'active': Testimonial.is_active == True,
+    'inactive': Testimonial.is_active == False,
+    'featured': Testimonial.is_featured == True,
+}
+
 # Admin Routes
 @bp.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -103,11 +238,13 @@ def admin_logout():
     return redirect(url_for('main.index'))
 
 @bp.route('/admin')
+@query_budget(6)
 @login_required
 def admin_dashboard():
-    products_count = Product.query.count()
-    reviews_count = Review.query.filter_by(is_approved=True).count()
-    pending_reviews = Review.query.filter_by(is_approved=False).count()
+    stats = get_stats()
+    products_count = stats['products']['total']
+    reviews_count = stats['reviews']['approved']
+    pending_reviews = stats['reviews']['pending']
     
     recent_products = Product.query.order_by(Product.created_at.desc()).limit(5).all()
     recent_reviews = Review.query.order_by(Review.created_at.desc()).limit(5).all()
@@ -120,10 +257,23 @@ def admin_dashboard():
                          recent_reviews=recent_reviews)
 
 @bp.route('/admin/products')
+@query_budget(7)
 @login_required
 def admin_products():
-    products = Product.query.order_by(Product.created_at.desc()).all()
-    return render_template('admin/products.html', products=products)
+    query = Product.query
+    status = request.args.get('status', '')
+    category = request.args.get('category', '')
+    if status in PRODUCT_STATUS_FILTERS:
+        query = query.filter(PRODUCT_STATUS_FILTERS[status])
+    if category:
+        query = query.filter_by(category=category)
+    
+    pagination, sort = sorted_page(query, PRODUCT_SORTS, request.args.get('sort'),
+                                   request.args.get('page', 1, type=int), current_app.config['ADMIN_PER_PAGE'])
+    # Category choices come from the cached statistics snapshot rather than a DISTINCT over the table
+    categories = [name for name in get_stats()['all_categories'] if name]
+    return render_template('admin/products.html', products=pagination.items, pagination=pagination,
+                           sort=sort, status=status, category=category, categories=categories)
 
 @bp.route('/admin/products/new', methods=['GET', 'POST'])
 @login_required
@@ -140,17 +290,10 @@ def admin_product_new():
                 return render_template('admin/product_form.html', product=None)
             
             # Handle file upload
-            image_filename = None
-            if 'image' in request.files:
-                file = request.files['image']
-                if file and file.filename != '':
-                    filename = secure_filename(file.filename)
-                    # Add timestamp to avoid conflicts
-                    import time
-                    filename = f"{int(time.time())}_{filename}"
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    file.save(filepath)
-                    image_filename = filename
+            image_filename = image_variants = None
+            file = get_uploaded_file('image')
+            if file:
+                image_filename, image_variants = save_upload(file)
             
             featured = 'featured' in request.form
             
@@ -160,11 +303,13 @@ def admin_product_new():
                 price=price,
                 category=category,
                 image_filename=image_filename,
+                image_variants=image_variants,
                 featured=featured
             )
             
             db.session.add(product)
             db.session.commit()
+            invalidate_pages('products')
             flash('تم إضافة المنتج بنجاح', 'success')
             return redirect(url_for('main.admin_products'))
             
@@ -199,23 +344,15 @@ def admin_product_edit(id):
             product.featured = 'featured' in request.form
             
             # Handle file upload
-            if 'image' in request.files:
-                file = request.files['image']
-                if file and file.filename != '':
-                    # Delete old image if exists
-                    if product.image_filename:
-                        old_path = os.path.join(current_app.config['UPLOAD_FOLDER'], product.image_filename)
-                        if os.path.exists(old_path):
-                            os.remove(old_path)
-                    
-                    filename = secure_filename(file.filename)
-                    import time
-                    filename = f"{int(time.time())}_{filename}"
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    file.save(filepath)
-                    product.image_filename = filename
+            file = get_uploaded_file('image')
+            if file:
+                old_image = (product.image_filename, product.image_variants)
+                product.image_filename, product.image_variants = save_upload(file)
+                # Release the old image (its file goes once nothing else uses it)
+                delete_upload(*old_image)
             
             db.session.commit()
+            invalidate_pages('products')
             flash('تم تحديث المنتج بنجاح', 'success')
             return redirect(url_for('main.admin_products'))
             
@@ -233,21 +370,36 @@ def admin_product_delete(id):
     product = Product.query.get_or_404(id)
     
     # Delete associated image
-    if product.image_filename:
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], product.image_filename)
-        if os.path.exists(filepath):
-            os.remove(filepath)
+    delete_upload(product.image_filename, product.image_variants)
     
     db.session.delete(product)
     db.session.commit()
+    invalidate_pages('products')
     flash('تم حذف المنتج بنجاح', 'success')
     return redirect(url_for('main.admin_products'))
 
 @bp.route('/admin/reviews')
+@query_budget(6)
 @login_required
 def admin_reviews():
-    reviews = Review.query.order_by(Review.created_at.desc()).all()
-    return render_template('admin/reviews.html', reviews=reviews)
+    # Products for the whole page come in one extra query instead of one per review
+    query = Review.query.options(selectinload(Review.product))
+    status = request.args.get('status', '')
+    rating = request.args.get('rating', type=int)
+    product_id = request.args.get('product_id', type=int)
+    if status in REVIEW_STATUS_FILTERS:
+        query = query.filter(REVIEW_STATUS_FILTERS[status])
+    if rating:
+        query = query.filter_by(rating=rating)
+    filter_product = None
+    if product_id:
+        query = query.filter_by(product_id=product_id)
+        filter_product = db.session.get(Product, product_id)
+    
+    pagination, sort = sorted_page(query, REVIEW_SORTS, request.args.get('sort'),
+                                   request.args.get('page', 1, type=int), current_app.config['ADMIN_PER_PAGE'])
+    return render_template('admin/reviews.html', reviews=pagination.items, pagination=pagination,
+                           sort=sort, status=status, rating=rating, filter_product=filter_product)
 
 @bp.route('/admin/reviews/<int:id>/approve', methods=['POST'])
 @login_required
@@ -255,6 +407,7 @@ def admin_review_approve(id):
     review = Review.query.get_or_404(id)
     review.is_approved = True
     db.session.commit()
+    invalidate_pages('reviews', 'products')
     flash('تم الموافقة على التقييم', 'success')
     return redirect(url_for('main.admin_reviews'))
 
@@ -264,6 +417,7 @@ def admin_review_reject(id):
     review = Review.query.get_or_404(id)
     review.is_approved = False
     db.session.commit()
+    invalidate_pages('reviews', 'products')
     flash('تم رفض التقييم', 'warning')
     return redirect(url_for('main.admin_reviews'))
 
@@ -273,13 +427,11 @@ def admin_review_delete(id):
     review = Review.query.get_or_404(id)
     
     # Delete associated image
-    if review.image_filename:
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], review.image_filename)
-        if os.path.exists(filepath):
-            os.remove(filepath)
+    delete_upload(review.image_filename, review.image_variants)
     
     db.session.delete(review)
     db.session.commit()
+    invalidate_pages('reviews', 'products')
     flash('تم حذف التقييم', 'success')
     return redirect(url_for('main.admin_reviews'))
 
@@ -318,40 +470,24 @@ def admin_settings():
         settings.maintenance_mode = 'maintenance_mode' in request.form
         
         # Handle Logo Upload
-        if 'logo' in request.files:
-            file = request.files['logo']
-            if file and file.filename != '':
-                # Delete old logo
-                if settings.logo_filename:
-                    old_path = os.path.join(current_app.config['UPLOAD_FOLDER'], settings.logo_filename)
-                    if os.path.exists(old_path):
-                        os.remove(old_path)
-                
-                filename = secure_filename(file.filename)
-                import time
-                filename = f"logo_{int(time.time())}_{filename}"
-                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                settings.logo_filename = filename
+        file = get_uploaded_file('logo')
+        if file:
+            old_image = (settings.logo_filename, settings.logo_variants)
+            settings.logo_filename, settings.logo_variants = save_upload(file)
+            # Release the old image (its file goes once nothing else uses it)
+            delete_upload(*old_image)
         
         # Handle Hero Image Upload
-        if 'hero_image' in request.files:
-            file = request.files['hero_image']
-            if file and file.filename != '':
-                # Delete old hero image
-                if settings.hero_image_filename:
-                    old_path = os.path.join(current_app.config['UPLOAD_FOLDER'], settings.hero_image_filename)
-                    if os.path.exists(old_path):
-                        os.remove(old_path)
-                
-                filename = secure_filename(file.filename)
-                import time
-                filename = f"hero_{int(time.time())}_{filename}"
-                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                settings.hero_image_filename = filename
+        file = get_uploaded_file('hero_image')
+        if file:
+            old_image = (settings.hero_image_filename, settings.hero_image_variants)
+            settings.hero_image_filename, settings.hero_image_variants = save_upload(file)
+            # Release the old image (its file goes once nothing else uses it)
+            delete_upload(*old_image)
         
         db.session.commit()
+        invalidate_site_settings()
+        invalidate_pages('settings')
         flash('تم تحديث إعدادات الموقع بنجاح', 'success')
         return redirect(url_for('main.admin_settings'))
     
@@ -359,10 +495,18 @@ def admin_settings():
 
 # Testimonials Management
 @bp.route('/admin/testimonials')
+@query_budget(5)
 @login_required
 def admin_testimonials():
-    testimonials = Testimonial.query.order_by(Testimonial.display_order.asc(), Testimonial.created_at.desc()).all()
-    return render_template('admin/testimonials.html', testimonials=testimonials)
+    query = Testimonial.query
+    status = request.args.get('status', '')
+    if status in TESTIMONIAL_STATUS_FILTERS:
+        query = query.filter(TESTIMONIAL_STATUS_FILTERS[status])
+    
+    pagination, sort = sorted_page(query, TESTIMONIAL_SORTS, request.args.get('sort'),
+                                   request.args.get('page', 1, type=int), current_app.config['ADMIN_PER_PAGE'])
+    return render_template('admin/testimonials.html', testimonials=pagination.items, pagination=pagination,
+                           sort=sort, status=status)
 
 @bp.route('/admin/testimonials/new', methods=['GET', 'POST'])
 @login_required
@@ -376,16 +520,10 @@ def admin_testimonial_new():
         is_featured = 'is_featured' in request.form
         
         # Handle image upload
-        image_filename = None
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename != '':
-                filename = secure_filename(file.filename)
-                import time
-                filename = f"testimonial_{int(time.time())}_{filename}"
-                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                image_filename = filename
+        image_filename = image_variants = None
+        file = get_uploaded_file('image')
+        if file:
+            image_filename, image_variants = save_upload(file)
         
         testimonial = Testimonial(
             customer_name=customer_name,
@@ -393,12 +531,14 @@ def admin_testimonial_new():
             testimonial_text=testimonial_text,
             rating=rating,
             image_filename=image_filename,
+            image_variants=image_variants,
             is_featured=is_featured,
             display_order=display_order
         )
         
         db.session.add(testimonial)
         db.session.commit()
+        invalidate_pages('testimonials')
         flash('تم إضافة الشهادة بنجاح', 'success')
         return redirect(url_for('main.admin_testimonials'))
     
@@ -419,23 +559,15 @@ def admin_testimonial_edit(id):
         testimonial.is_active = 'is_active' in request.form
         
         # Handle image upload
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename != '':
-                # Delete old image
-                if testimonial.image_filename:
-                    old_path = os.path.join(current_app.config['UPLOAD_FOLDER'], testimonial.image_filename)
-                    if os.path.exists(old_path):
-                        os.remove(old_path)
-                
-                filename = secure_filename(file.filename)
-                import time
-                filename = f"testimonial_{int(time.time())}_{filename}"
-                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                testimonial.image_filename = filename
+        file = get_uploaded_file('image')
+        if file:
+            old_image = (testimonial.image_filename, testimonial.image_variants)
+            testimonial.image_filename, testimonial.image_variants = save_upload(file)
+            # Release the old image (its file goes once nothing else uses it)
+            delete_upload(*old_image)
         
         db.session.commit()
+        invalidate_pages('testimonials')
         flash('تم تحديث الشهادة بنجاح', 'success')
         return redirect(url_for('main.admin_testimonials'))
     
@@ -447,13 +579,11 @@ def admin_testimonial_delete(id):
     testimonial = Testimonial.query.get_or_404(id)
     
     # Delete associated image
-    if testimonial.image_filename:
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], testimonial.image_filename)
-        if os.path.exists(filepath):
-            os.remove(filepath)
+    delete_upload(testimonial.image_filename, testimonial.image_variants)
     
     db.session.delete(testimonial)
     db.session.commit()
+    invalidate_pages('testimonials')
     flash('تم حذف الشهادة بنجاح', 'success')
     return redirect(url_for('main.admin_testimonials'))
 
@@ -464,6 +594,7 @@ def admin_review_feature(id):
     review = Review.query.get_or_404(id)
     review.is_featured = not review.is_featured
     db.session.commit()
+    invalidate_pages('reviews')
     action = 'تمييز' if review.is_featured else 'إلغاء تمييز'
     flash(f'تم {action} التقييم', 'success')
     return redirect(url_for('main.admin_reviews'))
@@ -480,16 +611,10 @@ def admin_review_new():
         is_featured = 'is_featured' in request.form
         
         # Handle image upload
-        image_filename = None
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename != '':
-                filename = secure_filename(file.filename)
-                import time
-                filename = f"review_{int(time.time())}_{filename}"
-                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                image_filename = filename
+        image_filename = image_variants = None
+        file = get_uploaded_file('image')
+        if file:
+            image_filename, image_variants = save_upload(file)
         
         review = Review(
             customer_name=customer_name,
@@ -497,12 +622,14 @@ def admin_review_new():
             rating=rating,
             product_id=product_id if product_id else None,
             image_filename=image_filename,
+            image_variants=image_variants,
             is_approved=is_approved,
             is_featured=is_featured
         )
         
         db.session.add(review)
         db.session.commit()
+        invalidate_pages('reviews', 'products')
         flash('تم إضافة التقييم بنجاح', 'success')
         return redirect(url_for('main.admin_reviews'))
     
@@ -524,23 +651,15 @@ def admin_review_edit(id):
             review.is_featured = 'is_featured' in request.form
             
             # Handle image upload
-            if 'image' in request.files:
-                file = request.files['image']
-                if file and file.filename != '':
-                    # Delete old image
-                    if review.image_filename:
-                        old_path = os.path.join(current_app.config['UPLOAD_FOLDER'], review.image_filename)
-                        if os.path.exists(old_path):
-                            os.remove(old_path)
-                    
-                    filename = secure_filename(file.filename)
-                    import time
-                    filename = f"review_{int(time.time())}_{filename}"
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                    file.save(filepath)
-                    review.image_filename = filename
+            file = get_uploaded_file('image')
+            if file:
+                old_image = (review.image_filename, review.image_variants)
+                review.image_filename, review.image_variants = save_upload(file)
+                # Release the old image (its file goes once nothing else uses it)
+                delete_upload(*old_image)
             
             db.session.commit()
+            invalidate_pages('reviews', 'products')
             flash('تم تحديث التقييم بنجاح', 'success')
             return redirect(url_for('main.admin_reviews'))
             
@@ -566,6 +685,7 @@ def admin_review_update_rating(id):
         
         review.rating = rating
         db.session.commit()
+        invalidate_pages('reviews', 'products')
         
         return jsonify({'success': True, 'message': 'تم تحديث التقييم بنجاح'})
         
@@ -573,110 +693,114 @@ def admin_review_update_rating(id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
 
-@bp.route('/admin/reviews/bulk-action', methods=['POST'])
-@login_required
-def admin_reviews_bulk_action():
+BULK_MESSAGES = {
+    'approve': 'تم اعتماد {count} عنصر',
+    'reject': 'تم رفض {count} عنصر',
+    'activate': 'تم تفعيل {count} عنصر',
+    'deactivate': 'تم تعطيل {count} عنصر',
+    'feature': 'تم تمييز {count} عنصر',
+    'unfeature': 'تم إلغاء تمييز {count} عنصر',
+    'update_rating': 'تم تحديث تقييم {count} عنصر إلى {rating} نجوم',
+    'delete': 'تم حذف {count} عنصر',
+}
+
+def bulk_action_response(model, ids_key, *tags):
+    """Shared JSON handler for the admin bulk-action endpoints"""
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         action = data.get('action')
-        review_ids = data.get('review_ids', [])
-        
-        if not review_ids:
-            return jsonify({'success': False, 'message': 'لم يتم اختيار أي تقييمات'})
-        
-        reviews = Review.query.filter(Review.id.in_(review_ids)).all()
+        ids = data.get(ids_key, [])
+        rating = data.get('rating')
         
-        if action == 'approve':
-            for review in reviews:
-                review.is_approved = True
-            message = f'تم اعتماد {len(reviews)} تقييم'
-            
-        elif action == 'reject':
-            for review in reviews:
-                review.is_approved = False
-            message = f'تم رفض {len(reviews)} تقييم'
-            
-        elif action == 'feature':
-            for review in reviews:
-                review.is_featured = True
-            message = f'تم تمييز {len(reviews)} تقييم'
-            
-        elif action == 'delete':
-            for review in reviews:
-                # Delete associated images
-                if review.image_filename:
-                    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], review.image_filename)
-                    if os.path.exists(filepath):
-                        os.remove(filepath)
-                db.session.delete(review)
-            message = f'تم حذف {len(reviews)} تقييم'
-            
-        elif action == 'update_rating':
-            new_rating = data.get('rating')
-            if not new_rating or new_rating < 1 or new_rating > 5:
-                return jsonify({'success': False, 'message': 'تقييم غير صحيح'})
-            
-            for review in reviews:
-                review.rating = new_rating
-            message = f'تم تحديث تقييم {len(reviews)} عنصر إلى {new_rating} نجوم'
-            
-        else:
-            return jsonify({'success': False, 'message': 'إجراء غير معروف'})
+        if not ids:
+            return jsonify({'success': False, 'message': 'لم يتم اختيار أي عناصر'})
         
+        count = run_bulk_action(model, action, ids, rating=rating)
         db.session.commit()
-        return jsonify({'success': True, 'message': message})
+        invalidate_pages(*tags)
+        return jsonify({'success': True, 'count': count,
+                        'message': BULK_MESSAGES[action].format(count=count, rating=rating)})
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
 
+@bp.route('/admin/reviews/bulk-action', methods=['POST'])
+@query_budget(repeats=None)  # one set of statements per chunk of ids
+@login_required
+def admin_reviews_bulk_action():
+    # Product cards show rating aggregates, which the review triggers update
+    return bulk_action_response(Review, 'review_ids', 'reviews', 'products')
+
+@bp.route('/admin/products/bulk-action', methods=['POST'])
+@query_budget(repeats=None)
+@login_required
+def admin_products_bulk_action():
+    # Deleting products also unlinks their reviews
+    return bulk_action_response(Product, 'product_ids', 'products', 'reviews')
+
+@bp.route('/admin/testimonials/bulk-action', methods=['POST'])
+@query_budget(repeats=None)
+@login_required
+def admin_testimonials_bulk_action():
+    return bulk_action_response(Testimonial, 'testimonial_ids', 'testimonials')
+
 # Statistics and Analytics
 @bp.route('/admin/analytics')
+@query_budget(6)
 @login_required
 def admin_analytics():
-    # Product Statistics
-    total_products = Product.query.count()
-    active_products = Product.query.filter_by(is_active=True).count()
-    featured_products = Product.query.filter_by(featured=True).count()
-    
-    # Review Statistics
-    total_reviews = Review.query.count()
-    approved_reviews = Review.query.filter_by(is_approved=True).count()
-    featured_reviews = Review.query.filter_by(is_featured=True).count()
-    avg_rating = db.session.query(db.func.avg(Review.rating)).filter_by(is_approved=True).scalar() or 0
-    
-    # Testimonial Statistics
-    total_testimonials = Testimonial.query.count()
-    active_testimonials = Testimonial.query.filter_by(is_active=True).count()
-    featured_testimonials = Testimonial.query.filter_by(is_featured=True).count()
-    
-    # Category Statistics
-    categories = db.session.query(Product.category, db.func.count(Product.id)).filter_by(is_active=True).group_by(Product.category).all()
-    
-    # Recent Activity
+    # Counters come from the cached snapshot; only the recent activity is queried per request
     recent_reviews = Review.query.order_by(Review.created_at.desc()).limit(5).all()
     recent_products = Product.query.order_by(Product.created_at.desc()).limit(5).all()
     
-    stats = {
-        'products': {
-            'total': total_products,
-            'active': active_products,
-            'featured': featured_products
-        },
-        'reviews': {
-            'total': total_reviews,
-            'approved': approved_reviews,
-            'featured': featured_reviews,
-            'avg_rating': round(avg_rating, 1)
-        },
-        'testimonials': {
-            'total': total_testimonials,
-            'active': active_testimonials,
-            'featured': featured_testimonials
-        },
-        'categories': categories,
-        'recent_reviews': recent_reviews,
-        'recent_products': recent_products
-    }
-    
-    return render_template('admin/analytics.html', stats=stats)
\ No newline at end of file
+    stats = dict(get_stats(), recent_reviews=recent_reviews, recent_products=recent_products)
+    
+    return render_template('admin/analytics.html', stats=stats)
+
+# Background Tasks
+@bp.route('/admin/tasks')
+@query_budget(5)
+@login_required
+def admin_tasks():
+    status = request.args.get('status')
+    query = BackgroundTask.query
+    if status:
+        query = query.filter_by(status=status)
+    tasks = query.order_by(BackgroundTask.id.desc()).limit(100).all()
+    
+    counts = dict(db.session.query(BackgroundTask.status, db.func.count(BackgroundTask.id))
+                  .group_by(BackgroundTask.status).all())
+    return render_template('admin/tasks.html', tasks=tasks, counts=counts, selected_status=status)
+
+@bp.route('/admin/tasks/<int:id>/retry', methods=['POST'])
+@login_required
+def admin_task_retry(id):
+    if retry_task(id):
+        db.session.commit()
+        flash('تمت إعادة جدولة المهمة', 'success')
+    else:
+        flash('لا يمكن إعادة تشغيل هذه المهمة', 'error')
+    return redirect(url_for('main.admin_tasks', status=request.args.get('status')))
+
+@bp.route('/admin/cache-stats')
+@login_required
+def admin_cache_stats():
+    stats = get_page_cache().stats()
+    fragment_cache = get_fragment_cache()
+    stats['fragments'] = fragment_cache.stats() if fragment_cache is not None else None
+    return jsonify(stats)
+
+@bp.route('/admin/metrics')
+def admin_metrics():
+    # Prometheus scrapes with "Authorization: Bearer <METRICS_TOKEN>"; admins can also open it logged in
+    if not current_user.is_authenticated:
+        token = current_app.config.get('METRICS_TOKEN')
+        authorization = request.headers.get('Authorization')
+        if authorization is None:
+            return login_manager.unauthorized()
+        if not token or not hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+            abort(401)
+    if 'metrics' not in current_app.extensions:
+        abort(404)
+    return current_app.response_class(metrics_text(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,127 @@
+import re
+
+from sqlalchemy import DDL, event, select, text
+
+from app import db
+from app.models import Product
+
+# Product search runs on an FTS5 table holding a normalized copy of each
+# product's name, description and category (rowid = product.id). Triggers
+# keep it in step with every write to product, and the same normalization
+# is applied to queries, so spelling variants of Arabic words match.
+
+SEARCH_TABLE = 'product_search'
+
+# Tashkeel and the combining maddah/hamza marks (U+064B..U+0655), superscript alef and tatweel are dropped
+ARABIC_STRIP = [chr(code) for code in range(0x064B, 0x0656)] + ['\u0670', '\u0640']
+# Letter variants folded to one form: alef with hamza/madda/wasla -> alef, alef maqsura -> ya, ta marbuta -> ha
+ARABIC_FOLD = {
+    '\u0623': '\u0627',
+    '\u0625': '\u0627',
+    '\u0622': '\u0627',
+    '\u0671': '\u0627',
+    '\u0649': '\u064A',
+    '\u0629': '\u0647',
+}
+
+_TRANSLATION = str.maketrans({**{char: None for char in ARABIC_STRIP}, **ARABIC_FOLD})
+
+# Column weights for bm25(): a hit in the name counts most
+RANK_WEIGHTS = {'name': 10.0, 'description': 1.0, 'category': 4.0}
+
+MAX_QUERY_TERMS = 8
+
+
+def normalize_arabic(value):
+    return (value or '').translate(_TRANSLATION)
+
+
+def _sql_normalize(expression):
+    """SQL equivalent of normalize_arabic() built from nested replace() calls"""
+    expression = f"coalesce({expression}, '')"
+    for char in ARABIC_STRIP:
+        expression = f"replace({expression}, '{char}', '')"
+    for char, replacement in ARABIC_FOLD.items():
+        expression = f"replace({expression}, '{char}', '{replacement}')"
+    return expression
+
+
+def _indexed_values(row):
+    return ', '.join(_sql_normalize(f'{row}.{column}') for column in RANK_WEIGHTS)
+
+
+SEARCH_COLUMNS = ', '.join(RANK_WEIGHTS)
+
+SEARCH_DDL = {
+    SEARCH_TABLE: f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+            {SEARCH_COLUMNS}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')""",
+    'product_search_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS product_search_insert AFTER INSERT ON product
+        BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, {SEARCH_COLUMNS}) VALUES (NEW.id, {_indexed_values('NEW')});
+        END""",
+    'product_search_update': f"""
+        CREATE TRIGGER IF NOT EXISTS product_search_update AFTER UPDATE OF name, description, category ON product
+        BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;
+            INSERT INTO {SEARCH_TABLE} (rowid, {SEARCH_COLUMNS}) VALUES (NEW.id, {_indexed_values('NEW')});
+        END""",
+    'product_search_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS product_search_delete AFTER DELETE ON product
+        BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id;
+        END""",
+}
+
+REBUILD_SQL = [
+    f"DELETE FROM {SEARCH_TABLE}",
+    f"INSERT INTO {SEARCH_TABLE} (rowid, {SEARCH_COLUMNS}) SELECT id, {_indexed_values('product')} FROM product",
+]
+
+for _statement in SEARCH_DDL.values():
+    event.listen(Product.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+
+def build_match_query(query):
+    """Turn free text into an FTS5 MATCH expression, or None if it has no terms.
+
+    Every term must match, and the last one also matches as a prefix so
+    results follow the user while they type.
+    """
+    terms = re.findall(r'\w+', normalize_arabic(query))[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_products(query, page=1, per_page=24):
+    """Active products matching `query`, best bm25 rank first.
+
+    Returns (products, total).
+    """
+    match = build_match_query(query)
+    if match is None:
+        return [], 0
+
+    matches = f"""
+        FROM {SEARCH_TABLE} CROSS JOIN product ON product.id = {SEARCH_TABLE}.rowid
+        WHERE {SEARCH_TABLE} MATCH :match AND product.is_active = 1"""
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS.values())
+
+    total = db.session.execute(text(f"SELECT count(*) {matches}"), {'match': match}).scalar()
+    if not total:
+        return [], 0
+
+    statement = text(f"""
+        SELECT product.* {matches}
+        ORDER BY bm25({SEARCH_TABLE}, {weights}), product.id DESC
+        LIMIT :limit OFFSET :offset""")
+    products = db.session.execute(
+        select(Product).from_statement(statement),
+        {'match': match, 'limit': per_page, 'offset': (max(page, 1) - 1) * per_page},
+    ).scalars().all()
+    return products, total
+
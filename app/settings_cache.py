@@ -0,0 +1,101 @@
+import threading
+import time
+from types import MappingProxyType
+
+from flask import current_app
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import SiteSettings
+from app.page_cache import get_page_cache
+
+
+class SettingsSnapshot:
+    """Read-only copy of the SiteSettings row shared by all requests of a worker"""
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        object.__setattr__(self, '_values', MappingProxyType(dict(values)))
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError('SettingsSnapshot is read-only')
+
+    def __repr__(self):
+        return f'<SettingsSnapshot {self._values.get("site_name")}>'
+
+
+class SettingsCache:
+    """Per-process SiteSettings cache.
+
+    The snapshot is served without touching the database for
+    SETTINGS_CACHE_TTL seconds. After that, a single-column query on
+    updated_at tells us whether another worker changed the settings.
+    Admin edits also bump the 'settings' page-cache tag, and a snapshot
+    taken under an older tag version is reloaded straight away, so a page
+    re-rendered on another worker never stores the old settings under the
+    new version.
+    """
+
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self):
+        # Read before loading, so an edit that lands mid-load leaves the snapshot stale
+        version = get_page_cache().tag_version('settings')
+        snapshot = self._snapshot
+        if (snapshot is not None and version == self._version
+                and time.monotonic() - self._checked_at < self.ttl):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and version == self._version:
+                updated_at = db.session.query(SiteSettings.updated_at).order_by(SiteSettings.id).limit(1).scalar()
+                if updated_at == snapshot.updated_at:
+                    self._checked_at = time.monotonic()
+                    return snapshot
+
+            settings = db.session.query(SiteSettings).order_by(SiteSettings.id).first()
+            if settings is None:
+                # Fresh database. Create the row in a session of its own: committing
+                # the request's session would expire everything it has loaded so far.
+                with Session(db.engine, expire_on_commit=False) as session:
+                    settings = SiteSettings()
+                    session.add(settings)
+                    session.commit()
+            snapshot = SettingsSnapshot(
+                (column.key, getattr(settings, column.key))
+                for column in SiteSettings.__table__.columns
+            )
+            self._snapshot = snapshot
+            self._version = version
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+            self._version = None
+            self._checked_at = 0.0
+
+
+def init_app(app):
+    app.extensions['settings_cache'] = SettingsCache(ttl=app.config.get('SETTINGS_CACHE_TTL', 5))
+
+
+def get_site_settings():
+    return current_app.extensions['settings_cache'].get()
+
+
+def invalidate_site_settings():
+    current_app.extensions['settings_cache'].invalidate()
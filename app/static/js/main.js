@@ -8,6 +8,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeAnimations();
     initializeFormValidations();
     initializeImagePreview();
+    initializeLoadMore();
 });
 
 // Initialize all components
@@ -119,6 +120,39 @@ function initializeImagePreview() {
     });
 }
 
+// Catalog "load more": fetch the next page of cards as an HTML fragment
+function initializeLoadMore() {
+    const button = document.getElementById('loadMoreProducts');
+    const grid = document.getElementById('productsGrid');
+    if (!button || !grid) return;
+
+    button.addEventListener('click', function(e) {
+        e.preventDefault();
+        const originalText = button.innerHTML;
+        showLoading(button);
+
+        fetch(button.dataset.fragmentUrl, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(response => {
+                if (!response.ok) throw new Error(response.statusText);
+                const nextPage = response.headers.get('X-Next-Page');
+                return response.text().then(html => ({ html, nextPage }));
+            })
+            .then(({ html, nextPage }) => {
+                grid.insertAdjacentHTML('beforeend', html);
+                if (nextPage) {
+                    button.dataset.fragmentUrl = nextPage;
+                    hideLoading(button, originalText);
+                } else {
+                    button.parentElement.remove();
+                }
+            })
+            .catch(() => {
+                // Fall back to a full page load
+                window.location.href = button.href;
+            });
+    });
+}
+
 // Global functions
 window.previewImage = function(input) {
     const preview = document.getElementById('imagePreview');
@@ -364,7 +398,7 @@ document.addEventListener('scroll', function() {
     }
 });
 
-console.log('Clay Store JavaScript fully initialized');\n\n
+console.log('Clay Store JavaScript fully initialized');
 // Additional fixes for admin functionality
 document.addEventListener('DOMContentLoaded', function() {
     // Fix form submission with loading states
@@ -0,0 +1,112 @@
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import case, func, select, true
+
+from app import db
+from app.models import Product, Review, Testimonial
+from app.page_cache import get_page_cache
+
+# Data tags whose admin writes make the counters stale (see app/page_cache.py)
+STATS_TAGS = ('products', 'reviews', 'testimonials')
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def compute_stats():
+    """Every dashboard/analytics counter in two queries.
+
+    One SELECT cross-joins three single-row conditional aggregates (one per
+    table); the second is the per-category GROUP BY over every product, so
+    categories holding only inactive products still reach the admin filter.
+    """
+    products = select(
+        func.count(Product.id).label('total'),
+        _count_if(Product.is_active == True).label('active'),
+        _count_if(Product.featured == True).label('featured'),
+    ).subquery()
+    reviews = select(
+        func.count(Review.id).label('total'),
+        _count_if(Review.is_approved == True).label('approved'),
+        _count_if(Review.is_featured == True).label('featured'),
+        func.avg(case((Review.is_approved == True, Review.rating))).label('avg_rating'),
+    ).subquery()
+    testimonials = select(
+        func.count(Testimonial.id).label('total'),
+        _count_if(Testimonial.is_active == True).label('active'),
+        _count_if(Testimonial.is_featured == True).label('featured'),
+    ).subquery()
+
+    # Each side is exactly one row, so the cross join is one row too
+    snapshot = select(products, reviews, testimonials) \
+        .select_from(products.join(reviews, true()).join(testimonials, true()))
+    row = db.session.execute(snapshot).one()
+    p_total, p_active, p_featured, r_total, r_approved, r_featured, avg_rating, t_total, t_active, t_featured = row
+
+    categories = db.session.query(Product.category, _count_if(Product.is_active == True)) \
+        .group_by(Product.category).all()
+
+    return {
+        'products': {
+            'total': p_total,
+            'active': p_active,
+            'featured': p_featured,
+        },
+        'reviews': {
+            'total': r_total,
+            'approved': r_approved,
+            'pending': r_total - r_approved,
+            'featured': r_featured,
+            'avg_rating': round(avg_rating or 0, 1),
+        },
+        'testimonials': {
+            'total': t_total,
+            'active': t_active,
+            'featured': t_featured,
+        },
+        # Active products per category, for the analytics page
+        'categories': [(name, active) for name, active in categories if active],
+        'all_categories': [name for name, active in categories],
+    }
+
+
+class StatsCache:
+    """Short-TTL cache of compute_stats() that admin writes invalidate.
+
+    Admin writes bump the page-cache tag versions, so comparing those
+    versions retires the snapshot on every worker, not just the one that
+    handled the write. The TTL covers changes made outside the admin.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._versions = None
+        self._expires = 0.0
+
+    def get(self):
+        versions = get_page_cache().versions(STATS_TAGS)
+        with self._lock:
+            if self._value is not None and versions == self._versions and time.monotonic() < self._expires:
+                return self._value
+
+            self._value = compute_stats()
+            self._versions = versions
+            self._expires = time.monotonic() + self.ttl
+            return self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+
+def init_app(app):
+    app.extensions['stats_cache'] = StatsCache(ttl=app.config.get('STATS_CACHE_TTL', 30))
+
+
+def get_stats():
+    return current_app.extensions['stats_cache'].get()
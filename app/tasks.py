@@ -0,0 +1,184 @@
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+# name -> handler; handlers are registered with @task
+TASKS = {}
+
+
+def task(name):
+    """Register a function as a background task handler"""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, max_attempts=3, **payload):
+    """Schedule a task in the current transaction.
+
+    The row commits (or rolls back) together with the change that needed
+    it, so work is never lost or run for data that was not saved.
+    """
+    if name not in TASKS:
+        raise KeyError(f'Unknown background task: {name}')
+    entry = BackgroundTask(name=name, payload=json.dumps(payload), max_attempts=max_attempts)
+    db.session.add(entry)
+    db.session.info['tasks_enqueued'] = True
+    return entry
+
+
+class TaskRunner:
+    """In-process pool of threads that drain the background_task table.
+
+    Claiming is a conditional UPDATE on status, so several gunicorn
+    workers can poll the same table without running a task twice.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.workers = app.config.get('TASK_WORKERS', 1)
+        self.poll_interval = app.config.get('TASK_POLL_INTERVAL', 5)
+        self.stale_after = timedelta(seconds=app.config.get('TASK_STALE_AFTER', 600))
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._loop, name=f'task-runner-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def start_on_first_request(self):
+        # Workers start polling once they serve; scripts and `flask` commands never do
+        if not self._threads:
+            self.start()
+
+    def wake(self):
+        self._wakeup.set()
+
+    def _loop(self):
+        with self.app.app_context():
+            self._safely(requeue_stale_tasks, self.stale_after)
+        while True:
+            with self.app.app_context():
+                ran = self._safely(run_next_task)
+            if not ran:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _safely(self, func, *args):
+        try:
+            return func(*args)
+        except OperationalError:
+            # Usually the table does not exist yet (fresh database); try again next poll
+            logger.debug('Background task table unavailable', exc_info=True)
+        except Exception:
+            logger.exception('Background task runner error')
+        db.session.rollback()
+        return False
+
+
+def requeue_stale_tasks(stale_after):
+    """Put back tasks left 'running' by a worker that died mid-task"""
+    cutoff = datetime.utcnow() - stale_after
+    BackgroundTask.query.filter(BackgroundTask.status == 'running',
+                                BackgroundTask.started_at < cutoff) \
+        .update({'status': 'pending'}, synchronize_session=False)
+    db.session.commit()
+
+
+def _claim_next_task():
+    now = datetime.utcnow()
+    while True:
+        task_id = db.session.query(BackgroundTask.id) \
+            .filter(BackgroundTask.status == 'pending', BackgroundTask.run_after <= now) \
+            .order_by(BackgroundTask.run_after, BackgroundTask.id).limit(1).scalar()
+        if task_id is None:
+            return None
+
+        claimed = BackgroundTask.query.filter_by(id=task_id, status='pending').update({
+            'status': 'running',
+            'attempts': BackgroundTask.attempts + 1,
+            'started_at': now,
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return db.session.get(BackgroundTask, task_id)
+
+
+def run_next_task():
+    """Run one due task; returns False when the queue is empty"""
+    entry = _claim_next_task()
+    if entry is None:
+        return False
+
+    task_id = entry.id
+    try:
+        TASKS[entry.name](**json.loads(entry.payload or '{}'))
+        entry = db.session.get(BackgroundTask, task_id)
+        entry.status = 'done'
+        entry.last_error = None
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Background task %s (%s) failed', task_id, entry.name)
+        entry = db.session.get(BackgroundTask, task_id)
+        entry.last_error = f'{type(e).__name__}: {e}'
+        if entry.attempts >= entry.max_attempts:
+            entry.status = 'failed'
+        else:
+            # Exponential backoff: 10s, 20s, 40s, ...
+            entry.status = 'pending'
+            entry.run_after = datetime.utcnow() + timedelta(seconds=5 * 2 ** entry.attempts)
+    entry.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def run_pending_tasks():
+    """Drain every due task in the calling thread (scripts and tests)"""
+    count = 0
+    while run_next_task():
+        count += 1
+    return count
+
+
+def retry_task(task_id):
+    entry = db.session.get(BackgroundTask, task_id)
+    if entry is None or entry.status != 'failed':
+        return False
+    entry.status = 'pending'
+    entry.attempts = 0
+    entry.run_after = datetime.utcnow()
+    db.session.info['tasks_enqueued'] = True
+    return True
+
+
+def init_app(app):
+    runner = TaskRunner(app)
+    app.extensions['task_runner'] = runner
+    if app.config.get('TASK_EXECUTOR_ENABLED', True):
+        app.before_request(runner.start_on_first_request)
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_runner(session):
+    if session.info.pop('tasks_enqueued', False) and has_app_context():
+        runner = current_app.extensions.get('task_runner')
+        if runner is not None:
+            runner.wake()
@@ -0,0 +1,45 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+# Compiled templates that survive worker restarts.
+#
+# Jinja compiles a template to Python source and then to a code object the
+# first time it is rendered, so a freshly started worker is slow on the
+# first visit of every page. The bytecode cache keeps those code objects in
+# TEMPLATE_CACHE_DIR, shared by all workers and restarts. An entry is keyed
+# on the template name and checked against a checksum of its source (and
+# the Python version), so an edited template is recompiled, never served
+# stale. warm_templates() loads every template up front; gunicorn_config.py
+# runs it in each worker before it accepts requests when TEMPLATE_WARMUP is
+# set.
+
+TEMPLATE_EXTENSIONS = ('.html',)
+
+
+class BytecodeCache(FileSystemBytecodeCache):
+    """FileSystemBytecodeCache that creates its directory on the first write"""
+
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except FileNotFoundError:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+
+
+def warm_templates(app):
+    """Load every template of the app into its Jinja environment; returns their names"""
+    names = [name for name in app.jinja_env.list_templates() if name.endswith(TEMPLATE_EXTENSIONS)]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+def init_app(app):
+    if not app.config.get('TEMPLATE_BYTECODE_CACHE', True):
+        return
+
+    directory = app.config.get('TEMPLATE_CACHE_DIR') or os.path.join(app.instance_path, 'jinja_cache')
+    # Must be in place before the environment is created on first use
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': BytecodeCache(directory)}
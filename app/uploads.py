@@ -0,0 +1,310 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter
+
+from flask import Request, current_app, g, request
+from sqlalchemy import event, false, update
+from sqlalchemy.orm import Session
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from app import db
+from app.images import generate_variants, variant_files
+from app.models import Product, Review, SiteSettings, StoredFile, Testimonial
+from app.page_cache import invalidate_pages
+from app.settings_cache import invalidate_site_settings
+from app.tasks import enqueue, task
+
+
+# Uploads are content-addressed: the file is named after the SHA-256 of its
+# bytes and shared by every row that uploads the same image. StoredFile keeps
+# a reference count, and the files are only unlinked after the commit that
+# drops the last reference.
+#
+# Slow follow-up work (resizing, unlinking) runs as background tasks.
+#
+# Ingestion is a single pass: UploadRequest hands werkzeug's multipart parser
+# an IngestFile in UPLOAD_INCOMING_DIR, which hashes, sniffs the image type
+# and enforces MAX_UPLOAD_SIZE while the body is being read in fixed-size
+# chunks. Saving is then just an atomic rename into the upload folder, so
+# worker memory stays flat however large the upload is. Nothing reaches the
+# served folder before it has been checked and saved.
+
+CHUNK_SIZE = 64 * 1024
+
+# Columns that reference uploads: (model, filename column, variants column)
+IMAGE_FIELDS = [
+    (Product, 'image_filename', 'image_variants'),
+    (Review, 'image_filename', 'image_variants'),
+    (Testimonial, 'image_filename', 'image_variants'),
+    (SiteSettings, 'logo_filename', 'logo_variants'),
+    (SiteSettings, 'hero_image_filename', 'hero_image_variants'),
+]
+
+# Leading bytes of the image formats we accept -> stored extension
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+]
+
+
+class UploadError(Exception):
+    """Raised for uploads that are not an accepted image"""
+
+
+def sniff_image_type(head):
+    """Return the file extension for the image format in `head`, or None"""
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+
+class IngestFile:
+    """Temp file in the incoming folder that hashes and checks data as it is written"""
+
+    def __init__(self, directory, max_size):
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self._head = b''
+        self.max_size = max_size
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise RequestEntityTooLarge()
+        if len(self._head) < 16:
+            self._head += bytes(data[:16 - len(self._head)])
+        self._hash.update(data)
+        return self._file.write(data)
+
+    @property
+    def content_hash(self):
+        return self._hash.hexdigest()
+
+    @property
+    def extension(self):
+        return sniff_image_type(self._head)
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def _incoming_dir():
+    directory = (current_app.config.get('UPLOAD_INCOMING_DIR')
+                 or os.path.join(current_app.instance_path, 'incoming'))
+    # Created on the first upload rather than at startup
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _new_ingest_file():
+    ingest = IngestFile(_incoming_dir(), current_app.config['MAX_UPLOAD_SIZE'])
+    g.setdefault('ingest_files', []).append(ingest)
+    return ingest
+
+
+class UploadRequest(Request):
+    """Stream uploaded files straight into IngestFiles instead of werkzeug's temp files"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename:
+            # Empty file inputs and other parts without a file name
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return _new_ingest_file()
+
+
+def _ingest(file):
+    stream = file.stream
+    if isinstance(stream, IngestFile):
+        return stream
+
+    # Not parsed by UploadRequest (e.g. constructed in a script): copy it in chunks
+    ingest = _new_ingest_file()
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        ingest.write(chunk)
+    return ingest
+
+
+def get_uploaded_file(field):
+    """Return the uploaded file for a form field, or None if nothing was chosen"""
+    file = request.files.get(field)
+    if file and file.filename != '':
+        return file
+    return None
+
+
+def save_upload(file):
+    """Store an uploaded image (once per distinct content) and take a reference to it.
+
+    Returns (filename, variants_json). The caller commits the session.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    ingest = _ingest(file)
+    ingest.flush()
+
+    extension = ingest.extension
+    if extension is None:
+        ingest.discard()
+        raise UploadError('نوع الملف غير مدعوم، الرجاء رفع صورة (JPG, PNG, GIF, WEBP)')
+
+    stored = StoredFile.query.filter_by(content_hash=ingest.content_hash).first()
+    if stored is None:
+        filename = f"{ingest.content_hash}{extension}"
+        stored = StoredFile(content_hash=ingest.content_hash, filename=filename,
+                            size=ingest.size, ref_count=0)
+        db.session.add(stored)
+        # Insert the row, and with it take the write lock, before the file
+        # appears: remove_uploads checks for it under the same lock
+        db.session.flush()
+        ingest.close()
+        _move_into(ingest.path, os.path.join(upload_folder, filename))
+        # Not referenced by anything until the transaction commits
+        _written_files(db.session).update(_paths([filename]))
+        # Resizing takes seconds for phone photos; pages use the original until it is done
+        enqueue('generate_image_variants', filename=filename)
+    else:
+        ingest.discard()
+
+    stored.ref_count += 1
+    return stored.filename, stored.variants
+
+
+def _move_into(path, destination):
+    try:
+        os.replace(path, destination)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        # UPLOAD_INCOMING_DIR is on another filesystem: copy next to the
+        # destination first, so the file still appears there atomically
+        fd, part = tempfile.mkstemp(dir=os.path.dirname(destination), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as target, open(path, 'rb') as source:
+                shutil.copyfileobj(source, target, CHUNK_SIZE)
+            os.replace(part, destination)
+        except BaseException:
+            _remove_files([part])
+            raise
+        os.remove(path)
+
+
+def discard_unclaimed_uploads(exc=None):
+    """Remove temp files for uploads the request never saved"""
+    for ingest in g.pop('ingest_files', ()):
+        ingest.discard()
+
+
+def delete_upload(filename, variants=None):
+    """Drop one reference to an upload; its files go away with the last one"""
+    delete_uploads([(filename, variants)])
+
+
+def delete_uploads(images):
+    """Drop one reference per (filename, variants) pair.
+
+    Takes one StoredFile query and queues a single cleanup task however many
+    images there are, so bulk deletes stay cheap. Callers keep `images` within
+    SQLite's parameter limit (see app/bulk.py).
+    """
+    references = Counter(filename for filename, variants in images if filename)
+    if not references:
+        return
+    legacy_variants = dict(images)
+
+    stored_files = StoredFile.query.filter(StoredFile.filename.in_(list(references))).all()
+    stored_by_name = {stored.filename: stored for stored in stored_files}
+
+    files = {}
+    for filename, count in references.items():
+        stored = stored_by_name.get(filename)
+        if stored is None:
+            # Uploaded before content addressing: owned by a single row
+            files[filename] = [filename] + variant_files(legacy_variants[filename])
+            continue
+        stored.ref_count -= count
+        if stored.ref_count <= 0:
+            files[filename] = [stored.filename] + variant_files(stored.variants)
+            db.session.delete(stored)
+
+    if files:
+        enqueue('remove_uploads', files=files)
+
+
+def _paths(names):
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    return {os.path.join(upload_folder, name) for name in names}
+
+
+def _written_files(session):
+    return session.info.setdefault('uploads_written', set())
+
+
+def _remove_files(paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_written_files(session):
+    session.info.pop('uploads_written', None)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _remove_orphaned_files(session, previous_transaction):
+    # Files written for rows that were never saved
+    _remove_files(session.info.pop('uploads_written', ()))
+
+
+# Background tasks
+
+@task('remove_uploads')
+def remove_uploads(files):
+    """Unlink {filename: [names]} for uploads whose last reference is gone"""
+    # The same content may have been uploaded again since the delete. Hold the
+    # write lock while checking and unlinking: a re-upload inserts its row
+    # before moving the file into place, so it has either committed and shows
+    # up below, or waits for us and writes the file afresh afterwards.
+    db.session.execute(update(StoredFile).where(false()).values(ref_count=StoredFile.ref_count))
+    reuploaded = {filename for filename, in db.session.query(StoredFile.filename)
+                  .filter(StoredFile.filename.in_(list(files)))}
+    for filename, names in files.items():
+        if filename not in reuploaded:
+            _remove_files(_paths(names))
+
+
+@task('generate_image_variants')
+def generate_image_variants(filename):
+    stored = StoredFile.query.filter_by(filename=filename).first()
+    if stored is None:
+        return
+
+    variants = generate_variants(current_app.config['UPLOAD_FOLDER'], filename)
+    stored.variants = json.dumps(variants) if variants else None
+    for model, filename_field, variants_field in IMAGE_FIELDS:
+        model.query.filter(getattr(model, filename_field) == filename) \
+            .update({variants_field: stored.variants}, synchronize_session=False)
+    db.session.commit()
+
+    invalidate_site_settings()
+    invalidate_pages('products', 'reviews', 'testimonials', 'settings')
+
+
+def init_app(app):
+    app.request_class = UploadRequest
+    app.teardown_request(discard_unclaimed_uploads)
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Load-test the storefront and admin pages against the WSGI app in-process.
+
+For each catalog size (--products 1000 10000 100000) a throwaway database
+is seeded, then every GET route is driven by --clients concurrent clients,
+followed by the admin writes of WRITES (on the same throwaway database).
+Reports p50/p95/p99 latency, requests per second and SQL queries per request.
+
+    python benchmark.py --products 1000 10000 --save results.json
+    python benchmark.py --products 1000 10000 --baseline results.json
+
+With --baseline, each route is compared with the stored run: a p50 slowdown
+beyond --threshold (and at least --min-delta-ms) or more queries per request
+is flagged, and --fail-on-regression turns that into exit status 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import event
+from app import create_app, db
+from app.models import Admin, Product
+from app.pagination import encode_cursor
+from config import Config
+from generate_dataset import CATALOG, COLORS, generate_dataset
+
+CATEGORIES = list(CATALOG)
+# Search terms: product types and colours that occur in generated names
+SEARCH_TERMS = [kind for kinds in CATALOG.values() for kind in kinds] + COLORS
+
+# (name, url, needs admin login); {product} (an active product), {cursor}
+# (a position in the catalog), {review}, {testimonial}, {category} and
+# {term} are filled with a random seeded value per request
+ROUTES = [
+    ('home', '/', False),
+    ('products', '/products', False),
+    ('products_category', '/products?category={category}', False),
+    ('products_more', '/products/more?cursor={cursor}', False),
+    ('reviews', '/reviews', False),
+    ('contact', '/contact', False),
+    ('custom_order', '/custom-order', False),
+    ('search', '/search?q={term}', False),
+    ('search_json', '/search.json?q={term}', False),
+    ('whatsapp', '/whatsapp/{product}', False),
+    ('api_products', '/api/v1/products', False),
+    ('api_product', '/api/v1/products/{product}', False),
+    ('api_categories', '/api/v1/categories', False),
+    ('api_reviews', '/api/v1/reviews?product_id={product}', False),
+    ('api_settings', '/api/v1/settings', False),
+    ('admin_login', '/admin/login', False),
+    ('admin_dashboard', '/admin', True),
+    ('admin_analytics', '/admin/analytics', True),
+    ('admin_cache_stats', '/admin/cache-stats', True),
+    ('admin_metrics', '/admin/metrics', True),
+    ('admin_products', '/admin/products', True),
+    ('admin_products_filtered', '/admin/products?status=active&category={category}&sort=price_high', True),
+    ('admin_product_new', '/admin/products/new', True),
+    ('admin_product_edit', '/admin/products/{product}/edit', True),
+    ('admin_reviews', '/admin/reviews', True),
+    ('admin_reviews_filtered', '/admin/reviews?status=approved&rating=5&sort=rating_high', True),
+    ('admin_testimonials', '/admin/testimonials', True),
+    ('admin_testimonial_new', '/admin/testimonials/new', True),
+    ('admin_testimonial_edit', '/admin/testimonials/{testimonial}/edit', True),
+    ('admin_settings', '/admin/settings', True),
+    ('admin_tasks', '/admin/tasks', True),
+]
+
+# (name, url, 'form' or 'json', body); body builds the POST data from the
+# same seeded values as ROUTES plus {products}, {reviews} and {testimonials}
+# (a few ids each, for the bulk actions). All of them need admin login and
+# change nothing that a later request depends on.
+WRITES = [
+    ('admin_product_create', '/admin/products/new', 'form',
+     lambda v: {'name': f"{v['term']} {v['category']}", 'description': "وصف المنتج", 'price': '150',
+                'category': v['category']}),
+    ('admin_product_save', '/admin/products/{product}/edit', 'form',
+     lambda v: {'name': f"{v['term']} {v['product']}", 'description': "وصف معدل", 'price': '175',
+                'category': v['category'], 'featured': 'on'}),
+    ('admin_products_bulk', '/admin/products/bulk-action', 'json',
+     lambda v: {'action': 'feature', 'product_ids': v['products']}),
+    ('admin_review_create', '/admin/reviews/new', 'form',
+     lambda v: {'customer_name': "عميل", 'comment': f"{v['term']} رائع", 'rating': '5',
+                'product_id': str(v['product']), 'is_approved': 'on'}),
+    ('admin_review_save', '/admin/reviews/{review}/edit', 'form',
+     lambda v: {'customer_name': "عميل", 'comment': f"{v['term']} جميل", 'rating': '4',
+                'product_id': str(v['product']), 'is_approved': 'on'}),
+    ('admin_review_approve', '/admin/reviews/{review}/approve', 'form', lambda v: {}),
+    ('admin_review_reject', '/admin/reviews/{review}/reject', 'form', lambda v: {}),
+    ('admin_review_feature', '/admin/reviews/{review}/feature', 'form', lambda v: {}),
+    ('admin_review_rating', '/admin/reviews/{review}/update-rating', 'json', lambda v: {'rating': 4}),
+    ('admin_reviews_bulk', '/admin/reviews/bulk-action', 'json',
+     lambda v: {'action': 'approve', 'review_ids': v['reviews']}),
+    ('admin_testimonial_create', '/admin/testimonials/new', 'form',
+     lambda v: {'customer_name': "عميلة", 'customer_title': "", 'testimonial_text': "شكراً", 'rating': '5'}),
+    ('admin_testimonial_save', '/admin/testimonials/{testimonial}/edit', 'form',
+     lambda v: {'customer_name': "عميلة", 'customer_title': "", 'testimonial_text': "شكراً جزيلاً",
+                'rating': '5', 'is_active': 'on'}),
+    ('admin_testimonials_bulk', '/admin/testimonials/bulk-action', 'json',
+     lambda v: {'action': 'activate', 'testimonial_ids': v['testimonials']}),
+    ('admin_settings_save', '/admin/settings', 'form',
+     lambda v: {'site_name': "متجر الطين", 'site_description': "فخار مصنوع يدوياً", 'about_text': "من نحن",
+                'footer_text': "جميع الحقوق محفوظة", 'contact_phone': '0500000000',
+                'contact_email': 'shop@example.com', 'whatsapp_number': '966500000000',
+                'facebook_url': '', 'instagram_url': '', 'tiktok_url': '',
+                'background_color': '#ffffff', 'secondary_color': '#8b4513', 'accent_color': '#d2691e',
+                'theme_style': 'modern', 'show_reviews': 'on', 'show_custom_orders': 'on'}),
+]
+# Ids per bulk action
+BULK_SIZE = 10
+
+# (endpoint, method) pairs deliberately left out, with the reason; listed
+# at the start of every run
+UNBENCHMARKED = {
+    ('static', 'GET'): 'files are served by nginx in production',
+    ('main.admin_logout', 'GET'): 'ends the session the admin routes need',
+    ('main.admin_review_new', 'GET'): 'renders admin/review_form.html, which the project does not have yet',
+    ('main.admin_review_edit', 'GET'): 'renders admin/review_form.html, which the project does not have yet',
+    ('main.admin_login', 'POST'): 'dominated by the deliberately slow password hash',
+    ('main.admin_product_delete', 'POST'): 'each id can only be deleted once',
+    ('main.admin_review_delete', 'POST'): 'each id can only be deleted once',
+    ('main.admin_testimonial_delete', 'POST'): 'each id can only be deleted once',
+    ('main.admin_task_retry', 'POST'): 'needs failed background tasks, which the seed does not create',
+}
+
+def make_app(tmpdir, page_cache):
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmpdir, 'benchmark.sqlite3')}"
+        PAGE_CACHE_DIR = os.path.join(tmpdir, 'page_cache')
+        TEMPLATE_CACHE_DIR = os.path.join(tmpdir, 'jinja_cache')
+        METRICS_DIR = os.path.join(tmpdir, 'metrics')
+        PAGE_CACHE_ENABLED = page_cache
+        TASK_EXECUTOR_ENABLED = False
+
+    return create_app(BenchmarkConfig)
+
+def seed(app, products, reviews_per_product, testimonials, seed_value):
+    """Fill the database with a generated catalog; returns the ids to request"""
+    generate_dataset(app, products=products, reviews=products * reviews_per_product,
+                     testimonials=testimonials, images=0, seed=seed_value)
+
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+
+        active = db.session.query(Product.id, Product.created_at).filter(Product.is_active == True).all()
+
+    return {
+        'product': [tuple(row) for row in active],
+        'review': (1, max(products * reviews_per_product, 1)),
+        'testimonial': (1, max(testimonials, 1)),
+    }
+
+def check_coverage(app):
+    """(endpoint, method) pairs that no ROUTES or WRITES entry reaches"""
+    adapter = app.url_map.bind('localhost')
+
+    def endpoint(url, method):
+        url = url.format(product=1, cursor='', review=1, testimonial=1, category='x', term='x')
+        return adapter.match(url.split('?')[0], method=method)[0]
+
+    covered = {(endpoint(url, 'GET'), 'GET') for _, url, _ in ROUTES}
+    covered |= {(endpoint(url, 'POST'), 'POST') for _, url, _, _ in WRITES}
+    routes = {(rule.endpoint, method) for rule in app.url_map.iter_rules()
+              for method in ('GET', 'POST') if method in rule.methods}
+    return sorted(routes - covered - set(UNBENCHMARKED))
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def pick(rng, ids):
+    """Random seeded values for the placeholders of ROUTES and WRITES"""
+    product_id, created_at = rng.choice(ids['product'])
+    sample = lambda pool: sorted(rng.sample(pool, min(BULK_SIZE, len(pool))))
+    return {
+        'product': product_id,
+        'cursor': encode_cursor(created_at, product_id),
+        'review': rng.randint(*ids['review']),
+        'testimonial': rng.randint(*ids['testimonial']),
+        'category': rng.choice(CATEGORIES),
+        'term': rng.choice(SEARCH_TERMS),
+        'products': sample([row[0] for row in ids['product']]),
+        'reviews': sample(range(ids['review'][0], ids['review'][1] + 1)),
+        'testimonials': sample(range(ids['testimonial'][0], ids['testimonial'][1] + 1)),
+    }
+
+def send(client, url, kind, body, values):
+    """Make one request; returns (target, error or None)"""
+    target = url.format(**values)
+    if kind == 'json':
+        response = client.post(target, json=body(values))
+        if response.status_code < 400 and not response.get_json()['success']:
+            return target, f"{target}: {response.get_json()['message']}"
+    elif kind == 'form':
+        response = client.post(target, data=body(values))
+        # A failed form is rendered again with its error instead of redirecting
+        if response.status_code < 400 and response.status_code != 302:
+            return target, f'{target}: {response.status_code}, form not accepted'
+    else:
+        response = client.get(target)
+    if response.status_code >= 400:
+        return target, f'{target}: {response.status_code}'
+    return target, None
+
+def run_route(app, url, admin, clients, requests, ids, seed_value, kind='get', body=None):
+    """Hit one route `requests` times from `clients` threads; returns its statistics
+
+    kind 'form' or 'json' POSTs body(values) instead of a GET.
+    """
+    local = threading.local()
+
+    def count_query(conn, cursor, statement, parameters, context, executemany):
+        local.queries = getattr(local, 'queries', 0) + 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_query)
+
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+    ready = threading.Barrier(clients + 1)
+    per_client = [requests // clients + (1 if i < requests % clients else 0) for i in range(clients)]
+
+    def client_loop(number, count):
+        rng = random.Random(f'{seed_value}-{number}')
+        client = app.test_client()
+        if admin:
+            client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+
+        send(client, url, kind, body, pick(rng, ids))  # warm-up: templates, settings cache, connection
+        ready.wait()
+        for _ in range(count):
+            values = pick(rng, ids)
+            local.queries = 0
+            started = time.perf_counter()
+            target, error = send(client, url, kind, body, values)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                queries.append(local.queries)
+                if error:
+                    errors.append(error)
+
+    threads = [threading.Thread(target=client_loop, args=(i, count)) for i, count in enumerate(per_client)]
+    for thread in threads:
+        thread.start()
+    ready.wait()  # clock starts once every client has logged in and warmed up
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    event.remove(engine, 'before_cursor_execute', count_query)
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else 0.0,
+        'errors': errors[:5],
+    }
+
+def benchmark_size(products, args):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app = make_app(tmpdir, args.page_cache)
+        started = time.perf_counter()
+        ids = seed(app, products, args.reviews_per_product, args.testimonials, args.seed)
+        print(f"🌱 Seeded {products} products, {products * args.reviews_per_product} reviews "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        uncovered = check_coverage(app)
+        if uncovered:
+            print(f"⚠️  Routes without a benchmark: {', '.join(f'{method} {endpoint}' for endpoint, method in uncovered)}")
+
+        selected = lambda name: not args.routes or any(pattern in name for pattern in args.routes)
+        results = {}
+        for name, url, admin in ROUTES:
+            if selected(name):
+                results[name] = run_route(app, url, admin, args.clients, args.requests, ids, args.seed)
+        # Writes last, so the GETs above measure the catalog as seeded
+        for name, url, kind, body in WRITES:
+            if selected(name):
+                results[name] = run_route(app, url, True, args.clients, args.requests, ids, args.seed,
+                                          kind=kind, body=body)
+
+        with app.app_context():
+            db.engine.dispose()
+        return results
+
+def print_results(products, results, baseline, threshold, min_delta_ms):
+    """Print one table per size; returns the routes that regressed against the baseline"""
+    regressions = []
+    print(f"\n📊 {products} products")
+    print(f"{'route':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}  vs baseline")
+    for name, stats in results.items():
+        line = (f"{name:<26}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+                f"{stats['rps']:>9.1f}{stats['queries_per_request']:>9.2f}")
+        previous = baseline.get(name)
+        if previous:
+            delta = stats['p50_ms'] - previous['p50_ms']
+            change = delta / previous['p50_ms'] if previous['p50_ms'] else 0.0
+            # Fractional changes come from occasional cache refreshes; a whole extra query is real
+            query_change = stats['queries_per_request'] - previous['queries_per_request']
+            line += f"  p50 {change:+.0%}"
+            if query_change:
+                line += f", queries {query_change:+.2f}"
+            if (change > threshold and delta >= min_delta_ms) or query_change >= 0.5:
+                line += "  ❌"
+                regressions.append(f"{products}:{name}")
+            elif change < -threshold and -delta >= min_delta_ms:
+                line += "  ✅"
+        if stats['errors']:
+            line += f"  ⚠️  {stats['errors'][0]}"
+        print(line)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, nargs='+', default=[1000], help='catalog sizes to benchmark')
+    parser.add_argument('--reviews-per-product', type=int, default=2)
+    parser.add_argument('--testimonials', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=4, help='concurrent clients per route')
+    parser.add_argument('--requests', type=int, default=100, help='measured requests per route')
+    parser.add_argument('--routes', nargs='*', help='only routes whose name contains one of these')
+    parser.add_argument('--page-cache', action='store_true', help='serve anonymous pages from the page cache')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', metavar='FILE', help='write the results as JSON (usable as a baseline)')
+    parser.add_argument('--baseline', metavar='FILE', help='compare with results saved by --save')
+    parser.add_argument('--threshold', type=float, default=0.10, help='p50 slowdown counted as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='ignore p50 changes smaller than this')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'clients': args.clients,
+            'requests': args.requests,
+            'reviews_per_product': args.reviews_per_product,
+            'page_cache': args.page_cache,
+            'seed': args.seed,
+            'unbenchmarked': sorted(f'{method} {endpoint}' for endpoint, method in UNBENCHMARKED),
+        },
+        'results': {},
+    }
+    print("⏭️  Not benchmarked:")
+    for (endpoint, method), reason in sorted(UNBENCHMARKED.items()):
+        print(f"   {method} {endpoint}: {reason}")
+
+    regressions = []
+    for products in args.products:
+        results = benchmark_size(products, args)
+        report['results'][str(products)] = results
+        regressions += print_results(products, results, baseline.get(str(products), {}),
+                                      args.threshold, args.min_delta_ms)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Results saved to {args.save}")
+
+    if regressions:
+        print(f"\n❌ Slower than the baseline: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
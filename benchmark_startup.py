@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Measure how long a freshly started worker takes to answer its first requests.
+
+Every run is a new Python process, like a gunicorn worker after a deploy
+or a recycle: it creates the app, optionally warms the templates, then
+requests each page of PAGES once. Four setups are compared: no template
+bytecode cache, the bytecode cache (filled by an earlier run), warm-up at
+boot without the cache, and both. Reports boot time (imports and
+create_app), the time to first byte of the first page, and the total for
+all pages. Before that, `python -X importtime` profiles importing the app
+and lists the slowest packages.
+
+    python benchmark_startup.py --runs 5 --save startup.json
+    python benchmark_startup.py --runs 5 --baseline startup.json --fail-on-regression
+
+With --baseline, an import time, boot time or page total that grew by more
+than --threshold (and at least --min-delta-ms) is flagged.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Storefront pages first, then the admin (after logging in); each renders different templates
+PAGES = [
+    '/', '/products', '/reviews', '/contact', '/custom-order', '/search?q=vase', '/admin/login',
+    '/admin', '/admin/products', '/admin/products/new', '/admin/reviews', '/admin/testimonials',
+    '/admin/testimonials/new', '/admin/settings', '/admin/analytics', '/admin/tasks',
+]
+
+# What a worker imports before create_app() runs
+APP_IMPORTS = 'import app.routes, app.api'
+PROJECT_PACKAGES = ('app', 'config')
+
+# (name, bytecode cache, warm-up at boot)
+SETUPS = [
+    ('no cache', False, False),
+    ('bytecode cache', True, False),
+    ('warm-up', False, True),
+    ('bytecode cache + warm-up', True, True),
+]
+
+def make_app(tmpdir, bytecode_cache):
+    from app import create_app
+    from config import Config
+
+    class StartupConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(tmpdir, 'startup.sqlite3')}"
+        PAGE_CACHE_DIR = os.path.join(tmpdir, 'page_cache')
+        PAGE_CACHE_ENABLED = False  # every page is rendered
+        METRICS_DIR = os.path.join(tmpdir, 'metrics')
+        TASK_EXECUTOR_ENABLED = False
+        TEMPLATE_BYTECODE_CACHE = bytecode_cache
+        TEMPLATE_CACHE_DIR = os.path.join(tmpdir, 'jinja_cache')
+
+    return create_app(StartupConfig)
+
+def seed(tmpdir, products):
+    from app import db
+    from app.models import Admin
+    from generate_dataset import generate_dataset
+
+    app = make_app(tmpdir, bytecode_cache=False)
+    generate_dataset(app, products=products, reviews=products * 2, testimonials=20, images=0, seed=42)
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+        db.engine.dispose()
+
+def cold_start(tmpdir, bytecode_cache, warmup):
+    """One worker's life: returns boot and per-page times in ms (run in a fresh process)"""
+    started = time.perf_counter()
+    app = make_app(tmpdir, bytecode_cache)
+    warmup_ms = 0.0
+    if warmup:
+        from app.templating import warm_templates
+        warm_started = time.perf_counter()
+        warm_templates(app)
+        warmup_ms = (time.perf_counter() - warm_started) * 1000
+    boot_ms = (time.perf_counter() - started) * 1000
+
+    client = app.test_client()
+    pages = {}
+    for url in PAGES:
+        if url == '/admin':
+            client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+        page_started = time.perf_counter()
+        response = client.get(url)
+        pages[url] = (time.perf_counter() - page_started) * 1000
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: {response.status_code}')
+    return {'boot_ms': boot_ms, 'warmup_ms': warmup_ms, 'pages': pages}
+
+def parse_importtime(stderr):
+    """{module: (self ms, cumulative ms)} and the total from `python -X importtime` output"""
+    modules, total = {}, 0.0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(own) / 1000, int(cumulative) / 1000)
+        if depth == 0:
+            total += int(cumulative) / 1000
+    return modules, total
+
+def import_profile(runs, top=8):
+    """Median import time of the app in fresh processes, with its slowest top-level packages"""
+    samples = []
+    for _ in range(runs):
+        stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', APP_IMPORTS], check=True,
+                                capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stderr
+        samples.append(parse_importtime(stderr))
+    modules, _ = samples[0]
+
+    def median(name, column):
+        return statistics.median(sample[0][name][column] for sample in samples if name in sample[0])
+
+    own = {name for name in modules if name.split('.')[0] in PROJECT_PACKAGES}
+    packages = {name: median(name, 1) for name in modules if '.' not in name and name not in own}
+    project = {name: median(name, 0) for name in own}
+    return {
+        'import_ms': round(statistics.median(total for _, total in samples), 1),
+        'slowest_packages': {name: round(ms, 1) for name, ms in
+                             sorted(packages.items(), key=lambda item: -item[1])[:top]},
+        'project_self_ms': round(sum(project.values()), 1),
+    }
+
+def run_child(tmpdir, bytecode_cache, warmup):
+    command = [sys.executable, os.path.abspath(__file__), '--child', tmpdir,
+               '--child-setup', json.dumps([bytecode_cache, warmup])]
+    output = subprocess.run(command, check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def benchmark(tmpdir, runs):
+    """Median over `runs` cold starts per setup"""
+    results = {}
+    for name, bytecode_cache, warmup in SETUPS:
+        shutil.rmtree(os.path.join(tmpdir, 'jinja_cache'), ignore_errors=True)
+        if bytecode_cache:
+            run_child(tmpdir, bytecode_cache, warmup=False)  # the previous worker filled the cache
+        samples = [run_child(tmpdir, bytecode_cache, warmup) for _ in range(runs)]
+        results[name] = {
+            'boot_ms': round(statistics.median(s['boot_ms'] for s in samples), 1),
+            'warmup_ms': round(statistics.median(s['warmup_ms'] for s in samples), 1),
+            'first_page_ms': round(statistics.median(s['pages'][PAGES[0]] for s in samples), 1),
+            'all_pages_ms': round(statistics.median(sum(s['pages'].values()) for s in samples), 1),
+        }
+    return results
+
+def print_imports(imports, baseline, threshold, min_delta_ms):
+    """Print the import profile; returns the regressions against the baseline"""
+    text, regressed = compare(imports['import_ms'], baseline.get('import_ms'), threshold, min_delta_ms)
+    print(f"\n📦 Importing the app: {imports['import_ms']:.1f}ms "
+          f"({imports['project_self_ms']:.1f}ms in the project's own modules){text}")
+    for name, ms in imports['slowest_packages'].items():
+        print(f"   {name:<26}{ms:>9.1f}ms")
+    return ['import_ms'] if regressed else []
+
+def compare(value, previous, threshold, min_delta_ms):
+    """(' vs baseline' text, regressed?) for one timing"""
+    if not previous:
+        return '', False
+    delta = value - previous
+    change = delta / previous
+    regressed = change > threshold and delta >= min_delta_ms
+    return f"  {change:+.0%}{'  ❌' if regressed else ''}", regressed
+
+def print_results(results, baseline, threshold, min_delta_ms):
+    """Print the cold-start table; returns the regressions against the baseline"""
+    regressions = []
+    print(f"\n{'setup':<28}{'boot ms':>10}{'warm-up ms':>12}{'first page ms':>15}{'all pages ms':>14}")
+    for name, stats in results.items():
+        previous = baseline.get(name, {})
+        notes = ''
+        for key in ('boot_ms', 'all_pages_ms'):
+            text, regressed = compare(stats[key], previous.get(key), threshold, min_delta_ms)
+            if text:
+                notes += f"  {key.split('_')[0]}{text}"
+            if regressed:
+                regressions.append(f"{name}:{key}")
+        print(f"{name:<28}{stats['boot_ms']:>10.1f}{stats['warmup_ms']:>12.1f}"
+              f"{stats['first_page_ms']:>15.1f}{stats['all_pages_ms']:>14.1f}{notes}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=3, help='cold starts per setup')
+    parser.add_argument('--save', metavar='FILE', help='write the results as JSON (usable as a baseline)')
+    parser.add_argument('--baseline', metavar='FILE', help='compare with results saved by --save')
+    parser.add_argument('--threshold', type=float, default=0.20, help='slowdown counted as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help='ignore changes smaller than this')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-setup', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        bytecode_cache, warmup = json.loads(args.child_setup)
+        print(json.dumps(cold_start(args.child, bytecode_cache, warmup)))
+        return 0
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    imports = import_profile(args.runs)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        seed(tmpdir, args.products)
+        print(f"🌱 Seeded {args.products} products; {args.runs} cold starts per setup, {len(PAGES)} pages each")
+        results = benchmark(tmpdir, args.runs)
+
+    regressions = print_imports(imports, baseline.get('imports', {}), args.threshold, args.min_delta_ms)
+    regressions += print_results(results, baseline.get('cold_start', {}), args.threshold, args.min_delta_ms)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'imports': imports, 'cold_start': results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.save}")
+
+    if regressions:
+        print(f"\n❌ Slower than the baseline: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
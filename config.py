@@ -5,11 +5,76 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///db.sqlite3'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static', 'uploads')
+    
+    # Applied to every new SQLite connection (see app/database.py)
+    SQLITE_PRAGMAS = {
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 3000)),  # ms to wait for another worker's lock
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),  # readers and the writer don't block each other
+        'synchronous': 'NORMAL',  # fsync at checkpoints only; safe with WAL
+        'foreign_keys': 'ON',
+        'cache_size': -8000,  # KiB of page cache per connection
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    }
+    # Statements still refused with "database is locked" are retried this many times,
+    # sleeping SQLITE_RETRY_BACKOFF seconds and doubling each time
+    SQLITE_BUSY_RETRIES = 4
+    SQLITE_RETRY_BACKOFF = 0.05
+    UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static', 'uploads')  # created by `flask bootstrap`
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # per uploaded image, checked while streaming
+    # Uploads being received, kept out of the served folder; on UPLOAD_FOLDER's filesystem saving is a rename
+    UPLOAD_INCOMING_DIR = os.environ.get('UPLOAD_INCOMING_DIR')  # defaults to <instance>/incoming
     
     # WhatsApp number (without country code + sign)
     WHATSAPP_NUMBER = "201XXXXXXXXX"  # Replace with actual number
     
-    # Ensure upload folder exists
-    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    # Seconds a worker serves its cached site settings before re-checking updated_at
+    SETTINGS_CACHE_TTL = int(os.environ.get('SETTINGS_CACHE_TTL', 5))
+    
+    # Seconds the admin dashboard/analytics counters are reused (admin writes refresh them sooner)
+    STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 30))
+    
+    # Products per page on the public catalog
+    PRODUCTS_PER_PAGE = 24
+    
+    # Rows per page on the admin product, review and testimonial lists
+    ADMIN_PER_PAGE = 30
+    
+    # Rendered-page cache for anonymous visitors
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '1') == '1'
+    PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR')  # defaults to <instance>/page_cache
+    
+    # Compiled templates shared by the workers and kept across restarts (see app/templating.py)
+    TEMPLATE_BYTECODE_CACHE = os.environ.get('TEMPLATE_BYTECODE_CACHE', '1') == '1'
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')  # defaults to <instance>/jinja_cache
+    # Compile every template when a gunicorn worker starts, before it takes requests
+    TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', '1') == '1'
+    
+    # Rendered {% cache %} blocks such as product cards, per worker (see app/fragment_cache.py)
+    FRAGMENT_CACHE_ENABLED = os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1'
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 5000))
+    
+    # Minify HTML and gzip/brotli it per Accept-Encoding when no proxy does (see app/compression.py)
+    RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', '1') == '1'
+    HTML_MINIFY = os.environ.get('HTML_MINIFY', '1') == '1'
+    COMPRESSION_MIN_SIZE = 1024  # bytes; smaller bodies gain little and cost a round of compression
+    COMPRESSION_MIMETYPES = ('text/html',)  # JSON, files and redirects go out untouched
+    
+    # Resolve url_for('static', ...) through the fingerprinted files of `flask build-assets` (see app/assets.py)
+    ASSETS_USE_MANIFEST = os.environ.get('ASSETS_USE_MANIFEST', '1') == '1'
+    
+    # Per-endpoint latency/SQL/template histograms, served at /admin/metrics (see app/metrics.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # defaults to <instance>/metrics; shared by the workers
+    METRICS_FLUSH_INTERVAL = 5  # seconds between writes of a worker's numbers to METRICS_DIR
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # bearer token for the Prometheus scraper
+    
+    # Count each request's SQL against its @query_budget: 'enforce' raises (tests), 'report' adds headers
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE')
+    
+    # In-process background task runner (image resizing, file cleanup), started by a worker's first request
+    TASK_EXECUTOR_ENABLED = os.environ.get('TASK_EXECUTOR_ENABLED', '1') == '1'
+    TASK_WORKERS = int(os.environ.get('TASK_WORKERS', 1))
+    TASK_POLL_INTERVAL = 5  # seconds between checks for tasks queued by other workers
+    TASK_STALE_AFTER = 600  # seconds before a 'running' task left by a dead worker is queued again
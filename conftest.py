@@ -0,0 +1,90 @@
+"""
+pytest plugin: every app the tests create counts the SQL of each request
+and fails the test when a view exceeds its @query_budget or runs an N+1
+(see app/query_budget.py). Also provides the fixtures the tests share:
+
+    def test_something(make_app, record_statements, query_budget):
+        app = make_app(PAGE_CACHE_ENABLED=False)
+        with app.app_context(), record_statements(db.engine, 'SELECT') as statements:
+            ...
+        with app.app_context(), query_budget(3):
+            ...
+"""
+
+import os
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.query_budget import count_queries
+from config import Config
+
+def pytest_configure(config):
+    Config.QUERY_BUDGET_MODE = 'enforce'
+
+@pytest.fixture
+def query_budget():
+    return count_queries
+
+@pytest.fixture
+def make_app(tmp_path):
+    """make_app(**settings): an app on a throwaway database.
+
+    Each app gets a directory of its own under tmp_path for the database,
+    uploads, page cache versions, compiled templates and metrics, so
+    nothing is written to instance/ or app/static/uploads. Settings
+    override the test config; pass another app's paths to share a
+    database or cache between two "workers". Unless bootstrap=False the
+    tables and upload folder are created as `flask bootstrap` would
+    (without the admin).
+    """
+    apps = []
+
+    def factory(bootstrap=True, **settings):
+        directory = tmp_path / f'app{len(apps)}'
+        directory.mkdir()
+
+        class TestConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{directory / 'app.sqlite3'}"
+            UPLOAD_FOLDER = str(directory / 'uploads')
+            UPLOAD_INCOMING_DIR = str(directory / 'incoming')
+            PAGE_CACHE_DIR = str(directory / 'page_cache')
+            TEMPLATE_CACHE_DIR = str(directory / 'jinja_cache')
+            METRICS_DIR = str(directory / 'metrics')
+            TESTING = True
+            TASK_EXECUTOR_ENABLED = False
+
+        for name, value in settings.items():
+            setattr(TestConfig, name, value)
+        app = create_app(TestConfig)
+        apps.append(app)
+        if bootstrap:
+            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+            with app.app_context():
+                db.create_all()
+        return app
+
+    yield factory
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+@contextmanager
+def _record_statements(engine, *verbs):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not verbs or statement.lstrip().upper().startswith(verbs):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+@pytest.fixture
+def record_statements():
+    """record_statements(engine, *verbs): collects the (statement, parameters)
+    run on engine, or only those starting with one of verbs ('SELECT', ...)"""
+    return _record_statements
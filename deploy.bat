@@ -33,9 +33,13 @@ REM Create uploads directory if it doesn't exist
 echo 📁 Creating uploads directory...
 if not exist "app\static\uploads" mkdir app\static\uploads
 
+REM Build the fingerprinted CSS/JS
+echo 📦 Building static assets...
+flask --app wsgi build-assets
+
 REM Initialize database
 echo 🗄️  Setting up database...
-python -c "from app import create_app, db; from app.models import Admin; app = create_app(); app.app_context().push(); db.create_all(); admin = Admin.query.filter_by(username='admin').first(); print('Admin already exists' if admin else 'Creating admin...'); admin = admin or Admin(username='admin'); admin.set_password('admin123') if not Admin.query.filter_by(username='admin').first() else None; db.session.add(admin) if not Admin.query.filter_by(username='admin').first() else None; db.session.commit(); print('✅ Database setup complete')"
+flask --app wsgi bootstrap
 
 REM Run basic tests
 echo 🧪 Running basic tests...
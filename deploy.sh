@@ -38,25 +38,13 @@ mkdir -p app/static/uploads
 echo "🔐 Setting permissions..."
 chmod 755 app/static/uploads
 
+# Build the fingerprinted CSS/JS
+echo "📦 Building static assets..."
+flask --app wsgi build-assets
+
 # Initialize database
 echo "🗄️  Setting up database..."
-python -c "
-from app import create_app, db
-from app.models import Admin
-app = create_app()
-with app.app_context():
-    db.create_all()
-    # Check if admin exists
-    admin = Admin.query.filter_by(username='admin').first()
-    if not admin:
-        admin = Admin(username='admin')
-        admin.set_password('admin123')
-        db.session.add(admin)
-        db.session.commit()
-        print('✅ Default admin created: admin/admin123')
-    else:
-        print('ℹ️  Admin user already exists')
-"
+flask --app wsgi bootstrap
 
 # Run basic tests
 echo "🧪 Running basic tests..."
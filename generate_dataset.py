@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Fill a database with a synthetic, production-sized catalog for profiling:
+Arabic product names and descriptions, reviews with a J-shaped rating
+distribution (a few products collect most of them), testimonials and
+placeholder images.
+
+    python generate_dataset.py --products 10000 --reviews 1000000 --database /tmp/big.sqlite3
+
+With --database the placeholder images go to a folder next to the file
+(/tmp/big_uploads above) instead of the site's upload folder. Rows go in through executemany, one transaction per --chunk rows. The
+output is the same for the same --seed. Rating aggregates are rebuilt once
+at the end instead of by the per-review trigger. Do not point it at a
+database the site is serving.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from PIL import Image, ImageDraw
+from sqlalchemy import text
+from app import create_app, db
+from app.images import generate_variants, variant_files
+from app.models import RATING_TRIGGERS
+from app.page_cache import invalidate_pages
+from app.search import SEARCH_TABLE
+from config import Config
+from reconcile_ratings import reconcile_ratings
+
+# category -> product types made in it
+CATALOG = {
+    'مجوهرات': ['قلادة', 'أقراط', 'سوار', 'خاتم', 'دبوس', 'خلخال'],
+    'ديكور': ['مزهرية', 'صحن ديكور', 'تمثال صغير', 'إطار صور', 'شمعدان', 'ساعة حائط'],
+    'إكسسوارات': ['سلسلة مفاتيح', 'مشبك شعر', 'حامل جوال', 'فاصل كتب', 'مغناطيس ثلاجة'],
+    'هدايا': ['صندوق هدايا', 'مجسم تذكاري', 'بطاقة معايدة', 'علبة مجوهرات'],
+    'أواني': ['كوب', 'فنجان قهوة', 'طبق تقديم', 'وعاء', 'إبريق'],
+    'ألعاب': ['دمية', 'مجسم حيوان', 'لعبة تعليمية', 'مجموعة شخصيات'],
+}
+MATERIALS = ['من طين البوليمر', 'من الصلصال', 'فخارية', 'مزججة', 'مطلية يدوياً', 'بتصميم تراثي']
+COLORS = ['زرقاء', 'خضراء', 'وردية', 'ذهبية', 'بيضاء', 'سوداء', 'ملونة', 'بنفسجية', 'بلون التراكوتا']
+SIZES = ['صغيرة', 'متوسطة', 'كبيرة']
+DESCRIPTION_PARTS = [
+    'مصنوعة يدوياً بعناية', 'تصميم فريد لا يتكرر', 'مناسبة كهدية مميزة', 'ألوان ثابتة لا تبهت',
+    'خفيفة الوزن ومتينة', 'يمكن تخصيص الاسم أو اللون عند الطلب', 'مغلفة بطبقة حماية لامعة',
+    'تضفي لمسة دافئة على المكان', 'مستوحاة من الفن الشرقي', 'تصل في علبة هدية أنيقة',
+]
+
+FIRST_NAMES = ['محمد', 'أحمد', 'فاطمة', 'مريم', 'نور', 'سارة', 'ليلى', 'يوسف', 'عمر', 'هدى',
+               'خديجة', 'علي', 'ريم', 'آية', 'منى', 'حسن', 'دينا', 'ياسمين', 'كريم', 'سلمى']
+LAST_NAMES = ['السيد', 'المصري', 'عبد الله', 'إبراهيم', 'حسين', 'الشريف', 'النجار', 'سالم', 'فؤاد', 'منصور']
+CUSTOMER_TITLES = ['عميلة مميزة', 'عميل دائم', 'مصممة ديكور', 'صاحبة متجر', 'أم لثلاثة أطفال', None]
+
+# Review text by star rating
+REVIEW_PHRASES = {
+    1: ['للأسف وصل المنتج مكسوراً', 'الجودة أقل بكثير من الصور', 'تأخر التوصيل كثيراً', 'لا أنصح به'],
+    2: ['المنتج مقبول لكن السعر مرتفع', 'اللون مختلف عن الصورة', 'التغليف كان ضعيفاً', 'توقعت أفضل من ذلك'],
+    3: ['منتج جيد بشكل عام', 'الشكل جميل لكن الحجم أصغر من المتوقع', 'جودة متوسطة', 'لا بأس به'],
+    4: ['منتج جميل جداً', 'التوصيل سريع والتغليف ممتاز', 'الألوان رائعة', 'سأطلب مرة أخرى'],
+    5: ['رائع جداً وأنصح به بشدة', 'أجمل هدية اشتريتها', 'إتقان وجودة عالية', 'شكراً على الذوق الرفيع',
+        'تماماً كما في الصور بل أجمل', 'تعامل راقٍ وسرعة في الرد'],
+}
+
+# Share of each star rating (1..5) in a product's reviews. Online ratings are J-shaped:
+# mostly fives, some ones; each product gets one of these profiles.
+RATING_PROFILES = [
+    [2, 2, 5, 18, 73],   # loved
+    [8, 6, 12, 26, 48],  # typical
+    [30, 14, 16, 18, 22],  # disappointing
+]
+PROFILE_WEIGHTS = [30, 55, 15]
+
+PLACEHOLDER_COLORS = ['#c96f53', '#e0b084', '#7ba3a8', '#9c7bb5', '#d4a5a5', '#8fae6b', '#e6c86e', '#6f8fc9']
+
+DATASET_SPAN = timedelta(days=3 * 365)
+
+def make_app(database):
+    if not database:
+        return create_app()
+
+    path = os.path.abspath(database)
+    stem = os.path.splitext(path)[0]
+
+    class DatasetConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+        # Keep the throwaway catalog's files away from the ones the site serves
+        UPLOAD_FOLDER = f"{stem}_uploads"
+        PAGE_CACHE_DIR = f"{stem}_page_cache"
+        TASK_EXECUTOR_ENABLED = False
+
+    return create_app(DatasetConfig)
+
+def remove_stored_files(upload_folder):
+    """Unlink every file the StoredFile table knows about, before it is dropped"""
+    if not db.inspect(db.engine).has_table('stored_file'):
+        return
+    rows = db.session.execute(text('SELECT filename, variants FROM stored_file')).all()
+    for filename, variants in rows:
+        for name in [filename] + variant_files(variants):
+            path = os.path.join(upload_folder, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+def timestamps(count, rng, start):
+    """`count` ascending timestamps spread over DATASET_SPAN, in SQLAlchemy's SQLite text format"""
+    step = DATASET_SPAN / max(count, 1)
+    return [(start + step * i + timedelta(seconds=rng.random() * 60)).isoformat(' ', 'microseconds')
+            for i in range(count)]
+
+def make_placeholder_images(count, rng, upload_folder):
+    """Write `count` content-addressed placeholder JPEGs (with variants); returns [(filename, variants, size)]"""
+    images = []
+    for i in range(count):
+        image = Image.new('RGB', (1200, 1200), rng.choice(PLACEHOLDER_COLORS))
+        draw = ImageDraw.Draw(image)
+        for _ in range(6):
+            x, y, radius = rng.randint(0, 1200), rng.randint(0, 1200), rng.randint(80, 320)
+            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=rng.choice(PLACEHOLDER_COLORS))
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=80)
+        data = buffer.getvalue()
+
+        content_hash = hashlib.sha256(data).hexdigest()
+        filename = f'{content_hash}.jpg'
+        path = os.path.join(upload_folder, filename)
+        if not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.write(data)
+        variants = generate_variants(upload_folder, filename)
+        images.append((filename, json.dumps(variants) if variants else None, len(data)))
+    return images
+
+def insert_chunks(cursor, connection, sql, rows, chunk_size):
+    """executemany `rows` (an iterable of tuples), committing every `chunk_size` rows"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            cursor.executemany(sql, chunk)
+            connection.commit()
+            chunk = []
+    if chunk:
+        cursor.executemany(sql, chunk)
+        connection.commit()
+
+def product_rows(count, rng, images, start, first_id):
+    created = timestamps(count, rng, start)
+    categories = list(CATALOG)
+    for i in range(count):
+        category = rng.choice(categories)
+        name = f"{rng.choice(CATALOG[category])} {rng.choice(MATERIALS)} {rng.choice(COLORS)}"
+        if rng.random() < 0.3:
+            name += f" {rng.choice(SIZES)}"
+        description = '، '.join(rng.sample(DESCRIPTION_PARTS, rng.randint(2, 4))) + '.'
+        image = rng.choice(images) if images and rng.random() < 0.8 else (None, None, 0)
+        yield (first_id + i, name, description, round(rng.uniform(25, 1500) / 5) * 5, category,
+               image[0], image[1], created[i], created[i], int(rng.random() < 0.93), int(rng.random() < 0.03))
+
+def review_rows(count, rng, product_ids, images, start, chunk_size):
+    # Popularity follows a power law: a few products collect most reviews
+    popularity = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(product_ids))))
+    shuffled = product_ids[:]
+    rng.shuffle(shuffled)
+    profile_of = {product_id: rng.choices(range(len(RATING_PROFILES)), PROFILE_WEIGHTS)[0] for product_id in shuffled}
+    phrases = {rating: [f'{a}، {b}' for a in options for b in options if a != b] + options
+               for rating, options in REVIEW_PHRASES.items()}
+    names = [f'{first} {last}' for first in FIRST_NAMES for last in LAST_NAMES]
+    created = timestamps(count, rng, start)
+
+    for offset in range(0, count, chunk_size):
+        size = min(chunk_size, count - offset)
+        # Draw a chunk's products and per-profile ratings at once; much faster than per row
+        chunk_products = rng.choices(shuffled, cum_weights=popularity, k=size) if shuffled else [None] * size
+        ratings = [rng.choices(range(1, 6), weights, k=size) for weights in RATING_PROFILES]
+        for i in range(size):
+            product_id = chunk_products[i]
+            rating = ratings[profile_of[product_id] if product_id else 1][i]
+            image = rng.choice(images) if images and rng.random() < 0.05 else (None, None, 0)
+            yield (rng.choice(names), rng.choice(phrases[rating]), rating, image[0], image[1], product_id,
+                   created[offset + i], int(rng.random() < 0.85), int(rating == 5 and rng.random() < 0.01))
+
+def testimonial_rows(count, rng, images, start):
+    created = timestamps(count, rng, start)
+    for i in range(count):
+        image = rng.choice(images) if images and rng.random() < 0.5 else (None, None, 0)
+        rating = rng.choices([3, 4, 5], [1, 3, 10])[0]
+        yield (f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}', rng.choice(CUSTOMER_TITLES),
+               '، '.join(rng.sample(REVIEW_PHRASES[rating], 2)), rating, image[0], image[1],
+               int(rng.random() < 0.2), i, created[i], int(rng.random() < 0.9))
+
+def generate_dataset(app=None, products=10000, reviews=100000, testimonials=100, images=12,
+                     seed=1, chunk_size=50000, reset=False):
+    """Append (or with reset=True, replace) a synthetic catalog; returns the row counts written"""
+    app = app or create_app()
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+
+    with app.app_context():
+        if reset:
+            remove_stored_files(app.config['UPLOAD_FOLDER'])
+            db.drop_all()
+            # Created by a Product after_create hook, so drop_all does not know about it
+            db.session.execute(text(f'DROP TABLE IF EXISTS {SEARCH_TABLE}'))
+            db.session.commit()
+        db.create_all()
+
+        started = time.perf_counter()
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        placeholder = make_placeholder_images(images, rng, app.config['UPLOAD_FOLDER'])
+        print(f"🖼️  {len(placeholder)} placeholder images")
+
+        raw = db.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            # Bulk load: no fsync per chunk, and the aggregates are rebuilt once at the end
+            cursor.execute('PRAGMA synchronous = OFF')
+            for name in RATING_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            raw.commit()
+
+            first_id = (cursor.execute('SELECT max(id) FROM product').fetchone()[0] or 0) + 1
+            insert_chunks(cursor, raw, """
+                INSERT INTO product (id, name, description, price, category, image_filename, image_variants,
+                                     created_at, updated_at, is_active, featured)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                product_rows(products, rng, placeholder, start, first_id), chunk_size)
+            print(f"🏺 {products} products ({time.perf_counter() - started:.1f}s)")
+
+            product_ids = list(range(first_id, first_id + products))
+            insert_chunks(cursor, raw, """
+                INSERT INTO review (customer_name, comment, rating, image_filename, image_variants, product_id,
+                                    created_at, is_approved, is_featured)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                review_rows(reviews, rng, product_ids, placeholder, start, chunk_size), chunk_size)
+            print(f"⭐ {reviews} reviews ({time.perf_counter() - started:.1f}s)")
+
+            insert_chunks(cursor, raw, """
+                INSERT INTO testimonial (customer_name, customer_title, testimonial_text, rating, image_filename,
+                                         image_variants, is_featured, display_order, created_at, is_active)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                testimonial_rows(testimonials, rng, placeholder, start), chunk_size)
+
+            # One StoredFile per placeholder, counting every row that now points at it
+            for filename, variants, size in placeholder:
+                references = sum(cursor.execute(f'SELECT count(*) FROM {table} WHERE image_filename = ?',
+                                                (filename,)).fetchone()[0]
+                                 for table in ('product', 'review', 'testimonial'))
+                cursor.execute("""
+                    INSERT INTO stored_file (content_hash, filename, variants, size, ref_count, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (filename) DO UPDATE SET ref_count = excluded.ref_count""",
+                    (filename[:-4], filename, variants, size, references, start.isoformat(' ', 'microseconds')))
+            raw.commit()
+        finally:
+            for ddl in RATING_TRIGGERS.values():
+                raw.cursor().execute(ddl)
+            raw.commit()
+            raw.cursor().execute(f"PRAGMA synchronous = {app.config.get('SQLITE_PRAGMAS', {}).get('synchronous', 'FULL')}")
+            raw.close()
+
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        invalidate_pages('products', 'reviews', 'testimonials')
+
+    reconcile_ratings(app)
+    print(f"✅ Dataset ready in {time.perf_counter() - started:.1f}s")
+    return {'products': products, 'reviews': reviews, 'testimonials': testimonials, 'images': len(placeholder)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=10000)
+    parser.add_argument('--reviews', type=int, default=100000)
+    parser.add_argument('--testimonials', type=int, default=100)
+    parser.add_argument('--images', type=int, default=12, help='distinct placeholder images shared by the rows')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--chunk', type=int, default=50000, help='rows per executemany/transaction')
+    parser.add_argument('--database', metavar='PATH', help='SQLite file to fill (default: the configured database)')
+    parser.add_argument('--reset', action='store_true', help='drop every table first')
+    args = parser.parse_args(argv)
+
+    generate_dataset(make_app(args.database), products=args.products, reviews=args.reviews,
+                     testimonials=args.testimonials, images=args.images, seed=args.seed,
+                     chunk_size=args.chunk, reset=args.reset)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
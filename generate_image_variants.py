@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Backfill responsive image variants for uploads that predate them.
+Safe to run repeatedly: only rows without variants are processed.
+"""
+
+import json
+import os
+import sys
+from app import create_app, db
+from app.images import generate_variants
+from app.page_cache import invalidate_pages
+from app.models import StoredFile
+from app.uploads import IMAGE_FIELDS
+
+def backfill_variants(force=False, app=None):
+    """Generate variants for every stored image that has none; returns the counts"""
+    app = app or create_app()
+
+    with app.app_context():
+        upload_folder = app.config['UPLOAD_FOLDER']
+        generated = skipped = missing = 0
+
+        for model, filename_field, variants_field in IMAGE_FIELDS:
+            filename_column = getattr(model, filename_field)
+            query = model.query.filter(filename_column.isnot(None), filename_column != '')
+            if not force:
+                query = query.filter(getattr(model, variants_field).is_(None))
+
+            for row in query.all():
+                filename = getattr(row, filename_field)
+                if not os.path.exists(os.path.join(upload_folder, filename)):
+                    print(f"⚠️  Missing file for {row!r}: {filename}")
+                    missing += 1
+                    continue
+
+                variants = generate_variants(upload_folder, filename)
+                if variants is None:
+                    print(f"⚠️  Not an image, skipped: {filename}")
+                    skipped += 1
+                    continue
+
+                setattr(row, variants_field, json.dumps(variants))
+                StoredFile.query.filter_by(filename=filename).update({'variants': json.dumps(variants)})
+                generated += 1
+                print(f"✅ {filename}: {', '.join(variants)}")
+
+            db.session.commit()
+
+        # Cached pages still point at the full-size originals
+        invalidate_pages('products', 'reviews', 'testimonials', 'settings')
+        print(f"\n🖼️  Generated variants for {generated} images ({skipped} skipped, {missing} missing)")
+        return {'generated': generated, 'skipped': skipped, 'missing': missing}
+
+if __name__ == '__main__':
+    backfill_variants(force='--force' in sys.argv)
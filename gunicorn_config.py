@@ -27,6 +27,17 @@ user = None
 group = None
 tmp_upload_dir = None
 
+# Server hooks
+def post_worker_init(worker):
+    # Compile the templates before this worker accepts its first request
+    app = worker.wsgi
+    if app.config.get('TEMPLATE_WARMUP'):
+        import time
+        from app.templating import warm_templates
+        started = time.perf_counter()
+        names = warm_templates(app)
+        worker.log.info("Warmed %d templates in %.0fms", len(names), (time.perf_counter() - started) * 1000)
+
 # SSL (uncomment and configure for HTTPS)
 # keyfile = "/path/to/keyfile"
 # certfile = "/path/to/certfile"
\ No newline at end of file
@@ -8,7 +8,8 @@ import os
 import sqlite3
 import sys
 from app import create_app, db
-from app.models import Product, Review, Admin, SiteSettings, Testimonial
+from app.models import Product, Review, Admin, SiteSettings, Testimonial, RATING_TRIGGERS
+from app.search import SEARCH_DDL, SEARCH_TABLE, REBUILD_SQL
 
 def backup_database():
     """Create a backup of the existing database"""
@@ -33,6 +34,23 @@ def check_and_add_columns():
             print("Adding 'featured' column to Product table...")
             cursor.execute("ALTER TABLE product ADD COLUMN featured BOOLEAN DEFAULT 0")
         
+        if 'updated_at' not in columns:
+            print("Adding 'updated_at' column to Product table...")
+            cursor.execute("ALTER TABLE product ADD COLUMN updated_at DATETIME")
+            cursor.execute("UPDATE product SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+        
+        if 'image_variants' not in columns:
+            print("Adding 'image_variants' column to Product table...")
+            cursor.execute("ALTER TABLE product ADD COLUMN image_variants TEXT")
+        
+        if 'rating_sum' not in columns:
+            print("Adding rating aggregate columns to Product table...")
+            for column in RATING_COLUMNS:
+                cursor.execute(f"ALTER TABLE product ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+            backfill_ratings = True
+        else:
+            backfill_ratings = False
+        
         # Check if Review table needs updates
         cursor.execute("PRAGMA table_info(review)")
         columns = [row[1] for row in cursor.fetchall()]
@@ -49,6 +67,21 @@ def check_and_add_columns():
             print("Adding 'is_featured' column to Review table...")
             cursor.execute("ALTER TABLE review ADD COLUMN is_featured BOOLEAN DEFAULT 0")
         
+        if 'image_variants' not in columns:
+            print("Adding 'image_variants' column to Review table...")
+            cursor.execute("ALTER TABLE review ADD COLUMN image_variants TEXT")
+        
+        if backfill_ratings:
+            # From existing approved reviews; the triggers keep them current afterwards
+            print("Backfilling product rating aggregates...")
+            counted = "FROM review WHERE review.product_id = product.id AND is_approved = 1 AND rating BETWEEN 1 AND 5"
+            cursor.execute(f"""
+                UPDATE product SET
+                    rating_sum = (SELECT COALESCE(SUM(rating), 0) {counted}),
+                    rating_count = (SELECT COUNT(*) {counted}),
+                    {', '.join(f"rating_hist_{i} = (SELECT COUNT(*) {counted} AND rating = {i})" for i in range(1, 6))}
+            """)
+        
         # Check if SiteSettings table exists
         cursor.execute("""
             SELECT name FROM sqlite_master 
@@ -63,7 +96,9 @@ def check_and_add_columns():
                     site_name VARCHAR(100) DEFAULT 'أعمالي بالطين',
                     site_description TEXT DEFAULT 'متجر متخصص في صناعة منتجات طين البوليمر اليدوية الفريدة',
                     logo_filename VARCHAR(200),
+                    logo_variants TEXT,
                     hero_image_filename VARCHAR(200),
+                    hero_image_variants TEXT,
                     background_color VARCHAR(7) DEFAULT '#6366f1',
                     secondary_color VARCHAR(7) DEFAULT '#8b5cf6',
                     accent_color VARCHAR(7) DEFAULT '#10b981',
@@ -104,6 +139,7 @@ def check_and_add_columns():
                     testimonial_text TEXT NOT NULL,
                     rating INTEGER DEFAULT 5,
                     image_filename VARCHAR(200),
+                    image_variants TEXT,
                     is_featured BOOLEAN DEFAULT 0,
                     display_order INTEGER DEFAULT 0,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -111,6 +147,45 @@ def check_and_add_columns():
                 )
             """)
         
+        # Content-addressed upload registry (see app/uploads.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stored_file (
+                id INTEGER PRIMARY KEY,
+                content_hash VARCHAR(64) NOT NULL UNIQUE,
+                filename VARCHAR(200) NOT NULL UNIQUE,
+                variants TEXT,
+                size INTEGER,
+                ref_count INTEGER NOT NULL DEFAULT 0,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Durable queue for the in-process task runner (see app/tasks.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS background_task (
+                id INTEGER PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                payload TEXT,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                last_error TEXT,
+                run_after DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                started_at DATETIME,
+                finished_at DATETIME,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Columns added to existing tables after they were first created
+        for table, column in [('site_settings', 'logo_variants'),
+                              ('site_settings', 'hero_image_variants'),
+                              ('testimonial', 'image_variants')]:
+            cursor.execute(f"PRAGMA table_info({table})")
+            if column not in [row[1] for row in cursor.fetchall()]:
+                print(f"Adding '{column}' column to {table} table...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+        
         conn.commit()
         print("✅ Database migration completed successfully!")
         
@@ -123,6 +198,96 @@ def check_and_add_columns():
     
     return True
 
+# Indexes backing the public storefront queries (see __table_args__ in app/models.py)
+INDEXES = [
+    ("ix_product_active_category_created", "product", "is_active, category, created_at"),
+    ("ix_product_active_created", "product", "is_active, created_at"),
+    ("ix_review_approved_created", "review", "is_approved, created_at"),
+    ("ix_review_product_id", "review", "product_id"),
+    ("ix_product_updated_at", "product", "updated_at"),
+    ("ix_product_created_at", "product", "created_at"),
+    ("ix_review_created_at", "review", "created_at"),
+    ("ix_background_task_status_run_after", "background_task", "status, run_after"),
+]
+
+RATING_COLUMNS = ['rating_sum', 'rating_count'] + [f'rating_hist_{i}' for i in range(1, 6)]
+
+def create_triggers():
+    """Create the triggers that maintain product rating aggregates (safe to run repeatedly)"""
+    conn = sqlite3.connect('db.sqlite3')
+    cursor = conn.cursor()
+    
+    try:
+        for name, ddl in RATING_TRIGGERS.items():
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='trigger' AND name=?", (name,))
+            if not cursor.fetchone():
+                print(f"Creating trigger '{name}'...")
+                cursor.execute(ddl)
+        
+        conn.commit()
+        print("✅ Triggers are up to date!")
+        
+    except Exception as e:
+        print(f"❌ Error creating triggers: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+    
+    return True
+
+def create_search_index():
+    """Create the product search table and triggers, indexing existing products once"""
+    conn = sqlite3.connect('db.sqlite3')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name=?", (SEARCH_TABLE,))
+        is_new = cursor.fetchone() is None
+        
+        for name, ddl in SEARCH_DDL.items():
+            cursor.execute(ddl)
+        if is_new:
+            print("Indexing existing products for search...")
+            for statement in REBUILD_SQL:
+                cursor.execute(statement)
+        
+        conn.commit()
+        print("✅ Search index is up to date!")
+        
+    except Exception as e:
+        print(f"❌ Error creating search index: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+    
+    return True
+
+def create_indexes():
+    """Create missing indexes on an existing database (safe to run repeatedly)"""
+    conn = sqlite3.connect('db.sqlite3')
+    cursor = conn.cursor()
+    
+    try:
+        for name, table, columns in INDEXES:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name=?", (name,))
+            if not cursor.fetchone():
+                print(f"Creating index '{name}' on {table}({columns})...")
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        
+        conn.commit()
+        print("✅ Indexes are up to date!")
+        
+    except Exception as e:
+        print(f"❌ Error creating indexes: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+    
+    return True
+
 def create_fresh_database():
     """Create a completely fresh database with all tables"""
     print("Creating fresh database with all tables...")
@@ -162,7 +327,8 @@ def main():
         if choice == '1':
             print("\n🔄 Attempting to migrate existing database...")
             backup_database()
-            success = check_and_add_columns()
+            success = (check_and_add_columns() and create_indexes() and create_triggers()
+                       and create_search_index())
             
             if not success:
                 print("\n❌ Migration failed. Creating fresh database...")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Rebuild the per-product rating aggregates (rating_sum, rating_count and
+the 1-5 star histogram) from the approved reviews.
+The review triggers keep them current; run this after restoring or
+importing data, or to check for drift. Only products that differ are written.
+"""
+
+from datetime import datetime
+from sqlalchemy import case, func
+from app import create_app, db
+from app.models import Product, Review
+from app.page_cache import invalidate_pages
+
+AGGREGATE_FIELDS = ['rating_sum', 'rating_count'] + [f'rating_hist_{i}' for i in range(1, 6)]
+
+def compute_ratings():
+    """Return {product_id: aggregate values} computed from the review table"""
+    rows = db.session.query(
+        Review.product_id,
+        func.sum(Review.rating),
+        func.count(Review.id),
+        *[func.sum(case((Review.rating == i, 1), else_=0)) for i in range(1, 6)],
+    ).filter(Review.is_approved == True, Review.product_id.isnot(None), Review.rating.between(1, 5)) \
+        .group_by(Review.product_id)
+    return {row[0]: tuple(row[1:]) for row in rows}
+
+def reconcile_ratings(app=None):
+    """Correct every product whose stored aggregates have drifted; returns how many"""
+    app = app or create_app()
+
+    with app.app_context():
+        expected = compute_ratings()
+        empty = (0,) * len(AGGREGATE_FIELDS)
+        now = datetime.utcnow()
+
+        fixes = []
+        checked = 0
+        stored = db.session.query(Product.id, *[getattr(Product, field) for field in AGGREGATE_FIELDS])
+        for product_id, *values in stored:
+            checked += 1
+            correct = expected.get(product_id, empty)
+            if tuple(values) != correct:
+                fixes.append(dict(zip(AGGREGATE_FIELDS, correct), id=product_id, updated_at=now))
+
+        if fixes:
+            db.session.bulk_update_mappings(Product, fixes)
+            db.session.commit()
+            invalidate_pages('products')
+
+        print(f"⭐ Checked {checked} products, corrected {len(fixes)}")
+        return len(fixes)
+
+if __name__ == '__main__':
+    reconcile_ratings()
@@ -1,19 +1,13 @@
-from app import create_app, db
-from app.models import Product, Review, Admin
+from app import create_app, query_budget
+from app.cli import bootstrap
 
 app = create_app()
 
-with app.app_context():
-    db.create_all()
-    
-    # Create default admin if doesn't exist
-    admin = Admin.query.filter_by(username='admin').first()
-    if not admin:
-        admin = Admin(username='admin')
-        admin.set_password('admin123')  # Change this password!
-        db.session.add(admin)
-        db.session.commit()
-        print("Default admin created: username=admin, password=admin123")
-
 if __name__ == '__main__':
+    # Development only; deployments run `flask --app wsgi bootstrap` once instead
+    if bootstrap(app) is not None:
+        print("Default admin created: username=admin, password=admin123")
+    
+    # Development server: X-Query-Count/-Budget/-N-Plus-One headers, and a warning log line for N+1s
+    query_budget.enable(app, 'report')
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Check that the admin list pages are paginated and issue the same number
+of queries however many rows the tables hold (no N+1 on review.product)
+"""
+
+import pytest
+from app import db
+from app.models import Admin, Product, Review, Testimonial
+
+ADMIN_LIST_URLS = [
+    '/admin/products',
+    '/admin/products?status=active&category=ديكور&sort=price_high',
+    '/admin/reviews',
+    '/admin/reviews?status=approved&rating=5&sort=rating_high',
+    '/admin/reviews?product_id=1',
+    '/admin/testimonials?status=active&sort=newest',
+]
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(STATS_CACHE_TTL=0, ADMIN_PER_PAGE=10)
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+    return app
+
+def add_rows(app, count):
+    """Add `count` products, each with a review, and `count` testimonials"""
+    with app.app_context():
+        for i in range(count):
+            product = Product(name=f"منتج {i}", price=100 + i, category="مجوهرات" if i % 2 else "ديكور")
+            db.session.add(product)
+            db.session.flush()
+            db.session.add(Review(customer_name=f"عميل {i}", comment="رائع", rating=i % 5 + 1,
+                                  product_id=product.id if i % 3 else 1, is_approved=i % 2 == 0))
+            db.session.add(Testimonial(customer_name=f"عميل {i}", testimonial_text="شكراً", rating=5))
+        db.session.commit()
+
+def test_admin_lists_query_count(app, record_statements):
+    client = app.test_client()
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    with app.app_context():
+        engine = db.engine
+
+    def count_queries(url):
+        with record_statements(engine) as statements:
+            response = client.get(url)
+        assert response.status_code == 200, f"{url} returned {response.status_code}"
+        return len(statements)
+
+    add_rows(app, 5)
+    for url in ADMIN_LIST_URLS:
+        # Warm up: the first request also pays for connection setup
+        count_queries(url)
+    small = {url: count_queries(url) for url in ADMIN_LIST_URLS}
+    add_rows(app, 60)
+    large = {url: count_queries(url) for url in ADMIN_LIST_URLS}
+
+    for url in ADMIN_LIST_URLS:
+        assert small[url] == large[url], f"{url}: {small[url]} queries with 5 rows, {large[url]} with 65"
+        print(f"✅ {url}: {large[url]} queries")
+
+    response = client.get('/admin/reviews?page=2')
+    assert 'صفحة 2 من 7' in response.get_data(as_text=True)
+    print("✅ Admin lists are paginated")
+
+def test_category_filter_lists_inactive_categories(app):
+    with app.app_context():
+        db.session.add(Product(name="مزهرية", price=50, category="ديكور"))
+        db.session.add(Product(name="سوار", price=80, category="مجوهرات", is_active=False))
+        db.session.commit()
+    client = app.test_client()
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+
+    page = client.get('/admin/products').get_data(as_text=True)
+    assert '<option value="مجوهرات"' in page and '<option value="ديكور"' in page
+    page = client.get('/admin/products?category=مجوهرات').get_data(as_text=True)
+    assert '<option value="مجوهرات" selected' in page and 'سوار' in page and 'مزهرية' not in page
+    print("✅ Categories with only inactive products can still be filtered on")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Check the read-only catalog API: sparse fieldsets, cursor pagination,
+plain-row serialization, ETags and the server-side cache
+"""
+
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import Product, Review
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        for i in range(7):
+            db.session.add(Product(name=f"منتج {i}", description="وصف", price=10 + i,
+                                   category="ديكور" if i % 2 else "مجوهرات", is_active=i != 6))
+        db.session.flush()
+        for i in range(3):
+            db.session.add(Review(customer_name=f"عميل {i}", comment="رائع", rating=4, product_id=1, is_approved=True))
+        db.session.add(Review(customer_name="مخفي", comment="بانتظار الموافقة", rating=1, product_id=1))
+        db.session.commit()
+    return app
+
+def test_catalog_api(app):
+    client = app.test_client()
+
+    loaded = []
+    listener = lambda target, context: loaded.append(target)
+    event.listen(Product, 'load', listener)
+    try:
+        # Walk every page with a sparse fieldset
+        names, url = [], '/api/v1/products?limit=4&fields=id,name,rating'
+        while url:
+            body = client.get(url).get_json()
+            assert all(set(item) == {'id', 'name', 'rating'} for item in body['data'])
+            names += [item['name'] for item in body['data']]
+            url = body['next']
+    finally:
+        event.remove(Product, 'load', listener)
+    assert names == [f"منتج {i}" for i in range(5, -1, -1)], names
+    assert not loaded, "API should serialize plain rows, not ORM objects"
+    print("✅ Cursor pagination with sparse fieldsets over plain rows")
+
+    product = client.get('/api/v1/products/1').get_json()['data']
+    assert product['rating'] == {'average': 4.0, 'count': 3}
+    assert client.get('/api/v1/products/7').status_code == 404
+    assert client.get('/api/v1/products?fields=secret').get_json()['error'].startswith('Unknown fields')
+    assert client.get('/api/v1/products?cursor=garbage').status_code == 400
+    print("✅ Single product, 404 and 400 errors")
+
+    categories = client.get('/api/v1/categories').get_json()['data']
+    assert categories == [{'name': 'ديكور', 'product_count': 3}, {'name': 'مجوهرات', 'product_count': 3}]
+    reviews = client.get('/api/v1/reviews?product_id=1&fields=comment').get_json()['data']
+    assert reviews == [{'comment': 'رائع'}] * 3
+    settings = client.get('/api/v1/settings').get_json()['data']
+    assert settings['site_name'] and 'maintenance_mode' not in settings
+    print("✅ Categories, approved reviews and public settings")
+
+    first = client.get('/api/v1/products?fields=id')
+    assert first.headers['X-Cache'] == 'HIT' or client.get('/api/v1/products?fields=id').headers['X-Cache'] == 'HIT'
+    etag = first.headers['ETag'].strip('"')
+    assert client.get('/api/v1/products?fields=id', headers={'If-None-Match': f'"{etag}"'}).status_code == 304
+    assert client.get('/api/v1/products/2', headers={'If-None-Match': f'"{etag}"'}).status_code == 200
+    print("✅ ETags and server-side cache")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
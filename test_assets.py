@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Check the static asset build: minifiers, fingerprinted and precompressed
+output, the manifest behind url_for('static', ...) and cache headers
+"""
+
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import pytest
+from flask import url_for
+from app.assets import AssetManifest, build_assets, minify_css, minify_js
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static')
+
+# Every line pushes a value; the minified script must print the same JSON
+JS_SAMPLE = r'''var out = [];
+var a = 5, b = 2
+var c = a
+++b
+out.push(a / b / 1, c, b)
+var re = /ab+c\/ [/]x/gi; out.push(re.source, "a // not comment", 'b /* nor */ c')
+out.push(`multi
+   line ${a + `inner ${b}`} // kept`)
+function f(x) { return /x y/.test(x) }  // trailing comment
+out.push(f('x y'), a - -b, a + +b, typeof /z/)
+var obj = {k: 1}
+/* block
+comment */ out.push(obj.k)
+;[1, 2].forEach(function (v) { out.push(v) })
+let i = 0
+i++
+out.push(i, (a)/2, [4][0]/2, a in {5: 1}, 'k' in obj)
+if (a > 1) out.push('gt'); else out.push('le')
+console.log(JSON.stringify(out))
+'''
+
+def node_output(script):
+    return subprocess.run(['node', '-e', script], check=True, capture_output=True, text=True).stdout
+
+def test_minifiers():
+    css = minify_css('''/* header */
+.a :hover , .b > .c {
+    content: "keep  /* this */ ; }";
+    width: calc(100% - 2px) ;
+    background: url( 'img/x.png' );
+}
+@media (max-width: 768px) { .d { color: red; } }
+''')
+    assert css == ('.a :hover,.b>.c{content:"keep  /* this */ ; }";width:calc(100% - 2px);'
+                   "background:url( 'img/x.png' )}@media (max-width:768px){.d{color:red}}")
+    print("✅ CSS: comments and whitespace gone, strings and calc() spacing kept")
+
+    minified = minify_js(JS_SAMPLE)
+    assert len(minified) < len(JS_SAMPLE)
+    assert '// trailing comment' not in minified and 'block\ncomment' not in minified
+    assert '"a // not comment"' in minified and '`multi\n   line ${a + `inner ${b}`} // kept`' in minified
+    if shutil.which('node'):
+        assert node_output(minified) == node_output(JS_SAMPLE)
+        for name in ('js/main.js',):
+            with open(os.path.join(STATIC_FOLDER, name), encoding='utf-8') as f:
+                source = f.read()
+            for script in (source, minify_js(source)):
+                subprocess.run(['node', '--check', '-'], input=script, text=True, check=True)
+        print("✅ JS: minified sample behaves the same under node; main.js and its build parse")
+    else:
+        print("✅ JS: comments and whitespace gone, literals kept (node not found)")
+
+def make_static(tmpdir, css='.a { color: red; }'):
+    static = os.path.join(tmpdir, 'static')
+    os.makedirs(os.path.join(static, 'css'), exist_ok=True)
+    os.makedirs(os.path.join(static, 'uploads'), exist_ok=True)
+    with open(os.path.join(static, 'css', 'site.css'), 'w') as f:
+        f.write(css + '\n.logo { background: url(../img/logo.png); }')
+    with open(os.path.join(static, 'uploads', 'skip.js'), 'w') as f:
+        f.write('var uploaded = 1;')
+    return static
+
+def test_build_assets():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        static = make_static(tmpdir)
+        report = build_assets(static)
+        assert [entry[0] for entry in report] == ['css/site.css']
+        with open(os.path.join(static, 'build', 'manifest.json')) as f:
+            manifest = json.load(f)
+        first = manifest['css/site.css']
+        assert first.startswith('build/css/site.') and first.endswith('.css')
+        with open(os.path.join(static, first)) as f:
+            built = f.read()
+        assert built == '.a{color:red}.logo{background:url(../../img/logo.png)}'
+        with gzip.open(os.path.join(static, first + '.gz'), 'rt') as f:
+            assert f.read() == built
+        print(f"✅ Built {first} with a .gz copy; uploads skipped, relative url() adjusted")
+
+        # Same content, same name; changed content, new name; the previous build is kept one deploy
+        build_assets(static)
+        assert json.load(open(os.path.join(static, 'build', 'manifest.json')))['css/site.css'] == first
+        make_static(tmpdir, css='.a { color: blue; }')
+        build_assets(static)
+        second = json.load(open(os.path.join(static, 'build', 'manifest.json')))['css/site.css']
+        assert second != first
+        assert os.path.exists(os.path.join(static, first)) and os.path.exists(os.path.join(static, second))
+        make_static(tmpdir, css='.a { color: green; }')
+        build_assets(static)
+        assert not os.path.exists(os.path.join(static, first)) and not os.path.exists(os.path.join(static, first + '.gz'))
+        assert os.path.exists(os.path.join(static, second))
+        print("✅ Fingerprint follows content; one previous build kept, older ones pruned")
+
+def test_url_for_resolves_through_manifest(make_app, tmp_path):
+    app = make_app(PAGE_CACHE_ENABLED=False)
+    client = app.test_client()
+
+    # No build yet: the sources as before
+    if not os.path.exists(os.path.join(STATIC_FOLDER, 'build', 'manifest.json')):
+        assert '/static/css/style.css' in client.get('/contact').get_data(as_text=True)
+
+    static = make_static(str(tmp_path))
+    build_assets(static)
+    app.static_folder = static
+    app.extensions['assets'] = AssetManifest(os.path.join(static, 'build', 'manifest.json'))
+    built = json.load(open(os.path.join(static, 'build', 'manifest.json')))['css/site.css']
+    with app.test_request_context():
+        assert url_for('static', filename='css/site.css') == f'/static/{built}'
+        assert url_for('static', filename='uploads/photo.jpg') == '/static/uploads/photo.jpg'
+
+    response = client.get(f'/static/{built}')
+    assert response.status_code == 200 and 'immutable' in response.headers['Cache-Control']
+    response.close()
+    response = client.get('/static/css/site.css')
+    assert 'immutable' not in (response.headers.get('Cache-Control') or '')
+    response.close()
+    print("✅ url_for('static') serves the fingerprinted file, cached as immutable")
+
+    app.debug = True
+    with app.test_request_context():
+        assert url_for('static', filename='css/site.css') == '/static/css/site.css'
+    print("✅ Debug mode serves the sources")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Run the benchmark harness on a tiny catalog: every route and admin write
+answers, the report is saved, and a run compared with itself reports no
+regressions
+"""
+
+import json
+import os
+import tempfile
+import benchmark
+
+def test_benchmark_harness():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        report_path = os.path.join(tmpdir, 'baseline.json')
+        args = ['--products', '60', '--requests', '4', '--clients', '2', '--testimonials', '5']
+
+        assert benchmark.main(args + ['--save', report_path]) == 0
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        results = report['results']['60']
+        assert set(results) == {name for name, _, _ in benchmark.ROUTES} | {name for name, *_ in benchmark.WRITES}
+        for name, stats in results.items():
+            assert stats['requests'] == 4 and not stats['errors'], (name, stats['errors'])
+            assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+        assert results['products']['queries_per_request'] >= 1
+        assert results['admin_product_create']['queries_per_request'] >= 1
+        assert 'POST main.admin_product_delete' in report['meta']['unbenchmarked']
+        print("✅ Every route and admin write benchmarked without errors")
+
+        # Only the products routes, compared with the run above; --threshold high enough to absorb noise
+        assert benchmark.main(args + ['--routes', 'products', '--baseline', report_path,
+                                      '--threshold', '100', '--fail-on-regression']) == 0
+        print("✅ Baseline comparison")
+
+def test_every_route_is_benchmarked_or_excluded(make_app):
+    assert benchmark.check_coverage(make_app()) == []
+    print("✅ Every GET and POST route is benchmarked or listed in UNBENCHMARKED")
+
+if __name__ == '__main__':
+    test_benchmark_harness()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Check the admin bulk actions: one statement per chunk of ids, and images
+of deleted rows released in a single cleanup task after the commit
+"""
+
+import os
+import pytest
+from app import db
+from app.bulk import CHUNK_SIZE, run_bulk_action
+from app.models import BackgroundTask, Product, Review, StoredFile
+from app.tasks import run_pending_tasks
+
+def test_bulk_update_is_set_based(make_app, record_statements):
+    app = make_app()
+    with app.app_context():
+        total = CHUNK_SIZE + 20
+        db.session.add_all(Review(customer_name=f"عميل {i}", comment="رائع", rating=4) for i in range(total))
+        db.session.commit()
+        ids = [review_id for review_id, in db.session.query(Review.id)]
+
+        with record_statements(db.engine, 'UPDATE', 'DELETE') as writes:
+            count = run_bulk_action(Review, 'approve', ids)
+        db.session.commit()
+        assert count == total
+        assert len(writes) == 2, f"expected one UPDATE per chunk, got {len(writes)}"
+        assert Review.query.filter_by(is_approved=True).count() == total
+        print(f"✅ Approved {total} reviews with {len(writes)} UPDATE statements")
+
+        run_bulk_action(Review, 'update_rating', ids[:10], rating=2)
+        db.session.commit()
+        assert Review.query.filter_by(rating=2).count() == 10
+        print("✅ Bulk rating update")
+
+def test_bulk_delete_releases_images_once(make_app):
+    app = make_app()
+    upload_folder = app.config['UPLOAD_FOLDER']
+    with app.app_context():
+        for name in ('shared.jpg', 'own.jpg'):
+            open(os.path.join(upload_folder, name), 'wb').close()
+        db.session.add(StoredFile(content_hash='a' * 64, filename='shared.jpg', size=0, ref_count=3))
+        db.session.add(StoredFile(content_hash='b' * 64, filename='own.jpg', size=0, ref_count=1))
+        product = Product(name="منتج", price=10, image_filename='own.jpg')
+        db.session.add(product)
+        db.session.flush()
+        db.session.add_all([
+            Review(customer_name="أ", comment="رائع", image_filename='shared.jpg', product_id=product.id),
+            Review(customer_name="ب", comment="رائع", image_filename='shared.jpg'),
+            Review(customer_name="ج", comment="رائع", image_filename='shared.jpg'),
+        ])
+        db.session.commit()
+
+        run_bulk_action(Review, 'delete', [1, 2])
+        db.session.commit()
+        assert StoredFile.query.filter_by(filename='shared.jpg').one().ref_count == 1
+        assert BackgroundTask.query.count() == 0, "shared image still referenced"
+
+        run_bulk_action(Product, 'delete', [product.id])
+        run_bulk_action(Review, 'delete', [3])
+        db.session.commit()
+        assert StoredFile.query.count() == 0
+        assert BackgroundTask.query.count() == 2
+
+        run_pending_tasks()
+        assert os.listdir(upload_folder) == []
+        print("✅ Images of deleted rows are removed after the commit")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
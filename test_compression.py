@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Check HTML minification and Accept-Encoding negotiation: pages mean the
+same after minifying, only HTML is compressed, and cached pages keep
+their compressed bytes
+"""
+
+import gzip
+import re
+import shutil
+import subprocess
+from html.parser import HTMLParser
+import pytest
+import app.compression as compression
+from app import db
+from app.compression import minify_html
+from app.models import Admin, Product, Review
+from app.page_cache import get_page_cache, invalidate_pages
+
+def make_shop_app(make_app, **settings):
+    app = make_app(**settings)
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        for i in range(12):
+            db.session.add(Product(name=f"مزهرية  فخارية {i}", description="وصف\n  طويل", price=100 + i,
+                                   category="ديكور", featured=i < 4))
+        db.session.flush()
+        db.session.add(Review(customer_name="سارة", comment="رائعة   جداً", rating=5, product_id=1, is_approved=True))
+        db.session.commit()
+    return app
+
+class Outline(HTMLParser):
+    """Tags, attributes and text of a page, with whitespace runs treated as equal"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.items, self.scripts, self._raw = [], [], None
+
+    def handle_starttag(self, tag, attrs):
+        self.items.append(('start', tag, [(name, ' '.join((value or '').split())) for name, value in attrs]))
+        if tag in ('script', 'style'):
+            self._raw = tag
+
+    def handle_endtag(self, tag):
+        self.items.append(('end', tag))
+        self._raw = None
+
+    def handle_data(self, data):
+        if self._raw == 'script':
+            self.scripts.append(data)
+        elif self._raw is None and data.split():
+            self.items.append(('text', ' '.join(data.split())))
+
+def outline(html):
+    parser = Outline()
+    parser.feed(html)
+    return parser
+
+def test_minify_html():
+    html = '''<!DOCTYPE html>
+<html>
+  <!-- navigation -->
+  <body>
+      <p class="lead">
+          مرحبا   بكم <b>هنا</b>
+      </p>
+      <pre>
+  keep   this
+      </pre>
+      <textarea name="notes">
+  and   this</textarea>
+      <script>
+          // comment
+          var greeting = "hello   world";
+      </script>
+      <script type="application/ld+json">{ "name":  "x" }</script>
+  </body>
+</html>'''
+    minified = minify_html(html)
+    assert '<!-- navigation -->' not in minified and '  <body>' not in minified
+    assert 'مرحبا   بكم <b>هنا</b>' in minified  # spacing inside a line is kept
+    assert '<pre>\n  keep   this\n      </pre>' in minified
+    assert '<textarea name="notes">\n  and   this</textarea>' in minified
+    assert '<script>var greeting="hello   world";</script>' in minified
+    assert '{ "name":  "x" }' in minified
+    print(f"✅ Minified {len(html)} → {len(minified)} characters; pre, textarea and JSON untouched")
+
+def test_pages_mean_the_same_after_minifying(make_app):
+    plain = make_shop_app(make_app, HTML_MINIFY=False, PAGE_CACHE_ENABLED=False)
+    minified = make_shop_app(make_app, PAGE_CACHE_ENABLED=False)
+    public = ['/', '/products', '/reviews', '/contact', '/custom-order', '/search?q=مزهرية', '/admin/login']
+    admin = ['/admin', '/admin/products', '/admin/products/1/edit', '/admin/reviews', '/admin/testimonials',
+             '/admin/settings', '/admin/analytics']
+    pages = public + admin
+    clients = {}
+    for name, app in (('plain', plain), ('minified', minified)):
+        clients[name, 'public'] = app.test_client()
+        clients[name, 'admin'] = app.test_client()
+        clients[name, 'admin'].post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+
+    saved = 0
+    for url in pages:
+        audience = 'admin' if url in admin else 'public'
+        before = clients['plain', audience].get(url, headers={'Accept-Encoding': 'identity'})
+        after = clients['minified', audience].get(url, headers={'Accept-Encoding': 'identity'})
+        assert before.status_code == after.status_code == 200, url
+        before, after = before.get_data(as_text=True), after.get_data(as_text=True)
+        assert outline(after).items == outline(before).items, url
+        assert len(after) < len(before), url
+        saved += len(before) - len(after)
+        if shutil.which('node'):
+            for script in outline(after).scripts:
+                if script.strip() and not script.lstrip().startswith('{'):
+                    subprocess.run(['node', '--check', '-'], input=script, text=True, check=True)
+    print(f"✅ {len(pages)} pages have the same tags, attributes and text; {saved:,} characters saved")
+
+
+def test_negotiation_and_filters(make_app):
+    app = make_shop_app(make_app, PAGE_CACHE_ENABLED=False)
+    client = app.test_client()
+
+    response = client.get('/products', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    html = gzip.decompress(response.data).decode('utf-8')
+    assert 'مزهرية  فخارية 3' in html
+    assert int(response.headers['Content-Length']) == len(response.data)
+
+    response = client.get('/products', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in response.headers and response.get_data(as_text=True) == html
+    if compression.brotli is not None:
+        response = client.get('/products', headers={'Accept-Encoding': 'gzip, br'})
+        assert response.headers['Content-Encoding'] == 'br'
+        assert compression.brotli.decompress(response.data).decode('utf-8') == html
+    print("✅ gzip/brotli negotiated from Accept-Encoding, identity when refused")
+
+    # JSON, redirects and small bodies go out as they are
+    response = client.get('/api/v1/products', headers={'Accept-Encoding': 'gzip'})
+    assert response.is_json and 'Content-Encoding' not in response.headers
+    response = app.test_client().get('/admin', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 302 and 'Content-Encoding' not in response.headers
+    app.config['COMPRESSION_MIN_SIZE'] = 10 ** 7
+    response = client.get('/products', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers and response.get_data(as_text=True) == html
+    print("✅ JSON, redirects and bodies under COMPRESSION_MIN_SIZE untouched")
+
+    off = make_shop_app(make_app, RESPONSE_COMPRESSION=False)
+    response = off.test_client().get('/products', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers and re.search(r'\n\s+<', response.get_data(as_text=True))
+    print("✅ RESPONSE_COMPRESSION=False serves the page as rendered")
+
+
+def test_cached_pages_keep_compressed_bytes(make_app, monkeypatch):
+    app = make_shop_app(make_app)
+    client = app.test_client()
+
+    calls = []
+    original_compress, original_minify = compression.compress, compression.minify_html
+    monkeypatch.setattr(compression, 'compress',
+                        lambda data, encoding: calls.append('compress') or original_compress(data, encoding))
+    monkeypatch.setattr(compression, 'minify_html', lambda html: calls.append('minify') or original_minify(html))
+
+    first = client.get('/products', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['X-Cache'] == 'MISS' and calls == ['minify', 'compress']
+    with app.app_context():
+        cached_bytes = get_page_cache().stats()['bytes']
+
+    calls.clear()
+    again = client.get('/products', headers={'Accept-Encoding': 'gzip'})
+    assert again.headers['X-Cache'] == 'HIT' and again.data == first.data and calls == []
+    identity = client.get('/products')
+    assert identity.headers['X-Cache'] == 'HIT' and calls == []
+    assert identity.get_data(as_text=True) == gzip.decompress(first.data).decode('utf-8')
+    print("✅ Repeat hits reuse the stored minified and compressed bytes")
+
+    # A compressed page keeps answering conditional requests
+    etag = again.headers['ETag']
+    assert etag.startswith('W/')
+    assert client.get('/products', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        assert cached_bytes > len(identity.data) + len(first.data)
+        invalidate_pages('products')
+    calls.clear()
+    client.get('/products', headers={'Accept-Encoding': 'gzip'})
+    assert calls == ['minify', 'compress']
+    print("✅ Weak ETag still validates; invalidation drops the stored bytes")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
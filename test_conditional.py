@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Check conditional GETs of the public pages: If-None-Match and
+If-Modified-Since get a 304 without rendering, Last-Modified never hides
+a write made in the same second, and dates only validate anonymous pages
+"""
+
+from datetime import datetime, timezone
+import pytest
+from flask import template_rendered
+from app import db
+from app.models import Admin, Product, SiteSettings
+
+# Microseconds into the second: the page changed after 10:00:00
+UPDATED_AT = datetime(2024, 5, 1, 10, 0, 0, 200000)
+
+@pytest.fixture
+def app(make_app):
+    # Without the page cache a 200 always renders the view
+    app = make_app(PAGE_CACHE_ENABLED=False)
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.add(SiteSettings(updated_at=datetime(2024, 1, 1)))
+        db.session.add(Product(name="منتج", price=10, created_at=UPDATED_AT, updated_at=UPDATED_AT))
+        db.session.commit()
+    return app
+
+def get(app, client, url, **headers):
+    """GET url; returns (response, number of templates rendered)"""
+    rendered = []
+    record = lambda sender, template, context, **extra: rendered.append(template.name)
+    with template_rendered.connected_to(record, app):
+        response = client.get(url, headers=headers)
+    return response, len(rendered)
+
+def test_304_without_rendering(app):
+    client = app.test_client()
+    response, rendered = get(app, client, '/products')
+    assert response.status_code == 200 and rendered
+    assert response.last_modified == datetime(2024, 5, 1, 10, 0, 1, tzinfo=timezone.utc), "rounded up"
+    etag, since = response.headers['ETag'], response.headers['Last-Modified']
+
+    response, rendered = get(app, client, '/products', **{'If-None-Match': etag})
+    assert response.status_code == 304 and rendered == 0
+    assert response.headers['ETag'] == etag
+    print("✅ If-None-Match: 304 without rendering")
+
+    response, rendered = get(app, client, '/products', **{'If-Modified-Since': since})
+    assert response.status_code == 304 and rendered == 0
+    print("✅ If-Modified-Since: 304 without rendering")
+
+    # What truncating to the second used to send: older than the write
+    response, rendered = get(app, client, '/products', **{'If-Modified-Since': 'Wed, 01 May 2024 10:00:00 GMT'})
+    assert response.status_code == 200 and rendered
+    print("✅ A write within the second of Last-Modified is not hidden")
+
+def test_dates_only_validate_anonymous_pages(app):
+    since = app.test_client().get('/products').headers['Last-Modified']
+    admin = app.test_client()
+    admin.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    response, rendered = get(app, admin, '/products', **{'If-Modified-Since': since})
+    assert response.status_code == 200 and rendered
+    assert 'private' in response.headers['Cache-Control']
+
+    etag = response.headers['ETag']
+    assert admin.get('/products', headers={'If-None-Match': etag}).status_code == 304
+    assert app.test_client().get('/products', headers={'If-None-Match': etag}).status_code == 200
+    print("✅ Admins revalidate by their own ETag only")
+
+    admin.post('/admin/products/1/edit', data={'name': "منتج معدل", 'price': '12'})
+    response, rendered = get(app, app.test_client(), '/products', **{'If-Modified-Since': since})
+    assert response.status_code == 200 and rendered
+    last_modified = response.last_modified
+    assert last_modified is None or last_modified < datetime.now(timezone.utc), \
+        "Last-Modified is only sent once its second is over"
+    print("✅ Edits invalidate the date, which is withheld until its second is over")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Check the {% cache %} fragment cache on product cards: cards are rendered
+once and reused across pages, filters and search, and an edited product
+(or a new approved review) re-renders only its own card
+"""
+
+import html
+import re
+import pytest
+from app import db
+from app.bulk import run_bulk_action
+from app.fragment_cache import get_fragment_cache
+from app.models import Admin, Product, Review
+
+@pytest.fixture
+def app(make_app):
+    # Without the page cache every request renders its page
+    app = make_app(PAGE_CACHE_ENABLED=False, PRODUCTS_PER_PAGE=4)
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        for i in range(8):
+            db.session.add(Product(name=f"منتج {i}", description="مزهرية يدوية", price=100 + i,
+                                   category="ديكور" if i % 2 else "هدايا"))
+        db.session.commit()
+    return app
+
+def fragment_stats(app):
+    with app.app_context():
+        return get_fragment_cache().stats()
+
+def test_cards_are_reused_across_pages(app):
+    client = app.test_client()
+
+    first = client.get('/products')
+    assert first.status_code == 200
+    assert fragment_stats(app)['misses'] == 4
+
+    # The same cards under a category filter, the next page and search
+    more_url = html.unescape(re.search(r'data-fragment-url="([^"]+)"', first.get_data(as_text=True)).group(1))
+    more = client.get(more_url)
+    assert more.status_code == 200
+    client.get('/products?category=هدايا')
+    client.get('/search?q=مزهرية')
+    stats = fragment_stats(app)
+    assert stats['entries'] == 8 and stats['hits'] >= 4
+    misses = stats['misses']
+
+    client.get('/products')
+    client.get('/products?category=ديكور')
+    client.get('/search?q=مزهرية')
+    stats = fragment_stats(app)
+    assert stats['misses'] == misses
+    print(f"✅ {stats['entries']} cards rendered once, {stats['hits']} reuses across pages, filters and search")
+
+def test_cached_cards_match_fresh_renders(app):
+    client = app.test_client()
+    urls = ['/', '/products', '/products?category=ديكور', '/search?q=مزهرية']
+    for url in urls:
+        client.get(url)  # fill the cache
+    cached = [client.get(url).data for url in urls]
+
+    # The tag still parses, and renders its body every time, without the cache
+    cache = app.extensions.pop('fragment_cache')
+    assert [client.get(url).data for url in urls] == cached
+    assert cache.stats()['hits'] >= 4 + 4 + 2 + 4
+    print("✅ Pages built from cached cards are byte-identical to fresh renders")
+
+def test_edits_rerender_only_their_card(app):
+    client = app.test_client()
+    client.get('/products?category=هدايا')
+    misses = fragment_stats(app)['misses']
+
+    admin = app.test_client()
+    admin.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    response = admin.post('/admin/products/1/edit', data={
+        'name': 'منتج معدل', 'description': 'مزهرية يدوية', 'price': '150', 'category': 'هدايا',
+        'is_active': 'on'})
+    assert response.status_code == 302
+
+    page = client.get('/products?category=هدايا').get_data(as_text=True)
+    assert 'منتج معدل' in page and '150.00' in page
+    assert fragment_stats(app)['misses'] == misses + 1
+    print("✅ An admin edit re-rendered that product's card only")
+
+    # Set by the rating triggers and a bulk UPDATE, not by an ORM flush of the product
+    with app.app_context():
+        db.session.add(Review(customer_name="سارة", comment="رائعة", rating=4, product_id=3, is_approved=True))
+        run_bulk_action(Product, 'feature', [5])
+        db.session.commit()
+    page = client.get('/products?category=هدايا').get_data(as_text=True)
+    assert '4.0 (1)' in page
+    assert fragment_stats(app)['misses'] == misses + 3
+    print("✅ Review triggers and bulk actions move updated_at, so those cards re-render too")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Check the synthetic dataset generator: row counts, determinism, skewed
+ratings, consistent aggregates, search index and placeholder image refcounts
+"""
+
+import os
+import pytest
+from sqlalchemy import func
+from app import db
+from app.models import Product, Review, StoredFile, Testimonial
+from app.search import search_products
+from config import Config
+from generate_dataset import generate_dataset, main
+from reconcile_ratings import AGGREGATE_FIELDS, compute_ratings
+
+def snapshot():
+    return db.session.query(Review.customer_name, Review.comment, Review.rating, Review.product_id,
+                            Review.is_approved).order_by(Review.id).all()
+
+def test_generate_dataset(make_app):
+    first, second = make_app(), make_app()
+    options = dict(products=300, reviews=20000, testimonials=10, images=2, seed=7, chunk_size=3000)
+    assert generate_dataset(first, **options)['reviews'] == 20000
+    generate_dataset(second, **options)
+
+    with second.app_context():
+        expected = snapshot()
+
+    with first.app_context():
+        assert Product.query.count() == 300 and Testimonial.query.count() == 10
+        assert snapshot() == expected, "same seed, same data"
+        print("✅ Row counts and determinism")
+
+        ratings = dict(db.session.query(Review.rating, func.count(Review.id)).group_by(Review.rating))
+        assert ratings[5] > ratings[4] > ratings[3] and ratings[1] > ratings[2], ratings
+        busiest = db.session.query(func.max(Product.rating_count)).scalar()
+        assert busiest > 10 * 20000 * 0.85 / 300, "a few products collect most reviews"
+        print("✅ J-shaped ratings, skewed popularity")
+
+        computed = compute_ratings()
+        for product in Product.query.all():
+            stored = tuple(getattr(product, field) for field in AGGREGATE_FIELDS)
+            assert stored == computed.get(product.id, (0,) * len(AGGREGATE_FIELDS))
+        review = Review.query.filter_by(is_approved=False).first()
+        before = review.product.rating_count
+        review.is_approved = True
+        db.session.commit()
+        assert review.product.rating_count == before + 1, "rating triggers restored"
+        print("✅ Rating aggregates rebuilt and triggers back in place")
+
+        assert search_products(Product.query.first().name.split()[0])[1] > 0
+        for stored in StoredFile.query.all():
+            references = sum(model.query.filter_by(image_filename=stored.filename).count()
+                             for model in (Product, Review, Testimonial))
+            assert stored.ref_count == references > 0
+            assert os.path.exists(os.path.join(first.config['UPLOAD_FOLDER'], stored.filename))
+        print("✅ Search index and placeholder images")
+
+def test_database_option_keeps_images_beside_it(tmp_path):
+    served = sorted(os.listdir(Config.UPLOAD_FOLDER)) if os.path.isdir(Config.UPLOAD_FOLDER) else []
+    database = tmp_path / 'big.sqlite3'
+    options = ['--products', '20', '--reviews', '200', '--testimonials', '2', '--database', str(database)]
+    assert main(options + ['--images', '2']) == 0
+    images = tmp_path / 'big_uploads'
+    # Two images, each with its resized variants
+    assert len({name[:64] for name in os.listdir(images)}) == 2 < len(os.listdir(images))
+    assert (sorted(os.listdir(Config.UPLOAD_FOLDER)) if os.path.isdir(Config.UPLOAD_FOLDER) else []) == served
+    print("✅ --database writes its placeholder images next to the database")
+
+    assert main(options + ['--images', '0', '--reset']) == 0
+    assert os.listdir(images) == []
+    print("✅ --reset removes the images of the dropped catalog")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
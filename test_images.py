@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Check the responsive images: WebP and JPEG variants at the thumb, card
+and full widths, the variants JSON stored with each upload, the
+<picture>/srcset markup with its fallback, and the backfill script
+"""
+
+import io
+import json
+import os
+import pytest
+from PIL import Image
+from app import db
+from app.images import VARIANT_WIDTHS, generate_variants
+from app.models import Admin, Product, StoredFile
+from app.tasks import run_pending_tasks
+from generate_image_variants import backfill_variants
+
+def image_bytes(size, mode='RGB', fmt='JPEG'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 120, 80, 128)[:len(mode)]).save(buffer, fmt)
+    return buffer.getvalue()
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(PAGE_CACHE_ENABLED=False)
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+    return app
+
+def test_variant_sizes_and_formats(tmp_path):
+    (tmp_path / 'photo.jpg').write_bytes(image_bytes((2400, 1800)))
+    variants = generate_variants(str(tmp_path), 'photo.jpg')
+    assert list(variants) == ['thumb', 'card', 'full']
+    for name, entry in variants.items():
+        assert entry['width'] == VARIANT_WIDTHS[name]
+        for fmt, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+            with Image.open(tmp_path / entry[fmt]) as variant:
+                assert variant.format == pil_format
+                assert variant.size == (VARIANT_WIDTHS[name], VARIANT_WIDTHS[name] * 3 // 4)
+    print("✅ thumb/card/full in WebP and JPEG, aspect ratio kept")
+
+    # Never upscaled: a 500px original gives the thumb and itself
+    (tmp_path / 'small.png').write_bytes(image_bytes((500, 500), 'RGBA', 'PNG'))
+    variants = generate_variants(str(tmp_path), 'small.png')
+    assert {name: entry['width'] for name, entry in variants.items()} == {'thumb': 320, 'card': 500}
+    with Image.open(tmp_path / variants['card']['jpeg']) as flat:
+        assert flat.mode == 'RGB', "transparency flattened for JPEG"
+    with Image.open(tmp_path / variants['card']['webp']) as webp:
+        assert webp.mode == 'RGBA'
+
+    (tmp_path / 'notes.jpg').write_bytes(b'\xff\xd8\xff not really a jpeg')
+    assert generate_variants(str(tmp_path), 'notes.jpg') is None
+    print("✅ Small originals are not upscaled; unreadable files get no variants")
+
+def test_uploads_store_variants_and_render_picture(app):
+    client = app.test_client()
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    form = {'name': "مزهرية", 'price': '50', 'image': (io.BytesIO(image_bytes((1800, 1200))), 'vase.jpg')}
+    assert client.post('/admin/products/new', data=form).status_code == 302
+    with app.app_context():
+        assert Product.query.one().image_variants is None, "resized in the background"
+        run_pending_tasks()
+        product = Product.query.one()
+        stored = StoredFile.query.one()
+        assert product.image_variants == stored.variants
+        variants = json.loads(product.image_variants)
+    assert set(variants) == {'thumb', 'card', 'full'}
+    stem = product.image_filename[:-4]
+    assert variants['card'] == {'width': 640, 'webp': f'{stem}_card.webp', 'jpeg': f'{stem}_card.jpg'}
+    print("✅ The variants JSON is saved with the upload and every row using it")
+
+    page = app.test_client().get('/products').get_data(as_text=True)
+    webp_srcset = ', '.join(f"/static/uploads/{stem}_{name}.webp {width}w"
+                            for name, width in (('thumb', 320), ('card', 640), ('full', 1600)))
+    assert '<picture>' in page
+    assert f'<source type="image/webp" srcset="{webp_srcset}"' in page
+    assert f'src="/static/uploads/{stem}_card.jpg" srcset="/static/uploads/{stem}_thumb.jpg 320w' in page
+    assert 'sizes="(min-width: 992px) 33vw, (min-width: 768px) 50vw, 100vw"' in page
+    print("✅ <picture> with WebP/JPEG srcset and sizes")
+
+def test_missing_variants_fall_back_to_the_original(app):
+    with app.app_context():
+        db.session.add(Product(name="قديم", price=10, image_filename='legacy.jpg'))
+        db.session.add(Product(name="صغير", price=10, image_filename='small.jpg', image_variants=json.dumps(
+            {'thumb': {'width': 320, 'webp': 'small_thumb.webp', 'jpeg': 'small_thumb.jpg'}})))
+        db.session.commit()
+    page = app.test_client().get('/products').get_data(as_text=True)
+    assert '<img src="/static/uploads/legacy.jpg"' in page
+    assert page.count('<picture>') == 1
+    assert 'src="/static/uploads/small_thumb.jpg"' in page, "biggest variant when there is no card"
+    print("✅ Uploads without variants get a plain <img>")
+
+def test_backfill_existing_uploads(app):
+    upload_folder = app.config['UPLOAD_FOLDER']
+    with open(os.path.join(upload_folder, 'old.jpg'), 'wb') as f:
+        f.write(image_bytes((1000, 1000)))
+    with app.app_context():
+        db.session.add(StoredFile(content_hash='c' * 64, filename='old.jpg', size=1, ref_count=2))
+        db.session.add_all([Product(name="أ", price=10, image_filename='old.jpg'),
+                            Product(name="ب", price=10, image_filename='gone.jpg')])
+        db.session.commit()
+
+    assert backfill_variants(app=app) == {'generated': 1, 'skipped': 0, 'missing': 1}
+    with app.app_context():
+        variants = json.loads(Product.query.filter_by(image_filename='old.jpg').one().image_variants)
+        assert {name: entry['width'] for name, entry in variants.items()} == {'thumb': 320, 'card': 640, 'full': 1000}
+        assert json.loads(StoredFile.query.one().variants) == variants
+    assert all(os.path.exists(os.path.join(upload_folder, entry['webp'])) for entry in variants.values())
+    assert backfill_variants(app=app)['generated'] == 0, "rows with variants are left alone"
+    print("✅ The backfill script adds variants to existing uploads")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Check request instrumentation: per-endpoint latency, SQL and template
+histograms, the protected Prometheus endpoint and merging across workers
+"""
+
+import json
+import os
+import re
+import pytest
+from app import db
+from app.metrics import get_metrics
+from app.models import Admin, Product
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(PAGE_CACHE_ENABLED=False, METRICS_FLUSH_INTERVAL=0, METRICS_TOKEN='scrape-token')
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.add_all([Product(name=f"منتج {i}", description="وصف", price=10 + i) for i in range(5)])
+        db.session.commit()
+    return app
+
+def sample(text, metric, **labels):
+    """Value of one sample line in Prometheus text output"""
+    selector = ','.join(f'{name}="{value}"' for name, value in labels.items())
+    match = re.search(rf'^{re.escape(metric)}\{{{re.escape(selector)}\}} (\S+)$', text, re.MULTILINE)
+    assert match, f'{metric}{{{selector}}} missing'
+    return float(match.group(1))
+
+def test_metrics(app):
+    client = app.test_client()
+    for _ in range(3):
+        assert client.get('/').status_code == 200
+    client.get('/api/v1/products/999')
+
+    assert client.get('/admin/metrics').status_code == 302
+    assert client.get('/admin/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/admin/metrics', headers={'Authorization': 'Bearer scrape-token'})
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    print("✅ /admin/metrics needs a login or the bearer token")
+
+    assert sample(text, 'clay_store_request_duration_seconds_count', endpoint='main.index') == 3
+    assert sample(text, 'clay_store_request_duration_seconds_bucket', endpoint='main.index', le='+Inf') == 3
+    assert sample(text, 'clay_store_request_sql_queries_sum', endpoint='main.index') >= 3
+    assert sample(text, 'clay_store_request_template_seconds_sum', endpoint='main.index') > 0
+    assert sample(text, 'clay_store_request_template_seconds_sum', endpoint='api.product') == 0
+    assert sample(text, 'clay_store_requests_total', endpoint='api.product', method='GET', status='404') == 1
+    print("✅ Latency, SQL and template histograms per endpoint")
+
+    # Another worker's last flush is added to this worker's live numbers
+    with app.app_context():
+        other = get_metrics().registry.dump()
+    with open(os.path.join(app.config['METRICS_DIR'], 'worker-999999.json'), 'w') as f:
+        json.dump(other, f)
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    text = client.get('/admin/metrics').get_data(as_text=True)
+    assert sample(text, 'clay_store_request_duration_seconds_count', endpoint='main.index') == 6
+    print("✅ Workers merged")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Check the page cache of the public views: admins and flash messages
+bypass it, every admin write retires the pages it affects (on the other
+workers too), and PAGE_CACHE_MAX_BYTES bounds its size
+"""
+
+import pytest
+from app import db
+from app.models import Admin, Product, Review, Testimonial
+
+TAGS = ('products', 'reviews', 'testimonials', 'settings')
+
+SETTINGS_FIELDS = [
+    'site_name', 'site_description', 'about_text', 'footer_text',
+    'contact_phone', 'contact_email', 'whatsapp_number',
+    'facebook_url', 'instagram_url', 'tiktok_url',
+    'background_color', 'secondary_color', 'accent_color', 'theme_style',
+]
+
+def add_admin(app):
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+
+def admin_client(app):
+    client = app.test_client()
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+def settings_form(client, **changes):
+    """The admin settings form as currently filled in, with changes applied"""
+    settings = client.get('/api/v1/settings').get_json()['data']
+    form = {name: settings.get(name) or '' for name in SETTINGS_FIELDS}
+    form.update(changes)
+    return form
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    add_admin(app)
+    with app.app_context():
+        db.session.add_all(Product(name=f"منتج {i}", description="وصف", price=10 + i) for i in range(3))
+        db.session.flush()
+        db.session.add(Review(customer_name="عميل", comment="رائع", rating=5, product_id=1, is_approved=True))
+        db.session.add(Review(customer_name="عميل آخر", comment="جميل", rating=4))
+        db.session.add(Testimonial(customer_name="عميلة", testimonial_text="شكراً", rating=5))
+        db.session.commit()
+    return app
+
+def page_cache(app):
+    return app.extensions['page_cache']
+
+def test_admins_and_flashes_bypass_the_cache(app):
+    visitor = app.test_client()
+    assert visitor.get('/contact').headers['X-Cache'] == 'MISS'
+    assert visitor.get('/contact').headers['X-Cache'] == 'HIT'
+
+    admin = admin_client(app)
+    bypasses = page_cache(app).stats()['bypasses']
+    response = admin.get('/contact')
+    assert 'X-Cache' not in response.headers
+    assert page_cache(app).stats()['bypasses'] == bypasses + 1
+    assert admin.get('/products').status_code == 200
+    assert page_cache(app).stats()['entries'] == 1, "admin renders are not stored"
+    print("✅ Logged-in admins get fresh pages that are not stored")
+
+    flashed = app.test_client()
+    with flashed.session_transaction() as session:
+        session['_flashes'] = [('success', 'تم إرسال طلبك')]
+    response = flashed.get('/contact')
+    assert 'X-Cache' not in response.headers
+    assert 'تم إرسال طلبك' in response.get_data(as_text=True)
+    response = visitor.get('/contact')
+    assert response.headers['X-Cache'] == 'HIT'
+    assert 'تم إرسال طلبك' not in response.get_data(as_text=True)
+    print("✅ Pages with pending flash messages are neither served from nor stored in the cache")
+
+# Every admin write route: (method, url, form or JSON body, tags it must invalidate)
+ADMIN_WRITES = [
+    ('form', '/admin/products/new', {'name': "منتج جديد", 'price': '20'}, {'products'}),
+    ('form', '/admin/products/1/edit', {'name': "منتج معدل", 'price': '25'}, {'products'}),
+    ('json', '/admin/products/bulk-action', {'action': 'feature', 'product_ids': [1]}, {'products', 'reviews'}),
+    ('form', '/admin/reviews/new', {'customer_name': "عميل", 'comment': "رائع", 'rating': '5'}, {'reviews', 'products'}),
+    ('form', '/admin/reviews/1/edit', {'customer_name': "عميل", 'comment': "ممتاز", 'rating': '4', 'product_id': '1'},
+     {'reviews', 'products'}),
+    ('form', '/admin/reviews/2/approve', None, {'reviews', 'products'}),
+    ('form', '/admin/reviews/2/reject', None, {'reviews', 'products'}),
+    ('form', '/admin/reviews/2/feature', None, {'reviews'}),
+    ('json', '/admin/reviews/1/update-rating', {'rating': 3}, {'reviews', 'products'}),
+    ('json', '/admin/reviews/bulk-action', {'action': 'approve', 'review_ids': [2]}, {'reviews', 'products'}),
+    ('form', '/admin/reviews/2/delete', None, {'reviews', 'products'}),
+    ('form', '/admin/testimonials/new',
+     {'customer_name': "عميلة", 'customer_title': "", 'testimonial_text': "شكراً", 'rating': '5'}, {'testimonials'}),
+    ('form', '/admin/testimonials/1/edit',
+     {'customer_name': "عميلة", 'customer_title': "", 'testimonial_text': "شكراً جزيلاً", 'rating': '5'}, {'testimonials'}),
+    ('json', '/admin/testimonials/bulk-action', {'action': 'activate', 'testimonial_ids': [1]}, {'testimonials'}),
+    ('form', '/admin/testimonials/1/delete', None, {'testimonials'}),
+    ('settings', '/admin/settings', {'site_name': "متجر جديد"}, {'settings'}),
+    ('form', '/admin/products/2/delete', None, {'products'}),
+]
+
+def test_admin_writes_invalidate_their_pages(app):
+    admin = admin_client(app)
+    visitor = app.test_client()
+    cache = page_cache(app)
+
+    for kind, url, data, tags in ADMIN_WRITES:
+        before = {tag: cache.tag_version(tag) for tag in TAGS}
+        if kind == 'json':
+            response = admin.post(url, json=data)
+            assert response.get_json()['success'], f"{url}: {response.get_json()}"
+        else:
+            if kind == 'settings':
+                data = settings_form(admin, **data)
+            response = admin.post(url, data=data)
+            assert response.status_code == 302, f"{url} returned {response.status_code}"
+        moved = {tag for tag in TAGS if cache.tag_version(tag) != before[tag]}
+        assert moved == tags, f"{url} invalidated {moved or 'nothing'}, expected {tags}"
+        print(f"✅ {url} invalidates {', '.join(sorted(tags))}")
+
+    # And the stale entries are not served
+    assert visitor.get('/products').headers['X-Cache'] == 'MISS'
+    assert visitor.get('/products').headers['X-Cache'] == 'HIT'
+    admin.post('/admin/products/1/edit', data={'name': "اسم أحدث", 'price': '30'})
+    response = visitor.get('/products')
+    assert response.headers['X-Cache'] == 'MISS' and 'اسم أحدث' in response.get_data(as_text=True)
+    print("✅ Pages cached before a write are re-rendered")
+
+def test_max_bytes_evicts_least_recently_used(make_app, app):
+    size = max(len(app.test_client().get(f'/api/v1/products/{i}').get_data()) for i in (1, 2, 3))
+    # Room for two entries
+    small = make_app(PAGE_CACHE_MAX_BYTES=size * 5 // 2,
+                     SQLALCHEMY_DATABASE_URI=app.config['SQLALCHEMY_DATABASE_URI'])
+    visitor = small.test_client()
+    for i in (1, 2, 3):
+        assert visitor.get(f'/api/v1/products/{i}').headers['X-Cache'] == 'MISS'
+    stats = page_cache(small).stats()
+    assert (stats['entries'], stats['evictions']) == (2, 1)
+    assert stats['bytes'] <= stats['max_bytes']
+
+    assert visitor.get('/api/v1/products/1').headers['X-Cache'] == 'MISS', "oldest entry was evicted"
+    assert visitor.get('/api/v1/products/3').headers['X-Cache'] == 'HIT'
+    assert visitor.get('/api/v1/products/2').headers['X-Cache'] == 'MISS'
+    assert page_cache(small).stats()['evictions'] == 3
+
+    tiny = make_app(PAGE_CACHE_MAX_BYTES=size // 2, SQLALCHEMY_DATABASE_URI=app.config['SQLALCHEMY_DATABASE_URI'])
+    tiny.test_client().get('/api/v1/products/1')
+    assert page_cache(tiny).stats()['entries'] == 0, "bodies over the limit are not stored"
+    print("✅ PAGE_CACHE_MAX_BYTES evicts the least recently used pages")
+
+def test_settings_edit_reaches_other_workers(make_app):
+    # Two workers on one database and one set of page-cache versions; the
+    # settings TTL is long enough that only the version check can help
+    first = make_app(SETTINGS_CACHE_TTL=3600)
+    second = make_app(SETTINGS_CACHE_TTL=3600,
+                      SQLALCHEMY_DATABASE_URI=first.config['SQLALCHEMY_DATABASE_URI'],
+                      PAGE_CACHE_DIR=first.config['PAGE_CACHE_DIR'])
+    add_admin(first)
+
+    visitor = second.test_client()
+    assert visitor.get('/contact').status_code == 200
+    assert visitor.get('/contact').headers['X-Cache'] == 'HIT'
+    etag = visitor.get('/contact').headers['ETag']
+
+    admin = admin_client(first)
+    form = settings_form(admin, site_name='متجر الطين الجديد')
+    assert admin.post('/admin/settings', data=form).status_code == 302
+
+    response = visitor.get('/contact')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert 'متجر الطين الجديد' in response.get_data(as_text=True)
+    assert response.headers['ETag'] != etag
+    assert visitor.get('/api/v1/settings').get_json()['data']['site_name'] == 'متجر الطين الجديد'
+    print("✅ A settings edit on one worker shows on the pages of another")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Check the keyset-paginated catalog: /products and the /products/more
+fragments walk every active product once, newest first, with ties on
+created_at broken by id, with and without a category
+"""
+
+import html
+import re
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Product
+from app.pagination import encode_cursor
+
+CARD_TITLE = re.compile(r'<h5 class="card-title mb-0">(.*?)</h5>')
+LOAD_MORE = re.compile(r'href="([^"]*)"\s+class="btn btn-outline-primary btn-lg" id="loadMoreProducts"')
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(PRODUCTS_PER_PAGE=3)
+    start = datetime(2024, 1, 1)
+    with app.app_context():
+        for i in range(11):
+            # Three products per timestamp, so pages end in the middle of a tie
+            db.session.add(Product(name=f"منتج {i}", price=10 + i, category="ديكور" if i % 2 else "مجوهرات",
+                                   is_active=i != 4, created_at=start + timedelta(hours=i // 3)))
+        db.session.commit()
+    return app
+
+def expected_names(app, category=None):
+    with app.app_context():
+        query = Product.query.filter_by(is_active=True)
+        if category:
+            query = query.filter_by(category=category)
+        return [product.name for product in query.order_by(Product.created_at.desc(), Product.id.desc())]
+
+def walk_pages(client, url):
+    """Follow the "load more" links of the full page; returns (names, page count)"""
+    names, pages = [], 0
+    while url:
+        body = client.get(url).get_data(as_text=True)
+        names += CARD_TITLE.findall(body)
+        pages += 1
+        match = LOAD_MORE.search(body)
+        url = html.unescape(match.group(1)) if match else None
+    return names, pages
+
+def walk_fragments(client, url):
+    """Fetch the first page, then follow X-Next-Page through /products/more"""
+    body = client.get(url).get_data(as_text=True)
+    names = CARD_TITLE.findall(body)
+    match = re.search(r'data-fragment-url="([^"]*)"', body)
+    url = html.unescape(match.group(1)) if match else None
+    while url:
+        response = client.get(url)
+        fragment = response.get_data(as_text=True)
+        assert '<html' not in fragment and '<nav' not in fragment, "fragments leave out base.html"
+        names += CARD_TITLE.findall(fragment)
+        url = response.headers.get('X-Next-Page')
+    return names
+
+@pytest.mark.parametrize('category', [None, 'ديكور', 'مجوهرات'])
+def test_pages_cover_the_catalog_once(app, category):
+    client = app.test_client()
+    url = '/products' + (f'?category={category}' if category else '')
+    expected = expected_names(app, category)
+
+    names, pages = walk_pages(client, url)
+    assert names == expected
+    assert pages == -(-len(expected) // 3)
+    assert walk_fragments(client, url) == expected
+    print(f"✅ {category or 'All products'}: {len(expected)} products over {pages} pages, in order")
+
+def test_last_page_and_malformed_cursors(app):
+    client = app.test_client()
+    with app.app_context():
+        oldest = Product.query.order_by(Product.created_at, Product.id).first()
+        after_oldest = encode_cursor(oldest.created_at, oldest.id)
+
+    response = client.get(f'/products/more?cursor={after_oldest}')
+    assert response.status_code == 200 and 'X-Next-Page' not in response.headers
+    assert CARD_TITLE.findall(response.get_data(as_text=True)) == []
+    assert 'loadMoreProducts' not in client.get(f'/products?cursor={after_oldest}').get_data(as_text=True)
+    print("✅ No next page after the last product")
+
+    for cursor in ('garbage', encode_cursor(datetime(2024, 1, 1), 1)[:-3] + '!!!'):
+        assert client.get(f'/products?cursor={cursor}').status_code == 400
+        assert client.get(f'/products/more?cursor={cursor}').status_code == 400
+    assert client.get('/products/more').status_code == 400, "fragments always continue a page"
+    print("✅ Malformed cursors get 400")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Check that the per-product rating aggregates follow every kind of review
+change (ORM and bulk) and that reconcile_ratings.py repairs drift
+"""
+
+import pytest
+from app import db
+from app.bulk import run_bulk_action
+from app.models import Product, Review
+from reconcile_ratings import AGGREGATE_FIELDS, compute_ratings, reconcile_ratings
+
+def assert_consistent(step):
+    db.session.commit()
+    db.session.expire_all()
+    expected = compute_ratings()
+    for product in Product.query.all():
+        stored = tuple(getattr(product, field) for field in AGGREGATE_FIELDS)
+        assert stored == expected.get(product.id, (0,) * len(AGGREGATE_FIELDS)), \
+            f"{step}: product {product.id} has {stored}"
+    print(f"✅ {step}")
+
+def test_rating_aggregates(make_app):
+    app = make_app()
+    with app.app_context():
+        first, second = Product(name="أ", price=10), Product(name="ب", price=20)
+        db.session.add_all([first, second])
+        db.session.flush()
+
+        reviews = [Review(customer_name=f"عميل {i}", comment="رائع", rating=i % 5 + 1,
+                          product_id=first.id, is_approved=i % 2 == 0) for i in range(10)]
+        db.session.add_all(reviews)
+        assert_consistent("New reviews (only approved ones count)")
+        assert first.rating_count == 5 and first.rating_sum == 1 + 3 + 5 + 2 + 4
+        assert first.rating_histogram == [1, 1, 1, 1, 1]
+        assert first.average_rating == 3.0
+
+        reviews[1].is_approved = True
+        assert_consistent("Approve")
+        reviews[0].is_approved = False
+        assert_consistent("Reject")
+        reviews[2].rating = 1
+        assert_consistent("Re-rate")
+        reviews[4].product_id = second.id
+        assert_consistent("Move to another product")
+        db.session.delete(reviews[6])
+        assert_consistent("Delete")
+
+        ids = [review.id for review in reviews[:6]]
+        run_bulk_action(Review, 'approve', ids)
+        assert_consistent("Bulk approve")
+        run_bulk_action(Review, 'update_rating', ids, rating=4)
+        assert_consistent("Bulk update_rating")
+        run_bulk_action(Review, 'delete', ids[:3])
+        assert_consistent("Bulk delete")
+
+        Product.query.update({'rating_sum': 0, 'rating_count': 0})
+        db.session.commit()
+
+        assert reconcile_ratings(app) == 2
+        assert_consistent("Reconcile repairs drift")
+        assert reconcile_ratings(app) == 0
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Check the query budget tooling: count_queries() limits, N+1 detection with
+the template line or source line that caused it, enforcement on views in
+tests and the X-Query-* headers of report mode
+"""
+
+import pytest
+from flask import render_template
+from jinja2 import ChoiceLoader, DictLoader
+from app import db
+from app.models import Product, Review
+from app.query_budget import QueryBudgetExceeded, count_queries, query_budget
+
+N_PLUS_ONE_TEMPLATE = """{% for review in reviews %}
+{{ review.customer_name }}: {{ review.product.name }}
+{% endfor %}"""
+
+def make_budget_app(make_app, mode):
+    app = make_app(PAGE_CACHE_ENABLED=False, QUERY_BUDGET_MODE=mode)
+    app.jinja_loader = ChoiceLoader([DictLoader({'n_plus_one.html': N_PLUS_ONE_TEMPLATE}), app.jinja_loader])
+
+    @app.route('/n-plus-one')
+    @query_budget(3)
+    def n_plus_one():
+        return render_template('n_plus_one.html', reviews=Review.query.all())
+
+    with app.app_context():
+        for i in range(6):
+            product = Product(name=f"منتج {i}", description="وصف", price=10)
+            db.session.add(product)
+            db.session.flush()
+            db.session.add(Review(customer_name=f"عميل {i}", comment="رائع", product_id=product.id))
+        db.session.commit()
+    return app
+
+def test_count_queries(make_app):
+    app = make_budget_app(make_app, 'enforce')
+    with app.app_context():
+        with count_queries(2) as log:
+            Product.query.count()
+        assert log.count == 1
+
+        with pytest.raises(QueryBudgetExceeded, match=r'2 queries \(budget 1\)'):
+            with count_queries(1):
+                Product.query.count()
+                Review.query.count()
+        print("✅ Budget for a block of code")
+
+        db.session.expire_all()
+        with pytest.raises(QueryBudgetExceeded) as error:
+            with count_queries():
+                names = [review.product.name for review in Review.query.all()]
+        assert 'N+1: 6x SELECT product.id' in str(error.value)
+        assert 'test_query_budget.py' in str(error.value)
+        print("✅ Lazy loads in a loop reported with their source line")
+
+def test_views(make_app, query_budget):
+    app = make_budget_app(make_app, 'enforce')
+    client = app.test_client()
+    with pytest.raises(QueryBudgetExceeded) as error:
+        client.get('/n-plus-one')
+    assert 'GET /n-plus-one: 7 queries (budget 3)' in str(error.value)
+    assert 'from n_plus_one.html:2' in str(error.value)
+    assert client.get('/').status_code == 200
+    print("✅ Views over budget fail the test, naming the template line")
+
+    # The pytest plugin's fixture
+    with app.app_context(), query_budget(1):
+        Product.query.first()
+
+def test_report_mode(make_app):
+    app = make_budget_app(make_app, 'report')
+    client = app.test_client()
+    response = client.get('/n-plus-one')
+    assert response.status_code == 200
+    assert response.headers['X-Query-Count'] == '7'
+    assert response.headers['X-Query-Budget'] == '3'
+    assert response.headers['X-Query-N-Plus-One'] == '6x from n_plus_one.html:2'
+    assert client.get('/').headers['X-Query-Budget'] == '4'
+    print("✅ Report mode adds X-Query-* headers")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Check that every query issued by the public storefront routes is served
+from an index (EXPLAIN QUERY PLAN must not report a full table scan)
+"""
+
+import re
+import pytest
+from app import db
+from app.models import Product, Review
+
+# Single-row tables where a scan is the cheapest plan
+# ("SCAN CONSTANT ROW" is the outer SELECT of scalar subqueries)
+SCAN_ALLOWED = {'site_settings', 'CONSTANT'}
+
+PUBLIC_URLS = [
+    '/',
+    '/products',
+    '/products?category=مجوهرات',
+    '/reviews',
+    '/contact',
+    '/custom-order',
+    '/whatsapp/1',
+    '/search?q=منتج',
+    '/search.json?q=منتج&page=2',
+    '/api/v1/products?limit=5&fields=id,name,rating',
+    '/api/v1/products?category=ديكور',
+    '/api/v1/products/1',
+    '/api/v1/categories',
+    '/api/v1/reviews?fields=id,comment',
+    '/api/v1/reviews?product_id=1',
+    '/api/v1/settings',
+]
+
+# A full-text MATCH shows up as a virtual table "scan" that uses the FTS index
+SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)\b(?! VIRTUAL TABLE INDEX \d+:=?M)')
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        for i in range(20):
+            db.session.add(Product(name=f"منتج {i}", description="وصف", price=100 + i,
+                                   category="مجوهرات" if i % 2 else "ديكور"))
+        db.session.flush()
+        for i in range(20):
+            db.session.add(Review(customer_name=f"عميل {i}", comment="رائع", rating=5,
+                                  product_id=1, is_approved=bool(i % 2)))
+        db.session.commit()
+    return app
+
+def collect_statements(app, url, record_statements):
+    with app.app_context(), record_statements(db.engine, 'SELECT') as statements:
+        response = app.test_client().get(url)
+    assert response.status_code in (200, 302), f"{url} returned {response.status_code}"
+    return statements
+
+def find_scans(app, statements):
+    scans = []
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                for row in plan:
+                    match = SCAN_RE.match(row[-1])
+                    if match and match.group(1) not in SCAN_ALLOWED:
+                        scans.append((row[-1], statement))
+    return scans
+
+def test_public_routes_use_indexes(app, record_statements):
+    """Fail if any public route falls back to a table scan"""
+    failures = []
+    for url in PUBLIC_URLS:
+        statements = collect_statements(app, url, record_statements)
+        for detail, statement in find_scans(app, statements):
+            failures.append(f"{url}: {detail}\n    {' '.join(statement.split())}")
+
+    assert not failures, "Table scans on public routes:\n" + "\n".join(failures)
+    print("✅ All public routes are served from indexes")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -6,11 +6,19 @@ Test script to verify the enhanced rating management system
 from app import create_app, db
 from app.models import Product, Review, Testimonial
 import time
+import pytest
 
-def test_rating_management():
+@pytest.fixture
+def app(make_app):
+    # The sample reviews are attached to the first product
+    app = make_app()
+    with app.app_context():
+        db.session.add(Product(name="أقراط زهور", price=150, category="مجوهرات"))
+        db.session.commit()
+    return app
+
+def test_rating_management(app):
     """Test the enhanced rating management functionality"""
-    app = create_app()
-    
     with app.app_context():
         print("🌟 Testing Enhanced Rating Management System...")
         print("=" * 60)
@@ -81,7 +89,7 @@ def test_rating_management():
         except Exception as e:
             print(f"❌ Error adding sample data: {e}")
             db.session.rollback()
-            return
+            raise
         
         # Calculate statistics
         reviews = Review.query.all()
@@ -136,6 +144,9 @@ def test_rating_management():
         print("Testimonials: http://127.0.0.1:5000/admin/testimonials")
         print("Analytics: http://127.0.0.1:5000/admin/analytics")
         print("Login: admin / admin123")
+        assert len(reviews) >= len(sample_reviews) and len(testimonials) >= len(sample_testimonials)
+        assert product.rating_count == Review.query.filter_by(product_id=product.id, is_approved=True).count()
 
 if __name__ == '__main__':
-    test_rating_management()
\ No newline at end of file
+    # Against the development database, as before
+    test_rating_management(create_app())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Check product search: Arabic normalization, FTS index kept in sync by the
+triggers, bm25 ranking, pagination and the JSON endpoint
+"""
+
+import pytest
+from app import db
+from app.bulk import run_bulk_action
+from app.models import Product
+from app.search import build_match_query, normalize_arabic, search_products
+
+def names(products):
+    return [product.name for product in products]
+
+def test_normalization():
+    assert normalize_arabic('مَكْتَبَةٌ') == 'مكتبه'
+    assert normalize_arabic('أإآٱ') == 'اااا'
+    assert normalize_arabic('مبنى') == 'مبني'
+    assert normalize_arabic('كـــوب') == 'كوب'
+    assert build_match_query('  إناء  "زهور" ') == '"اناء" "زهور"*'
+    assert build_match_query(' ?! ') is None
+    print("✅ Arabic normalization")
+
+def test_search_products(make_app):
+    app = make_app(PRODUCTS_PER_PAGE=1)
+    with app.app_context():
+        db.session.add_all([
+            Product(name="إناء زهور", description="قطعة ديكور يدوية", price=10, category="ديكور"),
+            Product(name="سلسلة مفاتيح", description="تصلح هدية مع إناء صغير", price=5, category="إكسسوارات"),
+            Product(name="مَزهريّة كبيرة", description="للزهور المجففة", price=20, category="ديكور"),
+            Product(name="إناء مخفي", description="غير معروض", price=30, category="ديكور", is_active=False),
+        ])
+        db.session.commit()
+
+        results, total = search_products('اناء')
+        assert total == 2, names(results)
+        assert names(results) == ["إناء زهور", "سلسلة مفاتيح"], "a name match ranks above a description match"
+        print("✅ Normalized matches ranked by bm25, inactive products hidden")
+
+        assert names(search_products('مزهرية')[0]) == ["مَزهريّة كبيرة"]
+        assert names(search_products('مزه')[0]) == ["مَزهريّة كبيرة"], "last term matches as a prefix"
+        results, total = search_products('ديكور', page=2, per_page=1)
+        assert total == 2 and len(results) == 1
+        print("✅ Tashkeel ignored, prefix search, pagination")
+
+        vase = Product.query.filter_by(name="مَزهريّة كبيرة").one()
+        vase.name = "فازة كبيرة"
+        db.session.commit()
+        assert search_products('مزهرية')[1] == 0
+        assert search_products('فازه')[1] == 1
+        run_bulk_action(Product, 'delete', [vase.id])
+        db.session.commit()
+        assert search_products('فازه')[1] == 0
+        print("✅ Index follows updates and bulk deletes")
+
+        client = app.test_client()
+        data = client.get('/search.json?q=إناء').get_json()
+        assert data['total'] == 2 and data['results'][0]['name'] == "إناء زهور"
+        page = client.get('/search?q=إناء').get_data(as_text=True)
+        assert 'صفحة 1 من 2' in page
+        print("✅ /search and /search.json")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
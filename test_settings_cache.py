@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Check the per-worker site settings cache: reads within the TTL run no
+SQL, a one-column updated_at check picks up outside changes after it,
+and pages that never show the settings never load them
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from app import db, settings_cache
+from app.models import Product, SiteSettings
+from app.settings_cache import get_site_settings
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(SETTINGS_CACHE_TTL=5, PAGE_CACHE_ENABLED=False)
+    with app.app_context():
+        db.session.add(SiteSettings(site_name="متجر الطين"))
+        db.session.add(Product(name="منتج", price=10))
+        db.session.commit()
+    return app
+
+def test_cached_reads_and_revalidation(app, record_statements, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(settings_cache.time, 'monotonic', lambda: now[0])
+
+    with app.app_context():
+        snapshot = get_site_settings()
+        assert snapshot.site_name == "متجر الطين"
+        with pytest.raises(AttributeError):
+            snapshot.site_name = "غيره"
+
+        with record_statements(db.engine) as statements:
+            assert get_site_settings() is snapshot
+        assert statements == []
+        print("✅ Cached settings are read without a query")
+
+        # Changed by another process, which does not bump the page-cache version
+        SiteSettings.query.update({'site_name': "اسم جديد",
+                                   'updated_at': datetime.utcnow() + timedelta(seconds=1)})
+        db.session.commit()
+        assert get_site_settings() is snapshot, "served from cache within the TTL"
+
+        now[0] += 5
+        with record_statements(db.engine, 'SELECT') as statements:
+            fresh = get_site_settings()
+        assert fresh.site_name == "اسم جديد"
+        assert 'updated_at' in statements[0][0] and 'site_name' not in statements[0][0]
+        print("✅ A changed updated_at reloads the settings after the TTL")
+
+        now[0] += 5
+        with record_statements(db.engine, 'SELECT') as statements:
+            assert get_site_settings() is fresh
+        assert len(statements) == 1, "unchanged: only the updated_at check"
+        print("✅ An unchanged updated_at keeps the snapshot for another TTL")
+
+def test_settings_load_only_when_rendered(app, record_statements):
+    client = app.test_client()
+    with app.app_context():
+        engine = db.engine
+
+    for url in ('/admin', '/search.json?q=منتج', '/api/v1/products'):
+        with record_statements(engine) as statements:
+            response = client.get(url)
+        assert response.status_code in (200, 302), f"{url} returned {response.status_code}"
+        assert not any('site_settings' in statement for statement, parameters in statements), url
+    assert app.extensions['settings_cache']._snapshot is None
+    print("✅ Redirects and JSON routes never load the settings")
+
+    with record_statements(engine) as statements:
+        assert "متجر الطين" in client.get('/contact').get_data(as_text=True)
+    assert any('site_settings' in statement for statement, parameters in statements)
+    print("✅ Rendered pages load them on first use")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
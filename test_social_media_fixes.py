@@ -6,11 +6,14 @@ Test script to verify social media links and customizable homepage functionality
 from app import create_app, db
 from app.models import SiteSettings
 import time
+import pytest
 
-def test_social_media_functionality():
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+def test_social_media_functionality(app):
     """Test and configure social media functionality"""
-    app = create_app()
-    
     with app.app_context():
         print("🧪 Testing Social Media & Customization Fixes...")
         print("=" * 60)
@@ -48,7 +51,7 @@ def test_social_media_functionality():
             print("✅ Sample social media links configured successfully!")
         except Exception as e:
             print(f"❌ Error saving settings: {e}")
-            return
+            raise
         
         print("\n📱 Testing Social Media URL Generation:")
         print(f"WhatsApp: https://wa.me/{settings.whatsapp_number}")
@@ -83,5 +86,9 @@ def test_social_media_functionality():
         print("Contact Page: http://127.0.0.1:5000/contact")
         print("Admin Login: admin / admin123")
 
+    page = app.test_client().get('/contact').get_data(as_text=True)
+    assert settings.site_name in page and settings.instagram_url in page
+
 if __name__ == '__main__':
-    test_social_media_functionality()
\ No newline at end of file
+    # Against the development database, as before
+    test_social_media_functionality(create_app())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Check the SQLite connection tuning: pragmas on every connection, storefront
+reads running alongside admin writes without lock errors, and writes
+retried while another process holds the write lock
+"""
+
+import sqlite3
+import threading
+import time
+import pytest
+from sqlalchemy import text
+from app import db
+from app.models import Product, Review
+from config import Config
+
+def make_catalog_app(make_app, **settings):
+    app = make_app(PAGE_CACHE_ENABLED=False, **settings)
+    with app.app_context():
+        db.session.add_all([Product(name=f"منتج {i}", description="وصف", price=10 + i, category="ديكور") for i in range(20)])
+        db.session.commit()
+    return app
+
+def test_pragmas(make_app):
+    app = make_catalog_app(make_app)
+    with app.app_context():
+        pragma = lambda name: db.session.execute(text(f'PRAGMA {name}')).scalar()
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('foreign_keys') == 1
+        assert pragma('busy_timeout') == Config.SQLITE_PRAGMAS['busy_timeout']
+        assert pragma('cache_size') == Config.SQLITE_PRAGMAS['cache_size']
+        print("✅ Pragmas applied to new connections")
+
+def test_reads_during_writes(make_app):
+    app = make_catalog_app(make_app)
+    errors, reads, writes = [], [0], [0]
+    stop = threading.Event()
+
+    def reader():
+        client = app.test_client()
+        try:
+            while not stop.is_set():
+                for url in ('/', '/products', '/reviews', '/api/v1/products/1'):
+                    response = client.get(url)
+                    if response.status_code != 200:
+                        errors.append(f'{url}: {response.status_code}')
+                    reads[0] += 1
+        except Exception as e:
+            errors.append(repr(e))
+
+    def writer(worker):
+        with app.app_context():
+            try:
+                for i in range(40):
+                    product = db.session.get(Product, i % 20 + 1)
+                    product.price += 1
+                    db.session.add(Review(customer_name=f"عميل {worker}-{i}", comment="رائع",
+                                          rating=i % 5 + 1, product_id=product.id, is_approved=True))
+                    db.session.commit()
+                    writes[0] += 1
+            except Exception as e:
+                errors.append(repr(e))
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    writers = [threading.Thread(target=writer, args=(i,)) for i in range(3)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    assert not errors, errors[:5]
+    assert writes[0] == 120
+    with app.app_context():
+        assert Review.query.count() == 120
+        print(f"✅ {reads[0]} reads alongside {writes[0]} writes without lock errors")
+
+def test_write_retried_while_locked(make_app):
+    # A short busy_timeout so the lock outlasts SQLite's own wait and the retry has to step in
+    pragmas = dict(Config.SQLITE_PRAGMAS, busy_timeout=10)
+    app = make_catalog_app(make_app, SQLITE_PRAGMAS=pragmas, SQLITE_BUSY_RETRIES=6, SQLITE_RETRY_BACKOFF=0.05)
+    with app.app_context():
+        database = db.engine.url.database
+
+    other = sqlite3.connect(database, isolation_level=None, check_same_thread=False)
+    other.execute('BEGIN IMMEDIATE')
+    threading.Timer(0.3, other.execute, args=('COMMIT',)).start()
+
+    with app.app_context():
+        started = time.monotonic()
+        Product.query.filter_by(id=1).update({'price': 99})
+        db.session.commit()
+        assert time.monotonic() - started >= 0.25
+        assert db.session.get(Product, 1).price == 99
+        print("✅ Write retried until the other connection released its lock")
+    other.close()
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
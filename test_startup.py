@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Check that creating the app has no side effects, that `flask bootstrap`
+sets up a fresh deployment, and the import-time profile of the startup
+benchmark
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import pytest
+import benchmark_startup
+from app.models import Admin
+from app.page_cache import invalidate_pages
+
+def runner_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('task-runner-')]
+
+def test_create_app_and_bootstrap(make_app):
+    threads_before = len(runner_threads())
+    app = make_app(bootstrap=False, TASK_EXECUTOR_ENABLED=True, TASK_POLL_INTERVAL=3600)
+    directory = os.path.dirname(app.config['UPLOAD_FOLDER'])
+    assert os.listdir(directory) == []
+    assert len(runner_threads()) == threads_before
+    print("✅ create_app() created no files, tables or threads")
+
+    cli = app.test_cli_runner()
+    result = cli.invoke(args=['bootstrap'])
+    assert result.exit_code == 0, result.output
+    assert 'Default admin created' in result.output
+    assert os.path.isdir(app.config['UPLOAD_FOLDER'])
+    with app.app_context():
+        assert [admin.username for admin in Admin.query.all()] == ['admin']
+        assert Admin.query.first().check_password('admin123')
+
+    result = cli.invoke(args=['bootstrap', '--admin-password', 'other'])
+    assert result.exit_code == 0 and 'already exists' in result.output
+    with app.app_context():
+        assert Admin.query.count() == 1
+    print("✅ flask bootstrap created the schema and the admin, and is safe to re-run")
+
+    # Everything else appears on first use
+    assert app.test_client().get('/').status_code == 200
+    assert len(runner_threads()) == threads_before + 1
+    assert os.listdir(app.config['TEMPLATE_CACHE_DIR'])
+    with app.app_context():
+        invalidate_pages('products')
+    assert os.path.exists(os.path.join(app.config['PAGE_CACHE_DIR'], 'products.version'))
+    print("✅ Task runner, template cache and page cache versions start on first use")
+
+def test_importing_run_does_not_touch_the_database(tmp_path):
+    database = tmp_path / 'run.sqlite3'
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}')
+    subprocess.run([sys.executable, '-c', 'import run'], check=True, env=env,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert not database.exists()
+    print("✅ Importing run.py leaves the database alone")
+
+def test_import_profile():
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 |     _json',
+        'import time:      2000 |       2100 |   json',
+        'import time:       500 |       2600 | app.models',
+        'import time:      1000 |       1000 | config',
+    ])
+    modules, total = benchmark_startup.parse_importtime(stderr)
+    assert modules['json'] == (2.0, 2.1) and modules['app.models'] == (0.5, 2.6)
+    assert total == 3.6  # top-level imports only
+
+    profile = benchmark_startup.import_profile(runs=1)
+    assert profile['import_ms'] > 0
+    assert 'flask' in profile['slowest_packages'] and 'app' not in profile['slowest_packages']
+    print(f"✅ Import profile: {profile['import_ms']}ms")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
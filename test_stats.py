@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Check the admin statistics snapshot: counters match the per-table queries,
+they cost two SELECTs, and admin writes retire the cached copy
+"""
+
+import pytest
+from app import db
+from app.models import Product, Review, Testimonial
+from app.page_cache import invalidate_pages
+from app.stats import compute_stats, get_stats
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        for i in range(12):
+            db.session.add(Product(name=f"منتج {i}", price=100 + i, category="مجوهرات" if i % 3 else "ديكور",
+                                   is_active=i % 4 != 0, featured=i % 5 == 0))
+        for i in range(15):
+            db.session.add(Review(customer_name=f"عميل {i}", comment="رائع", rating=i % 5 + 1,
+                                  is_approved=i % 2 == 0, is_featured=i % 7 == 0))
+        for i in range(4):
+            db.session.add(Testimonial(customer_name=f"عميل {i}", testimonial_text="شكراً", is_active=i != 0))
+        db.session.commit()
+    return app
+
+def test_stats_snapshot(app, record_statements):
+    with app.app_context():
+        with record_statements(db.engine, 'SELECT') as selects:
+            stats = compute_stats()
+        assert len(selects) == 2, f"expected 2 queries, got {len(selects)}"
+
+        avg_rating = db.session.query(db.func.avg(Review.rating)).filter_by(is_approved=True).scalar()
+        assert stats['products'] == {
+            'total': Product.query.count(),
+            'active': Product.query.filter_by(is_active=True).count(),
+            'featured': Product.query.filter_by(featured=True).count(),
+        }
+        assert stats['reviews'] == {
+            'total': Review.query.count(),
+            'approved': Review.query.filter_by(is_approved=True).count(),
+            'pending': Review.query.filter_by(is_approved=False).count(),
+            'featured': Review.query.filter_by(is_featured=True).count(),
+            'avg_rating': round(avg_rating, 1),
+        }
+        assert stats['testimonials'] == {
+            'total': Testimonial.query.count(),
+            'active': Testimonial.query.filter_by(is_active=True).count(),
+            'featured': Testimonial.query.filter_by(is_featured=True).count(),
+        }
+        categories = db.session.query(Product.category, db.func.count(Product.id)) \
+            .filter_by(is_active=True).group_by(Product.category).all()
+        assert sorted(stats['categories']) == sorted(tuple(row) for row in categories)
+        assert sorted(stats['all_categories']) == sorted(name for name, in db.session.query(Product.category).distinct())
+        print("✅ Snapshot matches the per-table counts in 2 queries")
+
+        get_stats()
+        with record_statements(db.engine, 'SELECT') as selects:
+            get_stats()
+        assert not selects, "cached snapshot should not query"
+
+        db.session.add(Product(name="جديد", price=50, category="ديكور"))
+        db.session.commit()
+        invalidate_pages('products')
+        assert get_stats()['products']['total'] == 13
+        print("✅ Admin writes refresh the cached snapshot")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
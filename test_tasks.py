@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Check the background task queue: failed tasks are retried with
+exponential backoff, give up after max_attempts and can be retried by
+an admin from /admin/tasks
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Admin, BackgroundTask
+from app.tasks import enqueue, retry_task, run_next_task, run_pending_tasks, task
+
+calls = []
+
+@task('test_flaky')
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError(f'failure {len(calls)}')
+
+@pytest.fixture
+def app(make_app):
+    calls.clear()
+    app = make_app()
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+    return app
+
+def make_due(entry):
+    entry.run_after = datetime.utcnow()
+    db.session.commit()
+
+def test_failures_back_off_then_succeed(app):
+    with app.app_context():
+        entry = enqueue('test_flaky', fail_times=2)
+        db.session.commit()
+        task_id = entry.id
+
+        before = datetime.utcnow()
+        assert run_next_task() is True
+        entry = db.session.get(BackgroundTask, task_id)
+        assert (entry.status, entry.attempts, entry.last_error) == ('pending', 1, 'RuntimeError: failure 1')
+        assert entry.run_after >= before + timedelta(seconds=10)
+        assert run_pending_tasks() == 0, "not due until the backoff has passed"
+
+        make_due(entry)
+        assert run_next_task() is True
+        entry = db.session.get(BackgroundTask, task_id)
+        assert (entry.status, entry.attempts) == ('pending', 2)
+        assert entry.run_after >= datetime.utcnow() + timedelta(seconds=15)
+        print("✅ Failed tasks are retried after 10s, 20s, ...")
+
+        make_due(entry)
+        assert run_pending_tasks() == 1
+        entry = db.session.get(BackgroundTask, task_id)
+        assert (entry.status, entry.attempts, entry.last_error) == ('done', 3, None)
+        assert len(calls) == 3
+        print("✅ A task that recovers is marked done")
+
+def test_gives_up_after_max_attempts_until_retried(app):
+    with app.app_context():
+        entry = enqueue('test_flaky', max_attempts=2, fail_times=5)
+        db.session.commit()
+        task_id = entry.id
+        for _ in range(2):
+            make_due(db.session.get(BackgroundTask, task_id))
+            run_next_task()
+        entry = db.session.get(BackgroundTask, task_id)
+        assert (entry.status, entry.attempts) == ('failed', 2)
+        make_due(entry)
+        assert run_pending_tasks() == 0, "failed tasks are not picked up again"
+        print("✅ Tasks are marked failed after max_attempts")
+
+        assert retry_task(task_id) is True
+        db.session.commit()
+        entry = db.session.get(BackgroundTask, task_id)
+        assert (entry.status, entry.attempts) == ('pending', 0)
+        assert retry_task(task_id) is False, "only failed tasks can be retried"
+        assert retry_task(task_id + 1) is False
+        print("✅ retry_task() puts a failed task back in the queue")
+
+def test_admin_retry_route(app):
+    with app.app_context():
+        entry = enqueue('test_flaky', max_attempts=1, fail_times=5)
+        db.session.commit()
+        task_id = entry.id
+        run_next_task()
+        assert db.session.get(BackgroundTask, task_id).status == 'failed'
+
+    client = app.test_client()
+    assert client.post(f'/admin/tasks/{task_id}/retry').status_code == 302
+    with app.app_context():
+        assert db.session.get(BackgroundTask, task_id).status == 'failed', "admins only"
+
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    page = client.get('/admin/tasks?status=failed').get_data(as_text=True)
+    assert 'test_flaky' in page and 'RuntimeError: failure 1' in page
+
+    response = client.post(f'/admin/tasks/{task_id}/retry?status=failed')
+    assert response.status_code == 302 and response.location.endswith('/admin/tasks?status=failed')
+    assert 'تمت إعادة جدولة المهمة' in client.get(response.location).get_data(as_text=True)
+    with app.app_context():
+        entry = db.session.get(BackgroundTask, task_id)
+        assert (entry.status, entry.attempts) == ('pending', 0)
+
+    # Already back in the queue
+    client.post(f'/admin/tasks/{task_id}/retry')
+    assert 'لا يمكن إعادة تشغيل هذه المهمة' in client.get('/admin/tasks').get_data(as_text=True)
+    with app.app_context():
+        assert run_pending_tasks() == 1
+        assert db.session.get(BackgroundTask, task_id).status == 'failed', "still failing"
+    print("✅ /admin/tasks lists failed tasks and retries them")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
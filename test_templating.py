@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Check the template bytecode cache shared by workers, the warm-up run at
+worker start and the cold-start benchmark
+"""
+
+import os
+import tempfile
+from types import SimpleNamespace
+import pytest
+import benchmark_startup
+import gunicorn_config
+from app import db
+from app.models import Product
+from app.templating import warm_templates
+
+def cache_files(app):
+    directory = app.config['TEMPLATE_CACHE_DIR']
+    return {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)}
+
+def test_bytecode_cache_shared_across_workers(make_app):
+    first = make_app(PAGE_CACHE_ENABLED=False)
+    with first.app_context():
+        db.session.add(Product(name="مزهرية", description="وصف", price=100))
+        db.session.commit()
+    page = first.test_client().get('/products').data
+    written = cache_files(first)
+    assert len(written) >= 2  # products.html, base.html, partials
+    print(f"✅ First worker compiled {len(written)} templates into the cache")
+
+    # A second worker (a new environment) loads the compiled code instead of recompiling
+    second = make_app(PAGE_CACHE_ENABLED=False, SQLALCHEMY_DATABASE_URI=first.config['SQLALCHEMY_DATABASE_URI'],
+                      TEMPLATE_CACHE_DIR=first.config['TEMPLATE_CACHE_DIR'])
+    loaded = []
+    cache = second.jinja_env.bytecode_cache
+    original_load = cache.load_bytecode
+
+    def load_bytecode(bucket):
+        original_load(bucket)
+        loaded.append(bucket.code is not None)
+
+    cache.load_bytecode = load_bytecode
+    assert second.test_client().get('/products').data == page
+    assert loaded and all(loaded)
+    assert cache_files(second) == written
+    print("✅ Second worker reused the compiled templates")
+
+def test_bytecode_cache_disabled(make_app):
+    app = make_app(PAGE_CACHE_ENABLED=False, TEMPLATE_BYTECODE_CACHE=False)
+    assert app.jinja_env.bytecode_cache is None
+    assert app.test_client().get('/contact').status_code == 200
+    assert not os.path.exists(app.config['TEMPLATE_CACHE_DIR'])
+    print("✅ TEMPLATE_BYTECODE_CACHE=False compiles in memory only")
+
+def test_warm_templates_at_worker_start(make_app):
+    app = make_app(PAGE_CACHE_ENABLED=False)
+    templates_dir = os.path.join(app.root_path, 'templates')
+    on_disk = {os.path.relpath(os.path.join(root, name), templates_dir).replace(os.sep, '/')
+               for root, _, names in os.walk(templates_dir) for name in names if name.endswith('.html')}
+
+    logged = []
+    worker = SimpleNamespace(wsgi=app, log=SimpleNamespace(info=lambda *args: logged.append(args)))
+    gunicorn_config.post_worker_init(worker)
+    loaded = {key[1] for key in app.jinja_env.cache.keys()}
+    assert on_disk <= loaded, on_disk - loaded
+    assert logged and logged[0][1] == len(on_disk)
+    assert len(cache_files(app)) == len(on_disk)
+    print(f"✅ Worker start compiled all {len(on_disk)} templates")
+
+    # Warm-up is optional
+    fresh = make_app(PAGE_CACHE_ENABLED=False, TEMPLATE_WARMUP=False)
+    gunicorn_config.post_worker_init(SimpleNamespace(wsgi=fresh, log=None))
+    assert len(fresh.jinja_env.cache) == 0
+    assert sorted(warm_templates(fresh)) == sorted(on_disk)
+    print("✅ TEMPLATE_WARMUP=False leaves compilation to the first requests")
+
+def test_startup_benchmark():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        benchmark_startup.seed(tmpdir, products=10)
+        results = benchmark_startup.benchmark(tmpdir, runs=1)
+        assert list(results) == [name for name, _, _ in benchmark_startup.SETUPS]
+        for name, stats in results.items():
+            assert stats['all_pages_ms'] >= stats['first_page_ms'] > 0, name
+        assert results['no cache']['warmup_ms'] == 0 and results['warm-up']['warmup_ms'] > 0
+        print("✅ Startup benchmark ran every setup")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Check upload ingestion and storage: file parts stream into the incoming
+folder, never the served upload folder, and are checked as they arrive;
+identical images share one file, which goes with its last reference
+"""
+
+import errno
+import io
+import os
+import threading
+import pytest
+from flask import request
+from werkzeug.exceptions import RequestEntityTooLarge
+from app import db, uploads
+from app.models import Admin, Product, StoredFile
+from app.tasks import run_pending_tasks
+from app.uploads import IngestFile, save_upload
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 100
+OTHER_PNG = b'\x89PNG\r\n\x1a\n' + b'\x01' * 100
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        admin = Admin(username='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+        db.session.commit()
+    return app
+
+def admin_client(app):
+    client = app.test_client()
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+def product_form(name, image):
+    return {'name': name, 'price': '10', 'description': '', 'category': '', 'image': (io.BytesIO(image), 'photo.png')}
+
+def stored_files(app):
+    with app.app_context():
+        return {stored.content_hash[:8]: stored.ref_count for stored in StoredFile.query}
+
+def test_parts_stream_into_the_incoming_folder(app):
+    data = {'image': (io.BytesIO(PNG), 'photo.png'), 'logo': (io.BytesIO(b''), ''), 'name': 'منتج'}
+    with app.test_request_context('/admin/products/new', method='POST', data=data):
+        image, logo = request.files['image'], request.files['logo']
+        assert isinstance(image.stream, IngestFile)
+        assert os.path.dirname(image.stream.path) == app.config['UPLOAD_INCOMING_DIR']
+        assert not isinstance(logo.stream, IngestFile), "empty file inputs need no temp file"
+        assert os.listdir(app.config['UPLOAD_INCOMING_DIR']) == [os.path.basename(image.stream.path)]
+        assert os.listdir(app.config['UPLOAD_FOLDER']) == []
+    assert os.listdir(app.config['UPLOAD_INCOMING_DIR']) == []
+    print("✅ Uploads are received outside the served folder")
+
+def test_ingestion_rejects_and_cleans_up(app):
+    client = admin_client(app)
+    incoming, upload_folder = app.config['UPLOAD_INCOMING_DIR'], app.config['UPLOAD_FOLDER']
+
+    # Checked by content, whatever the file is called
+    response = client.post('/admin/products/new', data=product_form("أقراط", b'<?php echo 1; ?>'))
+    assert 'نوع الملف غير مدعوم' in response.get_data(as_text=True)
+    assert os.listdir(incoming) == [] and os.listdir(upload_folder) == []
+    print("✅ Files that are not images are rejected by their leading bytes")
+
+    app.config['MAX_UPLOAD_SIZE'] = 1024
+    too_large = product_form("أقراط", PNG + b'\x00' * 1024)
+    with app.test_request_context('/admin/products/new', method='POST', data=too_large):
+        with pytest.raises(RequestEntityTooLarge):
+            request.files
+    client.post('/admin/products/new', data=product_form("أقراط", PNG + b'\x00' * 1024))
+    assert os.listdir(incoming) == [] and os.listdir(upload_folder) == []
+    with app.app_context():
+        assert Product.query.count() == 0
+    app.config['MAX_UPLOAD_SIZE'] = 10 * 1024 * 1024
+    print("✅ Uploads over MAX_UPLOAD_SIZE are cut off while streaming")
+
+    # Invalid form: the upload is received but never saved
+    form = dict(product_form("أقراط", PNG), price='0')
+    assert client.post('/admin/products/new', data=form).status_code == 200
+    assert os.listdir(incoming) == [] and os.listdir(upload_folder) == []
+    with app.app_context():
+        assert Product.query.count() == 0 and StoredFile.query.count() == 0
+    print("✅ Temp files of unsaved uploads are removed at teardown")
+
+def test_rolled_back_uploads_are_removed(app):
+    settings = app.test_client().get('/api/v1/settings').get_json()['data']
+    form = {name: settings.get(name) or '' for name in (
+        'site_name', 'site_description', 'about_text', 'footer_text', 'contact_phone', 'contact_email',
+        'whatsapp_number', 'facebook_url', 'instagram_url', 'tiktok_url',
+        'background_color', 'secondary_color', 'accent_color', 'theme_style')}
+    # The logo is saved, then the hero image fails and the request rolls back
+    form['logo'] = (io.BytesIO(PNG), 'logo.png')
+    form['hero_image'] = (io.BytesIO(b'GIF00a'), 'hero.gif')
+    client = admin_client(app)
+    assert client.post('/admin/settings', data=form).status_code == 302
+    assert os.listdir(app.config['UPLOAD_FOLDER']) == []
+    assert os.listdir(app.config['UPLOAD_INCOMING_DIR']) == []
+    with app.app_context():
+        assert StoredFile.query.count() == 0
+    print("✅ Files saved for a rolled-back transaction are removed")
+
+def test_saving_across_filesystems(tmp_path, monkeypatch):
+    incoming, upload_folder = tmp_path / 'incoming', tmp_path / 'uploads'
+    incoming.mkdir()
+    upload_folder.mkdir()
+    (incoming / 'a.part').write_bytes(PNG)
+    replace = os.replace
+
+    def cross_device_replace(source, destination):
+        if os.path.dirname(source) != os.path.dirname(destination):
+            raise OSError(errno.EXDEV, 'Invalid cross-device link')
+        replace(source, destination)
+
+    monkeypatch.setattr(os, 'replace', cross_device_replace)
+    uploads._move_into(str(incoming / 'a.part'), str(upload_folder / 'a.png'))
+    assert os.listdir(incoming) == [] and os.listdir(upload_folder) == ['a.png']
+    assert (upload_folder / 'a.png').read_bytes() == PNG
+    print("✅ Uploads are copied in when the incoming folder is on another filesystem")
+
+def test_single_row_uploads_are_shared_and_released(app):
+    client = admin_client(app)
+    upload_folder = app.config['UPLOAD_FOLDER']
+    assert client.post('/admin/products/new', data=product_form("أقراط", PNG)).status_code == 302
+    assert client.post('/admin/products/new', data=product_form("عقد", PNG)).status_code == 302
+    with app.app_context():
+        first, second = Product.query.order_by(Product.id).all()
+        assert first.image_filename == second.image_filename
+        original = first.image_filename
+    assert list(stored_files(app).values()) == [2]
+    assert os.listdir(upload_folder) == [original]
+    print("✅ Uploading the same image twice stores one file with two references")
+
+    assert client.post(f'/admin/products/{first.id}/edit', data=product_form("أقراط", OTHER_PNG)).status_code == 302
+    assert sorted(stored_files(app).values()) == [1, 1]
+    assert len(os.listdir(upload_folder)) == 2
+    print("✅ Replacing an image releases one reference to the old one")
+
+    assert client.post(f'/admin/products/{second.id}/delete').status_code == 302
+    assert len(stored_files(app)) == 1
+    assert original in os.listdir(upload_folder), "removed only once the cleanup task runs"
+    with app.app_context():
+        run_pending_tasks()
+    assert original not in os.listdir(upload_folder) and len(os.listdir(upload_folder)) == 1
+    print("✅ The file goes with its last reference")
+
+def test_reupload_during_cleanup_keeps_the_file(app):
+    client = admin_client(app)
+    client.post('/admin/products/new', data=product_form("أقراط", PNG))
+    with app.app_context():
+        run_pending_tasks()
+        product = Product.query.one()
+        path = os.path.join(app.config['UPLOAD_FOLDER'], product.image_filename)
+    client.post(f'/admin/products/{product.id}/delete')
+
+    def clean_up():
+        with app.app_context():
+            run_pending_tasks()
+
+    # The same image again, not yet committed when the cleanup task starts
+    with app.test_request_context('/admin/products/new', method='POST', data=product_form("عقد", PNG)):
+        filename, variants = save_upload(request.files['image'])
+        cleanup = threading.Thread(target=clean_up)
+        cleanup.start()
+        cleanup.join(0.3)
+        assert cleanup.is_alive(), "cleanup should wait for the upload's transaction"
+        db.session.add(Product(name="عقد", price=10, image_filename=filename, image_variants=variants))
+        db.session.commit()
+    cleanup.join()
+    assert os.path.exists(path)
+    with app.app_context():
+        assert StoredFile.query.one().ref_count == 1
+    print("✅ A re-upload racing the cleanup task keeps its file")
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main(['-s', __file__]))